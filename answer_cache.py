@@ -0,0 +1,257 @@
+"""Semantic answer cache: near-duplicate standalone questions reuse a stored answer.
+
+Students ask the same admission / fee / cut-off questions in many wordings.
+Past standalone questions are embedded (normalized, inner product = cosine)
+into a small FAISS IndexIDMap2; a new question whose nearest neighbour scores
+at least `threshold`, with the same filters, gets that answer back without
+retrieval or an LLM call. When a request has no filters and `classify` is set
+(the retriever's auto_filter), the filters classified from the question are
+the key, so "IT cut-off 2024" never gets the civil department's answer.
+
+An entry is only served while its sources are unchanged: each stores the
+ingest manifest hash of every file its context came from, and when the
+vector store on disk changes (re-ingest) entries whose files changed or
+disappeared are dropped. Entries also expire after `ttl` seconds and the
+least recently used are evicted beyond `max_entries`.
+
+Persisted to ANSWER_CACHE_PATH as vectors.npy + entries.json (no pickle),
+written at most every SAVE_INTERVAL seconds and at exit.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from metadata_index import classify_query, filter_key
+from retrieval import index_signature
+
+ANSWER_CACHE_PATH = os.getenv("CAMPUSPAL_ANSWER_CACHE_PATH", "vectorstore/answer_cache")
+MANIFEST_PATH = "vectorstore/ingest_manifest.json"
+SAVE_INTERVAL = 30.0  # Seconds between saves while serving
+SEARCH_NEIGHBOURS = 4  # Nearest questions checked for a filter match
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def load_source_hashes(manifest_path=MANIFEST_PATH):
+    """{source path: content hash} from ingest.py's manifest; {} if it can't be read."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+    return {path: entry.get("hash") for path, entry in files.items()}
+
+
+class SemanticAnswerCache:
+    def __init__(self, embed, db_path, threshold=0.92, max_entries=5000, ttl=86400.0,
+                 path=ANSWER_CACHE_PATH, check_interval=5.0, auto_filter=False, manifest_path=MANIFEST_PATH):
+        """embed: question -> vector (the retriever's cached embed_query, so a miss
+        doesn't embed the question twice). path=None keeps the cache in memory only.
+        auto_filter: key unfiltered requests on classify_query(question), as the retriever does."""
+        self.embed = embed
+        self.db_path = db_path
+        self.auto_filter = auto_filter
+        self.manifest_path = manifest_path
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.path = path
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._lock = threading.RLock()
+        self._index = None
+        self._entries = {}  # id -> {"question", "answer", "filters", "documents", "sources", "created", "used"}
+        self._vectors = {}  # id -> normalized float32 vector (kept for saving)
+        self._next_id = 0
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._last_check = 0.0
+        # None forces a source check on first use: the store may have been re-ingested while we were down
+        self._signature = None
+        self._source_hashes = {}
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ensure_index(self, dim):
+        if self._index is None:
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def _remove(self, ids):
+        if not ids:
+            return
+        self._index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+            self._vectors.pop(entry_id, None)
+        self._dirty = True
+
+    def _check_sources(self):
+        """After a re-ingest, drops entries whose source files changed (or are gone)."""
+        if time.monotonic() - self._last_check < self.check_interval:
+            return
+        self._last_check = time.monotonic()
+        signature = index_signature(self.db_path)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._source_hashes = load_source_hashes(self.manifest_path)
+        stale = [
+            entry_id for entry_id, entry in self._entries.items()
+            if not entry["sources"] or any(self._source_hashes.get(source) != content_hash
+                                           for source, content_hash in entry["sources"].items())
+        ]
+        if stale:
+            print(f"[INFO] Vector store changed - dropped {len(stale)} cached answers with changed sources.")
+            self.invalidated += len(stale)
+            self._remove(stale)
+
+    def _key(self, question, filters):
+        if filters is None and self.auto_filter:
+            filters = classify_query(question)
+        return filter_key(filters)
+
+    def _expired(self, entry, now):
+        return self.ttl > 0 and now - entry["created"] > self.ttl
+
+    def lookup(self, question, filters=None):
+        """Returns (answer, documents) for a similar enough cached question, else None."""
+        with self._lock:
+            self._check_sources()
+            if not self._entries:
+                self.misses += 1
+                return None
+        vector = _normalize(self.embed(question))
+        key = self._key(question, filters)
+        now = time.time()
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores, ids = self._index.search(vector.reshape(1, -1), min(SEARCH_NEIGHBOURS, len(self._entries)))
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id == -1 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry["filters"] != key:
+                    continue
+                if self._expired(entry, now):
+                    self._remove([int(entry_id)])
+                    continue
+                entry["used"] = now
+                self.hits += 1
+                documents = [Document(page_content=text, metadata=metadata) for text, metadata in entry["documents"]]
+                return entry["answer"], documents
+            self.misses += 1
+            return None
+
+    def put(self, question, filters, answer, documents):
+        """Stores an answer with the documents it was generated from."""
+        if not answer or not answer.strip():
+            return
+        vector = _normalize(self.embed(question))
+        now = time.time()
+        with self._lock:
+            self._check_sources()
+            sources = {doc.metadata.get("source") for doc in documents if doc.metadata.get("source")}
+            entry_id = self._next_id
+            self._next_id += 1
+            self._ensure_index(len(vector))
+            self._index.add_with_ids(vector.reshape(1, -1), np.asarray([entry_id], dtype=np.int64))
+            self._vectors[entry_id] = vector
+            self._entries[entry_id] = {
+                "question": question,
+                "answer": answer,
+                "filters": self._key(question, filters),
+                "documents": [(doc.page_content, doc.metadata) for doc in documents],
+                "sources": {source: self._source_hashes.get(source) for source in sources},
+                "created": now,
+                "used": now,
+            }
+            self._dirty = True
+            self._evict(now)
+            if self.path and time.monotonic() - self._last_save > SAVE_INTERVAL:
+                self.save()
+
+    def _evict(self, now):
+        expired = [entry_id for entry_id, entry in self._entries.items() if self._expired(entry, now)]
+        self._remove(expired)
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._entries, key=lambda entry_id: self._entries[entry_id]["used"])[:overflow]
+            self._remove(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._remove(list(self._entries))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            ids = sorted(self._entries)
+            entries = [self._entries[entry_id] for entry_id in ids]
+            vectors = np.stack([self._vectors[entry_id] for entry_id in ids]) if ids \
+                else np.zeros((0, 0), dtype=np.float32)
+            np.save(os.path.join(self.path, "vectors.tmp.npy"), vectors)
+            with open(os.path.join(self.path, "entries.json.tmp"), "w", encoding="utf-8") as f:
+                json.dump(entries, f, default=str)
+            os.replace(os.path.join(self.path, "vectors.tmp.npy"), os.path.join(self.path, "vectors.npy"))
+            os.replace(os.path.join(self.path, "entries.json.tmp"), os.path.join(self.path, "entries.json"))
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+    def _load(self):
+        entries_path = os.path.join(self.path, "entries.json")
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        if not (os.path.exists(entries_path) and os.path.exists(vectors_path)):
+            return
+        try:
+            with open(entries_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            vectors = np.load(vectors_path)
+            if len(entries) != len(vectors):
+                raise ValueError("entries.json and vectors.npy disagree")
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable answer cache at {self.path}: {e}")
+            return
+        for entry, vector in zip(entries, vectors):
+            # JSON turns the filter_key tuples into lists; restore them so lookups compare equal.
+            # Unfiltered entries saved before auto_filter keys existed get their classified key.
+            filters = entry.get("filters")
+            entry["filters"] = tuple((field, tuple(value) if isinstance(value, list) else value)
+                                     for field, value in filters) if filters else self._key(entry["question"], None)
+            entry["documents"] = [tuple(document) for document in entry["documents"]]
+            self._ensure_index(len(vector))
+            self._index.add_with_ids(vector.reshape(1, -1).astype(np.float32),
+                                     np.asarray([self._next_id], dtype=np.int64))
+            self._vectors[self._next_id] = vector.astype(np.float32)
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+        print(f"Answer cache: loaded {len(entries)} entries from {self.path}")
@@ -1,18 +1,72 @@
 import os
-from fastapi import FastAPI
+import json
+import time
+import asyncio
+import weakref
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional, Union
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from rag_chain_builder import build_chain  #  import the shared builder
+import metrics
 
 load_dotenv()
 
 #Globals
 rag_chain = None
 
+# Startup: "background" serves /healthz immediately and imports + loads the chain in a thread
+# (/readyz turns 200 when done); "blocking" loads before the server accepts requests
+STARTUP_MODE = os.getenv("CAMPUSPAL_STARTUP_MODE", "background")
+startup = {"state": "starting", "error": None, "phases_ms": {}}
+
+# Admission control: requests beyond MAX_IN_FLIGHT wait in a queue of MAX_QUEUED, the rest get 429
+MAX_IN_FLIGHT = int(os.getenv("CAMPUSPAL_MAX_IN_FLIGHT", "64"))
+MAX_QUEUED = int(os.getenv("CAMPUSPAL_MAX_QUEUED", "256"))
+QUEUE_TIMEOUT = float(os.getenv("CAMPUSPAL_QUEUE_TIMEOUT", "30"))
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight chat requests per process and rejects overload with 429."""
+
+    def __init__(self, max_in_flight, max_queued, queue_timeout):
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.queued >= self.max_queued:
+            raise HTTPException(status_code=429, detail="Server busy, please retry shortly.",
+                                headers={"Retry-After": "1"})
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=429, detail="Server busy, please retry shortly.",
+                                headers={"Retry-After": "1"})
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def metric_samples(self):
+        return [
+            ("campuspal_requests_in_flight", "gauge", "Chat requests being answered.", {}, self.in_flight),
+            ("campuspal_requests_queued", "gauge", "Chat requests waiting for a slot.", {}, self.queued),
+        ]
+
+
+limiter = ConcurrencyLimiter(MAX_IN_FLIGHT, MAX_QUEUED, QUEUE_TIMEOUT)
+metrics.REGISTRY.register_collector("limiter", limiter.metric_samples)
+
 # Data Models
 class ChatMessage(BaseModel):
     role: Literal["user", "assistant"]
@@ -21,16 +75,37 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     input: str
     chat_history: List[ChatMessage] = Field(default_factory=list)
+    # e.g. {"department": "it", "doc_type": "syllabus", "year": "2024-25"}; omitted -> picked from the question
+    filters: Optional[Dict[Literal["department", "doc_type", "year"], Union[str, List[str]]]] = None
 
 class ChatResponse(BaseModel):
     answer: str
 
+def load_chain():
+    """Imports and builds the RAG chain, recording how long each startup phase took."""
+    global rag_chain
+    phases = startup["phases_ms"]
+    start = time.perf_counter()
+    try:
+        import_start = time.perf_counter()
+        from rag_chain_builder import build_chain  # Heavy: langchain, FAISS, torch
+        phases["imports"] = round((time.perf_counter() - import_start) * 1000, 1)
+        rag_chain = build_chain(warmup=True, timings=phases)
+        startup["state"] = "ready"
+    except Exception as e:
+        startup["state"] = "failed"
+        startup["error"] = str(e)
+        print(f"[ERROR] Startup failed: {e}")
+    phases["total"] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"[STARTUP] state={startup['state']} phases_ms={phases}")
+
 #FastAPI Setup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global rag_chain
-    print("Starting CampusPal backend...")
-    rag_chain = build_chain()
+    print(f"Starting CampusPal backend ({STARTUP_MODE} startup)...")
+    loader = asyncio.get_running_loop().run_in_executor(None, load_chain)
+    if STARTUP_MODE != "background":
+        await loader
     yield
     print("Shutting down...")
 
@@ -54,27 +129,150 @@ app.add_middleware(
 def root():
     return {"status": "CampusPal backend running"}
 
-@app.post("/chat", response_model=ChatResponse)
-def chat_with_bot(request: ChatRequest):
-    global rag_chain
-    if not rag_chain:
-        return {"answer": "Error: RAG chain not initialized."}
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving, whether or not the chain has loaded."""
+    return {"status": "alive"}
 
-    # Convert history
-    lc_chat_history: List[BaseMessage] = [
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once the chain is built and warmed up, 503 before that (or if loading failed)."""
+    body = {"status": startup["state"], "phases_ms": startup["phases_ms"]}
+    if startup["state"] != "ready":
+        body["error"] = startup["error"]
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus text format: per-stage latency histograms, in-flight gauges, cache hit/miss
+    counters, retrieved-doc and token count histograms."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/traces")
+def traces_endpoint():
+    """Most recent sampled request traces (CAMPUSPAL_TRACE_SAMPLE_RATE), oldest first."""
+    return {"sample_rate": metrics.TRACE_SAMPLE_RATE, "traces": metrics.recent_traces()}
+
+def require_ready():
+    if rag_chain is None:
+        detail = f"RAG chain failed to load: {startup['error']}" if startup["state"] == "failed" \
+            else "RAG chain is still loading, retry shortly."
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+
+def to_lc_history(chat_history: List[ChatMessage]):
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    return [
         HumanMessage(content=m.content) if m.role == "user" else AIMessage(content=m.content)
-        for m in request.chat_history
+        for m in chat_history
     ]
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_with_bot(request: ChatRequest):
     try:
-        response = rag_chain.invoke({
+        require_ready()
+        # Convert history
+        lc_chat_history = to_lc_history(request.chat_history)
+        await limiter.acquire()
+    except HTTPException as e:
+        metrics.REQUESTS.inc(endpoint="chat", status=str(e.status_code))
+        raise
+    trace = metrics.start_trace("chat", history_turns=len(request.chat_history))
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        response = await rag_chain.ainvoke({
             "chat_history": lc_chat_history,
-            "input": request.input
+            "input": request.input,
+            "filters": request.filters,
         })
         return {"answer": response.get("answer", "Sorry, I couldn't find an answer.")}
     except Exception as e:
+        status = "error"
         print(f"Error during chat: {e}")
         return {"answer": f"Internal error: {e}"}
+    finally:
+        limiter.release()
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="chat")
+        metrics.REQUESTS.inc(endpoint="chat", status=status)
+        metrics.finish_trace(trace, status=status)
+
+async def _stream_answer(inputs):
+    """Yields SSE events for one answer and logs time-to-first-token."""
+    # Started here, not in the endpoint: the body is iterated after chat_stream has returned
+    trace = metrics.start_trace("chat_stream", history_turns=len(inputs["chat_history"]))
+    start = time.perf_counter()
+    first_token_at = None
+    sources_sent = False
+    try:
+        async for chunk in rag_chain.astream(inputs):
+            if "context" in chunk and not sources_sent:
+                sources_sent = True
+                yield sse_event("sources", {"sources": [doc.metadata for doc in chunk["context"]]})
+            token = chunk.get("answer")
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield sse_event("token", {"token": token})
+    except Exception as e:
+        print(f"Error during chat stream: {e}")
+        metrics.REQUESTS.inc(endpoint="chat_stream", status="error")
+        metrics.finish_trace(trace, status="error")
+        yield sse_event("error", {"error": f"Internal error: {e}"})
+        return
+    end = time.perf_counter()
+    metrics.REQUEST_SECONDS.observe(end - start, endpoint="chat_stream")
+    metrics.REQUESTS.inc(endpoint="chat_stream", status="ok")
+    metrics.finish_trace(trace, status="ok")
+    timings = {
+        "time_to_first_token_ms": round((first_token_at - start) * 1000, 1) if first_token_at else None,
+        "generation_ms": round((end - first_token_at) * 1000, 1) if first_token_at else None,
+        "total_ms": round((end - start) * 1000, 1),
+    }
+    print(f"[CHAT STREAM] {timings}")
+    yield sse_event("done", timings)
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Server-Sent Events: `sources` once retrieval is done, then `token`s, then `done` with timings."""
+    inputs = {"chat_history": to_lc_history(request.chat_history), "input": request.input,
+              "filters": request.filters}
+    try:
+        require_ready()
+        await limiter.acquire()
+    except HTTPException as e:
+        metrics.REQUESTS.inc(endpoint="chat_stream", status=str(e.status_code))
+        raise
+
+    released = False
+
+    def release_once():
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release()
+
+    async def event_stream():
+        try:
+            async for event in _stream_answer(inputs):
+                yield event
+        finally:
+            release_once()
+
+    stream = event_stream()
+    # If the client is gone before the server starts iterating, the generator's finally never
+    # runs: release when it is garbage-collected, or when the response is done, whichever is first
+    weakref.finalize(stream, release_once)
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_once),
+    )
 
 #Run server
 if __name__ == "__main__":
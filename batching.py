@@ -0,0 +1,117 @@
+"""Cross-request micro-batching for the retriever's query embedding and FAISS search.
+
+Requests are answered on executor threads, each embedding one query and
+searching one vector. MicroBatcher lets those threads hand their item to a
+dispatcher thread, which runs a single batched call (one MiniLM forward pass,
+one index.search over a matrix) and gives every caller its own row back.
+
+The wait is adaptive: a batch is dispatched as soon as the queue is empty
+unless the previous batch held more than one item, i.e. only under
+concurrent load does the dispatcher hold a batch open for up to `max_wait_ms`
+to let more callers join. A lone request pays no added latency.
+
+close() queues a sentinel behind the pending items: they are still
+dispatched, then the thread exits. Later submissions raise RuntimeError.
+"""
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import metrics
+
+BATCH_SIZE = metrics.REGISTRY.histogram("campuspal_batch_size", "Items per micro-batched call.", ["batcher"],
+                                        (1, 2, 4, 8, 16, 32, 64, 128))
+_CLOSE = object()  # Queued by close(); the dispatcher exits once it reaches it
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch=32, max_wait_ms=5.0, name="batcher"):
+        """batch_fn: list of items -> list of results in the same order."""
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._last_size = 1
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"microbatch-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError(f"MicroBatcher '{self.name}' is closed")
+            self._queue.put((item, future))
+        return future
+
+    def close(self, timeout=5.0):
+        """Dispatches what is already queued, then stops the thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        """(next batch, whether close() was called after it)."""
+        entry = self._queue.get()
+        if entry is _CLOSE:
+            return [], True
+        batch = [entry]
+        # Hold the batch open only while requests are actually arriving together
+        deadline = time.monotonic() + (self.max_wait if self._last_size > 1 else 0.0)
+        while len(batch) < self.max_batch:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if entry is _CLOSE:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, closing = self._collect()
+            if batch:
+                self._dispatch(batch)
+            if closing:
+                return
+
+    def _dispatch(self, batch):
+        self._last_size = len(batch)
+        self.batches += 1
+        self.items += len(batch)
+        BATCH_SIZE.observe(len(batch), batcher=self.name)
+        items = [item for item, _ in batch]
+        try:
+            results = self.batch_fn(items)
+            # zip() would silently leave the callers past a short result waiting forever
+            if len(results) != len(batch):
+                raise RuntimeError(f"MicroBatcher '{self.name}': batch_fn returned {len(results)} results "
+                                   f"for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0}
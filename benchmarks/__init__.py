@@ -0,0 +1 @@
+"""Offline benchmarks for ingest, retrieval and the /chat API (run from the repo root, see README)."""
@@ -0,0 +1,126 @@
+"""End-to-end load test for backend.py's /chat and /chat/stream (stdlib only).
+
+Start the backend with the fake LLM so the test needs no network:
+
+    CAMPUSPAL_FAKE_LLM=1 uvicorn backend:app --port 8000
+    python -m benchmarks.chat_load --url http://localhost:8000 --concurrency 1 8 32 --requests 200
+
+Reports latency percentiles, time-to-first-token (stream), throughput and
+error / 429 counts per concurrency level.
+"""
+import json
+import time
+import random
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import latency_summary, write_results
+from benchmarks.retrieval_bench import load_questions, QUESTIONS_PATH
+
+
+def wait_ready(url, timeout):
+    """Polls /readyz until the chain is loaded (backend loads it in the background)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=5) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(1)
+    return False
+
+
+def _post(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def chat_once(url, question, stream, timeout):
+    """One request -> {"status", "latency", "ttft"}; ttft only for the stream endpoint."""
+    payload = {"input": question, "chat_history": []}
+    start = time.perf_counter()
+    ttft = None
+    try:
+        with _post(f"{url}/chat/stream" if stream else f"{url}/chat", payload, timeout) as response:
+            if stream:
+                event = None
+                for raw in response:
+                    line = raw.decode("utf-8").strip()
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    if event == "token" and ttft is None:
+                        ttft = time.perf_counter() - start
+                    if event == "error":
+                        return {"status": "error", "latency": time.perf_counter() - start, "ttft": ttft}
+            else:
+                body = json.loads(response.read())
+                if body.get("answer", "").startswith("Internal error"):
+                    return {"status": "error", "latency": time.perf_counter() - start, "ttft": None}
+        return {"status": "ok", "latency": time.perf_counter() - start, "ttft": ttft}
+    except urllib.error.HTTPError as e:
+        return {"status": str(e.code), "latency": time.perf_counter() - start, "ttft": None}
+    except (urllib.error.URLError, OSError):
+        return {"status": "error", "latency": time.perf_counter() - start, "ttft": None}
+
+
+def run_level(url, questions, concurrency, n_requests, stream, timeout):
+    picks = [random.choice(questions)["question"] for _ in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda q: chat_once(url, q, stream, timeout), picks))
+    elapsed = time.perf_counter() - start
+    ok = [o for o in outcomes if o["status"] == "ok"]
+    statuses = {}
+    for outcome in outcomes:
+        statuses[outcome["status"]] = statuses.get(outcome["status"], 0) + 1
+    result = {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "stream": stream,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "statuses": statuses,
+        "rejected_429": statuses.get("429", 0),
+        "latency": latency_summary([o["latency"] for o in ok]),
+    }
+    if stream:
+        result["time_to_first_token"] = latency_summary([o["ttft"] for o in ok if o["ttft"] is not None])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the CampusPal /chat API.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--endpoint", choices=["chat", "stream"], default="stream")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Result JSON path (default benchmarks/results/chat_load-<time>.json)")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/")
+    if not wait_ready(url, args.ready_timeout):
+        raise SystemExit(f"[ERROR] {url}/readyz did not report ready within {args.ready_timeout}s")
+    random.seed(args.seed)
+    questions = load_questions(args.questions)
+    stream = args.endpoint == "stream"
+    results = {"url": url, "endpoint": args.endpoint, "levels": []}
+    for concurrency in args.concurrency:
+        level = run_level(url, questions, concurrency, args.requests, stream, args.timeout)
+        results["levels"].append(level)
+        print(f"concurrency={concurrency}: {level['throughput_rps']} req/s "
+              f"p50={level['latency'].get('p50_ms')}ms p95={level['latency'].get('p95_ms')}ms "
+              f"statuses={level['statuses']}")
+    write_results("chat_load", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Shared helpers: latency percentiles and JSON result files with run metadata."""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+
+import numpy as np
+
+RESULTS_DIR = "benchmarks/results"
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean/max in milliseconds for a list of durations in seconds."""
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        "count": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "env": {key: value for key, value in os.environ.items() if key.startswith("CAMPUSPAL_")},
+    }
+
+
+def write_results(name, results, out=None):
+    """Writes {"benchmark", "run", "results"} to `out` (default RESULTS_DIR/<name>-<time>.json)."""
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": name, "run": run_metadata(), "results": results}, f, indent=1)
+    print(f"Results written to {out}")
+    return out
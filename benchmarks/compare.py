@@ -0,0 +1,45 @@
+"""Diffs the numeric fields of two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/retrieval-A.json benchmarks/results/retrieval-B.json
+"""
+import json
+import argparse
+
+
+def flatten(value, prefix=""):
+    """{"a": {"b": 1}, "c": [{"d": 2}]} -> {"a.b": 1, "c.0.d": 2} (numbers only)."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return {prefix: value}
+        return {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result JSON files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--min-change", type=float, default=5.0, help="Only show changes of at least this many percent")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = flatten(json.load(f)["results"])
+
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        change = (new - old) / abs(old) * 100 if old else (0.0 if new == old else float("inf"))
+        if abs(change) >= args.min_change:
+            print(f"{key:50s} {old:>12} -> {new:<12} ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Stand-in for ChatNVIDIA with configurable latency, so benchmarks need no network or API key.
+
+rag_chain_builder.load_llm() returns FakeChatModel.from_env() when CAMPUSPAL_FAKE_LLM=1:
+    CAMPUSPAL_FAKE_LLM_FIRST_TOKEN_MS  delay before the first token (default 300)
+    CAMPUSPAL_FAKE_LLM_TOKENS_PER_S    generation rate after that (default 40)
+    CAMPUSPAL_FAKE_LLM_TOKENS          answer length in tokens (default 80)
+
+The question-rewrite prompt gets the user's question back unchanged, so
+retrieval sees the same query it would with a real model that has no
+history to resolve.
+"""
+import os
+import re
+import time
+import asyncio
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FILLER = ("CampusPal benchmark answer text generated by the fake model at a fixed token rate "
+          "so that streaming and load tests exercise the same code paths as a real LLM").split()
+REWRITE_INPUT = re.compile(r"^Input: (.*)$", re.DOTALL)
+
+
+class FakeChatModel(BaseChatModel):
+    first_token_ms: float = 300.0
+    tokens_per_s: float = 40.0
+    n_tokens: int = 80
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            first_token_ms=float(os.getenv("CAMPUSPAL_FAKE_LLM_FIRST_TOKEN_MS", "300")),
+            tokens_per_s=float(os.getenv("CAMPUSPAL_FAKE_LLM_TOKENS_PER_S", "40")),
+            n_tokens=int(os.getenv("CAMPUSPAL_FAKE_LLM_TOKENS", "80")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "campuspal-fake"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        if messages and messages[-1].content == "Standalone question:":
+            # Contextualization prompt: echo the question from the "Input: ..." message
+            for message in reversed(messages[:-1]):
+                match = REWRITE_INPUT.match(str(message.content))
+                if match:
+                    return [match.group(1)]
+        return [FILLER[i % len(FILLER)] + " " for i in range(self.n_tokens)]
+
+    def _delays(self, count):
+        """Seconds to wait before each token."""
+        per_token = 1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+        return [self.first_token_ms / 1000] + [per_token] * (count - 1)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        await asyncio.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any):
+        tokens = self._tokens(messages)
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any):
+        tokens = self._tokens(messages)
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,103 @@
+"""Ingest throughput: load+split (files/s, chunks/s), boilerplate scan, embedding (batches/s)
+and FAISS adds. Reads scraper/data but writes nothing to vectorstore/.
+
+    python -m benchmarks.ingest_bench --workers 4 --embed-batches 5
+"""
+import time
+import argparse
+
+import numpy as np
+
+import ingest
+import boilerplate
+from embedding_cache import load_embeddings
+from benchmarks.common import write_results
+
+
+def bench_load_split(source_files, workers, batch_size, boilerplate_lines):
+    stats = {"docs_loaded": 0, "chunks": 0, "bytes_removed": 0}
+    failed_files, entries, batches = [], {}, []
+    start = time.perf_counter()
+    for chunks, _ in ingest.iter_chunk_batches(source_files, failed_files, entries, stats, workers=workers,
+                                               batch_size=batch_size, boilerplate_lines=boilerplate_lines):
+        batches.append([chunk.page_content for chunk in chunks])
+    elapsed = time.perf_counter() - start
+    files_done = len(source_files) - len(failed_files)
+    return batches, {
+        "files": files_done,
+        "failed_files": len(failed_files),
+        "chunks": stats["chunks"],
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(files_done / elapsed, 2),
+        "chunks_per_s": round(stats["chunks"] / elapsed, 2),
+    }
+
+
+def bench_embed(embed_documents, batches):
+    start = time.perf_counter()
+    vectors = [np.asarray(embed_documents(batch), dtype=np.float32) for batch in batches]
+    elapsed = time.perf_counter() - start
+    texts = sum(len(batch) for batch in batches)
+    return vectors, {
+        "batches": len(batches),
+        "texts": texts,
+        "seconds": round(elapsed, 3),
+        "batches_per_s": round(len(batches) / elapsed, 3),
+        "texts_per_s": round(texts / elapsed, 2),
+    }
+
+
+def bench_faiss_add(vectors):
+    import faiss
+
+    if not vectors:
+        return {}
+    matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+    index = faiss.IndexFlatL2(matrix.shape[1])
+    start = time.perf_counter()
+    index.add(matrix)
+    elapsed = time.perf_counter() - start
+    return {"vectors": int(index.ntotal), "seconds": round(elapsed, 4),
+            "vectors_per_s": round(index.ntotal / elapsed, 1) if elapsed else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingest pipeline without touching vectorstore/.")
+    parser.add_argument("--workers", type=int, default=ingest.INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=ingest.EMBED_BATCH_SIZE)
+    parser.add_argument("--embed-batches", type=int, default=5,
+                        help="How many chunk batches to embed (embedding the whole corpus takes minutes)")
+    parser.add_argument("--keep-boilerplate", action="store_true")
+    parser.add_argument("--out", help="Result JSON path (default benchmarks/results/ingest-<time>.json)")
+    args = parser.parse_args()
+
+    source_files = ingest.collect_source_files()
+    results = {"source_files": len(source_files), "workers": args.workers, "batch_size": args.batch_size}
+
+    boilerplate_lines = None
+    if not args.keep_boilerplate:
+        start = time.perf_counter()
+        text_files = sorted(path for path, kind in source_files.items() if kind == "txt")
+        boilerplate_lines = boilerplate.build_boilerplate(text_files)
+        results["boilerplate"] = {"lines": {source: len(lines) for source, lines in boilerplate_lines.items()},
+                                  "seconds": round(time.perf_counter() - start, 3)}
+
+    batches, results["load_split"] = bench_load_split(source_files, args.workers, args.batch_size,
+                                                      boilerplate_lines)
+    print(f"Load + split: {results['load_split']}")
+
+    embeddings = load_embeddings(read_only=True)
+    sample = batches[:args.embed_batches]
+    # The model itself (what a cold rebuild pays), then the cache path (what an unchanged file pays)
+    vectors, results["embed_uncached"] = bench_embed(embeddings.underlying.embed_documents, sample)
+    print(f"Embedding (model): {results['embed_uncached']}")
+    _, results["embed_cached"] = bench_embed(embeddings.embed_documents, sample)
+    print(f"Embedding (cache): {results['embed_cached']}")
+
+    results["faiss_add"] = bench_faiss_add(vectors)
+    print(f"FAISS add: {results['faiss_add']}")
+    write_results("ingest", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
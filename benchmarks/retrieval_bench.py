@@ -0,0 +1,95 @@
+"""Retrieval latency percentiles and recall@k / MRR on benchmarks/questions.json.
+
+Each question lists the source files (basenames under scraper/data) that
+answer it; a hit is any retrieved chunk from one of them. Result caches are
+off so every query pays for embedding + search. Needs a built vectorstore/.
+
+    python -m benchmarks.retrieval_bench --modes dense hybrid --k 3 5 --rerank 0 1
+    python -m benchmarks.retrieval_bench --concurrency 1 16 --micro-batch 0 1   # throughput under load
+"""
+import os
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import rag_chain_builder
+from benchmarks.common import latency_summary, write_results
+
+QUESTIONS_PATH = "benchmarks/questions.json"
+
+
+def load_questions(path=QUESTIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def first_hit_rank(documents, expected):
+    """1-based rank of the first chunk from an expected source, or None."""
+    for rank, doc in enumerate(documents, start=1):
+        if os.path.basename(doc.metadata.get("source", "")) in expected:
+            return rank
+    return None
+
+
+def bench_config(questions, mode, k, rerank, repeat, concurrency=1, micro_batch=False):
+    retriever = rag_chain_builder.build_retriever(enable_cache=False, retrieval_mode=mode, rerank=rerank, k=k,
+                                                  micro_batch=micro_batch)
+    retriever.retrieve(rag_chain_builder.WARMUP_QUERY)
+
+    def timed(item):
+        start = time.perf_counter()
+        documents = retriever.retrieve(item["question"])
+        return time.perf_counter() - start, first_hit_rank(documents, set(item["sources"]))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        outcomes = list(pool.map(timed, questions * repeat))
+    elapsed = time.perf_counter() - start
+    retriever.close()  # One retriever per config: don't leave its executor and batcher threads behind
+    latencies = [latency for latency, _ in outcomes]
+    ranks = [rank for _, rank in outcomes]
+    hits = [rank for rank in ranks if rank is not None]
+    return {
+        "mode": mode,
+        "k": k,
+        "rerank": bool(rerank),
+        "auto_filter": retriever.auto_filter,
+        "concurrency": concurrency,
+        "micro_batch": bool(micro_batch),
+        "throughput_qps": round(len(outcomes) / elapsed, 2),
+        "latency": latency_summary(latencies),
+        "recall_at_k": round(len(hits) / len(ranks), 3),
+        "mrr": round(sum(1.0 / rank for rank in hits) / len(ranks), 3),
+        "misses": sorted({item["question"] for item, rank in zip(questions * repeat, ranks) if rank is None}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval latency and recall@k.")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--modes", nargs="+", choices=["dense", "hybrid"], default=[rag_chain_builder.RETRIEVAL_MODE])
+    parser.add_argument("--k", nargs="+", type=int, default=[rag_chain_builder.RETRIEVAL_K])
+    parser.add_argument("--rerank", nargs="+", type=int, choices=[0, 1], default=[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set per config")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1], help="Threads issuing queries")
+    parser.add_argument("--micro-batch", nargs="+", type=int, choices=[0, 1],
+                        default=[int(rag_chain_builder.MICRO_BATCH_ENABLED)])
+    parser.add_argument("--out", help="Result JSON path (default benchmarks/results/retrieval-<time>.json)")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    results = {"questions": len(questions), "repeat": args.repeat, "configs": []}
+    for mode, k, rerank, concurrency, micro_batch in itertools.product(
+            args.modes, args.k, args.rerank, args.concurrency, args.micro_batch):
+        result = bench_config(questions, mode, k, rerank, args.repeat, concurrency, micro_batch)
+        results["configs"].append(result)
+        print(f"{mode:6s} k={k} rerank={rerank} concurrency={concurrency} micro_batch={micro_batch}: "
+              f"recall@k={result['recall_at_k']} mrr={result['mrr']} {result['throughput_qps']} q/s "
+              f"p50={result['latency']['p50_ms']}ms p95={result['latency']['p95_ms']}ms")
+    write_results("retrieval", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compact BM25 inverted index over the same chunks as the FAISS store.
+
+Built by ingest.py after every run and saved next to the vector store:
+    BM25_PATH/offsets.npy  - term -> [start, end) into the postings arrays
+    BM25_PATH/docs.npy     - int32 chunk positions, grouped by term
+    BM25_PATH/weights.npy  - float32 precomputed BM25 weight per posting
+    BM25_PATH/vocab.json   - term list (position = term ID)
+    BM25_PATH/ids.json     - chunk position -> docstore ID
+
+Per-posting weights are precomputed at build time, so scoring a query is a
+handful of vectorized adds over the postings of its terms.
+"""
+import os
+import re
+import json
+from collections import Counter, defaultdict
+
+import numpy as np
+
+BM25_PATH = "vectorstore/bm25"
+
+# Keeps subject codes, quota names and dates together ("csc302", "r-19", "2024-25")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were "
+    "what when where which who will with how can do does i me my you your".split()
+)
+
+
+def tokenize(text):
+    """Lowercased tokens; compound tokens like 'r-19' also emit their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token not in STOPWORDS:
+            tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-./]", token) if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, doc_ids, vocab, offsets, docs, weights):
+        self.doc_ids = doc_ids
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+
+    @classmethod
+    def build(cls, doc_ids, texts, k1=1.5, b=0.75):
+        postings = defaultdict(list)
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[position] = sum(counts.values())
+            for term, tf in counts.items():
+                postings[term].append((position, tf))
+
+        n_docs = len(texts)
+        avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        docs_parts, weight_parts = [], []
+        for term_id, term in enumerate(vocab):
+            entries = np.array(postings[term], dtype=np.float32)
+            positions = entries[:, 0].astype(np.int32)
+            tf = entries[:, 1]
+            idf = np.log(1.0 + (n_docs - len(positions) + 0.5) / (len(positions) + 0.5))
+            norm = k1 * (1.0 - b + b * doc_lengths[positions] / (avg_length or 1.0))
+            docs_parts.append(positions)
+            weight_parts.append((idf * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32))
+            offsets[term_id + 1] = offsets[term_id] + len(positions)
+
+        docs = np.concatenate(docs_parts) if docs_parts else np.zeros(0, dtype=np.int32)
+        weights = np.concatenate(weight_parts) if weight_parts else np.zeros(0, dtype=np.float32)
+        return cls(list(doc_ids), vocab, offsets, docs, weights)
+
+    def search(self, query, k, allowed=None):
+        """Returns [(doc_id, score)] for the top-k chunks, best first.
+        allowed: optional chunk positions to restrict the search to."""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Positions are unique within a term's postings, so fancy-index add is safe
+            scores[self.docs[start:end]] += self.weights[start:end]
+        if allowed is not None:
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[allowed] = True
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(self.doc_ids[i], float(scores[i])) for i in candidates]
+
+    def save(self, path=BM25_PATH):
+        """Writes every file to a .tmp name first and swaps them in with os.replace at the end,
+        so a reader never sees a half-written file."""
+        os.makedirs(path, exist_ok=True)
+        written = []
+        for name, array in (("offsets.npy", self.offsets), ("docs.npy", self.docs), ("weights.npy", self.weights)):
+            np.save(os.path.join(path, name + ".tmp.npy"), array)
+            written.append((name + ".tmp.npy", name))
+        for name, data in (("vocab.json", self.vocab), ("ids.json", self.doc_ids)):
+            with open(os.path.join(path, name + ".tmp"), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            written.append((name + ".tmp", name))
+        for tmp_name, name in written:
+            os.replace(os.path.join(path, tmp_name), os.path.join(path, name))
+
+    @classmethod
+    def load(cls, path=BM25_PATH):
+        """Loads the postings memory-mapped; returns None if no index has been built."""
+        if not os.path.exists(os.path.join(path, "ids.json")):
+            return None
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            doc_ids = json.load(f)
+        return cls(
+            doc_ids,
+            vocab,
+            np.load(os.path.join(path, "offsets.npy")),
+            np.load(os.path.join(path, "docs.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "weights.npy"), mmap_mode="r"),
+        )
+
+
+def build_from_store(db):
+    """Builds the BM25 index from every chunk in a LangChain FAISS store."""
+    doc_ids = list(db.index_to_docstore_id.values())
+    texts = [db.docstore.search(doc_id).page_content for doc_id in doc_ids]
+    return BM25Index.build(doc_ids, texts)
+
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=60):
+    """Fuses several best-first ID lists; returns the top-k IDs."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)[:k]
@@ -0,0 +1,116 @@
+"""Ingest-time removal of navigation menus, footers and repeated PDF page headers.
+
+- Per source type: scraped page text and PDF text (files with the scraper's
+  `.pages.json` sidecar) are counted separately, one pass counting, per
+  normalized line, how many files of that type contain it. Lines found in at
+  least max(MIN_DOCS, MIN_DOC_FRACTION * files of that type) files are
+  boilerplate for that type only, so a site footer never strips a PDF.
+- Per PDF: lines on at least MIN_PAGE_FRACTION of a document's pages
+  (running headers/footers) are removed from that document only.
+
+Lines are normalized (case, whitespace, digits -> '#') so "Page 3 of 12" and
+"Page 4 of 12" count as the same line. Only lines of at least MIN_LINE_CHARS
+characters and MIN_LINE_WORDS words can be boilerplate: short lines such as
+marks, credits, "Sr. No." or a department name repeat because they are
+content. The per-type sets are saved with the index so incremental runs
+clean new files exactly like the rest.
+"""
+import os
+import re
+import json
+from collections import Counter
+
+from tqdm import tqdm
+
+BOILERPLATE_PATH = "vectorstore/boilerplate.json"
+MIN_DOCS = 5
+MIN_DOC_FRACTION = 0.2
+MIN_PAGE_FRACTION = 0.5
+MIN_PAGES = 3
+MIN_LINE_CHARS = 15
+MIN_LINE_WORDS = 3  # Words of two or more letters; numbers and punctuation don't count
+SOURCE_TYPES = ("page", "pdf")
+
+
+def normalize_line(line):
+    return re.sub(r"\d+", "#", re.sub(r"\s+", " ", line).strip().lower())
+
+
+def is_candidate(line):
+    """Whether a normalized line is long and wordy enough to be treated as boilerplate."""
+    return len(line) >= MIN_LINE_CHARS and len(re.findall(r"[a-z]{2,}", line)) >= MIN_LINE_WORDS
+
+
+def document_lines(text):
+    """Distinct normalized lines of a text that could be boilerplate."""
+    return {line for line in map(normalize_line, text.splitlines()) if is_candidate(line)}
+
+
+def source_type(path, kind="txt"):
+    """"pdf" for PDFs and PDF-derived text (the scraper writes a `.pages.json` sidecar), else "page"."""
+    if kind == "pdf" or os.path.exists(os.path.splitext(path)[0] + ".pages.json"):
+        return "pdf"
+    return "page"
+
+
+def build_boilerplate(paths, min_docs=MIN_DOCS, min_doc_fraction=MIN_DOC_FRACTION):
+    """Returns {source type: set of normalized lines that repeat across many files of that type}."""
+    frequency = {source: Counter() for source in SOURCE_TYPES}
+    files = Counter()
+    for path in tqdm(paths, desc="Counting repeated lines"):
+        source = source_type(path)
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                frequency[source].update(document_lines(f.read()))
+        except OSError as e:
+            print(f"[WARN] Could not read {path} for boilerplate detection: {e}")
+            continue
+        files[source] += 1
+    boilerplate = {}
+    for source, counts in frequency.items():
+        threshold = max(min_docs, min_doc_fraction * files[source])
+        boilerplate[source] = {line for line, count in counts.items() if count >= threshold}
+    return boilerplate
+
+
+def print_boilerplate(boilerplate):
+    """Lists the chosen lines so the selection can be checked after a rebuild."""
+    for source, lines in sorted(boilerplate.items()):
+        print(f"Boilerplate ({source}): {len(lines)} lines repeat across many files and will be removed.")
+        for line in sorted(lines):
+            print(f"    {line}")
+
+
+def repeated_page_lines(pages, min_page_fraction=MIN_PAGE_FRACTION, min_pages=MIN_PAGES):
+    """Normalized lines that appear on most pages of one document (running headers/footers)."""
+    if len(pages) < min_pages:
+        return set()
+    frequency = Counter()
+    for text in pages:
+        frequency.update(document_lines(text))
+    threshold = max(2, min_page_fraction * len(pages))
+    return {line for line, count in frequency.items() if count >= threshold}
+
+
+def strip_lines(text, boilerplate):
+    """Returns (cleaned text, bytes removed)."""
+    kept = [line for line in text.splitlines() if normalize_line(line) not in boilerplate]
+    cleaned = "\n".join(kept)
+    return cleaned, len(text.encode("utf-8")) - len(cleaned.encode("utf-8"))
+
+
+def save_boilerplate(boilerplate, path=BOILERPLATE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({source: sorted(lines) for source, lines in boilerplate.items()}, f, indent=0)
+
+
+def load_boilerplate(path=BOILERPLATE_PATH):
+    """The saved per-type sets, or None if missing or in the old corpus-wide format (forces a rebuild)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(saved, dict):
+        return None
+    return {source: set(lines) for source, lines in saved.items()}
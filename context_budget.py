@@ -0,0 +1,155 @@
+"""Context assembly between retrieval and create_stuff_documents_chain.
+
+Retrieved chunks overlap (CHUNK_OVERLAP in ingest.py) and scraped pages
+repeat the same boilerplate, so the stuffed prompt is often redundant.
+ContextBudgeter, applied to the retrieved documents in rank order:
+
+1. merges chunks that are adjacent/overlapping in the same source (and page),
+   using the `start_index` metadata ingest.py records, or a shared
+   prefix/suffix for chunks ingested before it did;
+2. drops near-duplicates: MinHash estimate of word-shingle Jaccard
+   similarity against every chunk already kept;
+3. keeps chunks until the token budget is spent, trimming the last one at a
+   sentence boundary instead of dropping it when enough room is left.
+
+Token counts are estimated (~4 characters per token); no tokenizer for the
+hosted model is available locally.
+"""
+import re
+import zlib
+
+import numpy as np
+from langchain_core.documents import Document
+
+import metrics
+
+CHARS_PER_TOKEN = 4
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 64
+MIN_TRIM_TOKENS = 80  # Don't append a trimmed tail shorter than this
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(1)
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def minhash_signature(text):
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+    # (a*x + b) mod p per permutation; uint64 wrap-around is fine since every signature wraps the same way
+    permuted = (np.outer(hashes, _HASH_A) + _HASH_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def _span_key(doc):
+    return doc.metadata.get("source"), doc.metadata.get("page")
+
+
+def _overlap_merge(first, second, min_overlap=40, max_overlap=400):
+    """Text of `first` followed by `second` if the end of one overlaps the start of the other."""
+    a, b = first.page_content, second.page_content
+    start_a, start_b = first.metadata.get("start_index"), second.metadata.get("start_index")
+    if start_a is not None and start_b is not None:
+        if start_b < start_a:
+            a, b, start_a, start_b = b, a, start_b, start_a
+        end_a = start_a + len(a)
+        if start_b > end_a:
+            return None
+        return a + b[end_a - start_b:] if start_b + len(b) > end_a else a
+    for x, y in ((a, b), (b, a)):
+        for size in range(min(len(x), len(y), max_overlap), min_overlap - 1, -1):
+            if x.endswith(y[:size]):
+                return x + y[size:]
+    return None
+
+
+class ContextBudgeter:
+    def __init__(self, token_budget=1200, duplicate_threshold=0.8, merge_adjacent=True):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.merge_adjacent = merge_adjacent
+
+    def _merge(self, docs):
+        merged = []
+        for doc in docs:
+            for i, kept in enumerate(merged):
+                if _span_key(kept) != _span_key(doc):
+                    continue
+                text = _overlap_merge(kept, doc)
+                if text is not None:
+                    start = min(kept.metadata.get("start_index", 0), doc.metadata.get("start_index", 0))
+                    metadata = dict(kept.metadata)
+                    if "start_index" in metadata:
+                        metadata["start_index"] = start
+                    merged[i] = Document(page_content=text, metadata=metadata)
+                    break
+            else:
+                merged.append(doc)
+        return merged
+
+    def _dedupe(self, docs):
+        kept, signatures = [], []
+        for doc in docs:
+            signature = minhash_signature(doc.page_content)
+            if any(estimated_jaccard(signature, other) >= self.duplicate_threshold for other in signatures):
+                continue
+            kept.append(doc)
+            signatures.append(signature)
+        return kept
+
+    def _fit(self, docs):
+        kept, used = [], 0
+        for doc in docs:
+            tokens = estimate_tokens(doc.page_content)
+            if used + tokens <= self.token_budget:
+                kept.append(doc)
+                used += tokens
+                continue
+            remaining = self.token_budget - used
+            if remaining >= MIN_TRIM_TOKENS:
+                text = doc.page_content[:remaining * CHARS_PER_TOKEN]
+                cut = max(text.rfind(". "), text.rfind("\n"))
+                if cut > len(text) // 2:
+                    text = text[:cut + 1]
+                kept.append(Document(page_content=text, metadata={**doc.metadata, "truncated": True}))
+            break
+        return kept
+
+    def assemble(self, docs):
+        """Returns (docs, stats) with stats = tokens before/after plus merge and drop counts."""
+        before = sum(estimate_tokens(doc.page_content) for doc in docs)
+        merged = self._merge(docs) if self.merge_adjacent else list(docs)
+        unique = self._dedupe(merged)
+        fitted = self._fit(unique)
+        after = sum(estimate_tokens(doc.page_content) for doc in fitted)
+        stats = {
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": before - after,
+            "merged": len(docs) - len(merged),
+            "duplicates_dropped": len(merged) - len(unique),
+            "over_budget_dropped": len(unique) - len(fitted),
+        }
+        return fitted, stats
+
+    def __call__(self, docs):
+        with metrics.stage("context"):
+            fitted, stats = self.assemble(docs)
+        metrics.RETRIEVED_DOCS.observe(len(docs))
+        metrics.CONTEXT_DOCS.observe(len(fitted))
+        metrics.CONTEXT_TOKENS.observe(stats["tokens_after"])
+        metrics.annotate(retrieved_docs=len(docs), context_docs=len(fitted), context_tokens=stats["tokens_after"])
+        if stats["tokens_saved"]:
+            print(f"[INFO] Context budget: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+                  f"(saved {stats['tokens_saved']}; {stats['merged']} merged, "
+                  f"{stats['duplicates_dropped']} near-duplicates, {stats['over_budget_dropped']} over budget)")
+        return fitted
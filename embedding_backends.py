@@ -0,0 +1,274 @@
+"""Embedding backends for all-MiniLM-L6-v2: PyTorch (default) or ONNX Runtime, fp32 or int8.
+
+    python embedding_backends.py export             # writes ONNX_MODEL_DIR/model.onnx + model-int8.onnx
+    python embedding_backends.py verify --backend onnx-int8
+    CAMPUSPAL_EMBEDDING_BACKEND=onnx-int8 python ingest.py
+
+The ONNX backend runs the same transformer exported from the Hugging Face
+weights, then the same mean pooling + L2 normalization sentence-transformers
+applies, with the `tokenizers` library instead of transformers. It never
+imports torch, so it loads faster and uses much less memory. int8 uses
+onnxruntime's dynamic quantization (weights int8, activations quantized per
+batch).
+
+Vectors must stay interchangeable with the PyTorch ones, or existing indexes
+and the embedding cache would silently degrade. `verify` embeds a sample of
+scraper/data chunks and benchmark questions with both backends and records
+the worst-case cosine similarity in verification.json. An ONNX model without
+a passing record is not used: load falls back to PyTorch with a warning.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import EMBEDDING_MODEL
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("CAMPUSPAL_EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("CAMPUSPAL_ONNX_MODEL_DIR", "vectorstore/onnx_minilm")
+ONNX_THREADS = int(os.getenv("CAMPUSPAL_ONNX_THREADS", str(os.cpu_count() or 1)))
+ONNX_BATCH_SIZE = int(os.getenv("CAMPUSPAL_ONNX_BATCH_SIZE", "64"))
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's sentence-transformers max_seq_length
+MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model-int8.onnx"}
+VERIFICATION_FILE = "verification.json"
+MIN_COSINE = 0.99  # Worst-case cosine to the PyTorch vector for a backend to be used
+
+
+class OnnxEmbeddings(Embeddings):
+    """MiniLM sentence embeddings with ONNX Runtime (mean pooling + L2 norm, like sentence-transformers)."""
+
+    def __init__(self, model_path, tokenizer_path, threads=ONNX_THREADS, batch_size=ONNX_BATCH_SIZE):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(1, threads)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.batch_size = max(1, batch_size)
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        # Length-sorted batches pad far less than arrival order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.zeros((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            rows = self._embed_batch([texts[i] for i in batch])
+            if not vectors.shape[1]:
+                vectors = np.zeros((len(texts), rows.shape[1]), dtype=np.float32)
+            vectors[batch] = rows
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _torch_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={'device': 'cpu'}
+    )
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_verification(model_dir=ONNX_MODEL_DIR):
+    path = os.path.join(model_dir, VERIFICATION_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_verified(backend, model_dir=ONNX_MODEL_DIR):
+    """True if `verify` passed for the model file as it is on disk now."""
+    record = load_verification(model_dir).get(backend)
+    model_path = os.path.join(model_dir, MODEL_FILES[backend])
+    return bool(record and record.get("passed") and os.path.exists(model_path)
+                and record.get("file") == _file_signature(model_path))
+
+
+def _onnx_embeddings(backend, model_dir):
+    return OnnxEmbeddings(os.path.join(model_dir, MODEL_FILES[backend]), os.path.join(model_dir, "tokenizer.json"))
+
+
+def create_embedder(backend=None, model_dir=ONNX_MODEL_DIR):
+    """The underlying (uncached) embedder for `backend` (default CAMPUSPAL_EMBEDDING_BACKEND)."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (expected one of {BACKENDS})")
+    if backend == "torch":
+        return _torch_embeddings()
+    if not is_verified(backend, model_dir):
+        print(f"[WARN] No passing verification for the {backend} model in {model_dir} "
+              f"(run `python embedding_backends.py export` and `verify`) - using the PyTorch backend.")
+        return _torch_embeddings()
+    try:
+        return _onnx_embeddings(backend, model_dir)
+    except (ImportError, OSError, RuntimeError) as e:
+        print(f"[WARN] Could not load the {backend} embedding backend ({e}) - using the PyTorch backend.")
+        return _torch_embeddings()
+
+
+def export_onnx(model_dir=ONNX_MODEL_DIR, quantize=True):
+    """Exports MiniLM's transformer to ONNX (+ an int8 copy) and its fast tokenizer.
+    Needs torch/transformers (already installed for the PyTorch backend) and onnxruntime."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids).last_hidden_state
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    tokenizer.save_pretrained(model_dir)  # Writes tokenizer.json, read by the `tokenizers` library
+    model = AutoModel.from_pretrained(EMBEDDING_MODEL).eval()
+    sample = tokenizer(["CampusPal ONNX export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = os.path.join(model_dir, MODEL_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(model), tuple(sample[name] for name in names), model_path,
+            input_names=names, output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+            opset_version=14,
+        )
+    print(f"Exported {EMBEDDING_MODEL} to {model_path}")
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(model_dir, MODEL_FILES["onnx-int8"])
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized (dynamic int8) to {int8_path}")
+    print("Run `python embedding_backends.py verify` before selecting it with CAMPUSPAL_EMBEDDING_BACKEND.")
+
+
+def sample_texts(limit=300, data_path="scraper/data/", questions_path="benchmarks/questions.json"):
+    """Chunk-sized passages from the scraped corpus plus short questions, for verification."""
+    texts = []
+    if os.path.exists(questions_path):
+        with open(questions_path, "r", encoding="utf-8") as f:
+            texts.extend(item["question"] for item in json.load(f))
+    for path in sorted(glob.glob(os.path.join(data_path, "*.txt"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read(4000).strip()
+        # One short and one chunk-length (truncated at MAX_SEQ_LENGTH tokens) passage per file
+        texts.extend(part for part in (text[:300], text[:1500]) if part)
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def _rss_mb():
+    import resource
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6, 1)
+
+
+def verify(backend, model_dir=ONNX_MODEL_DIR, min_cosine=MIN_COSINE, limit=300):
+    """Compares `backend` vectors to PyTorch's on sample texts and records the result."""
+    texts = sample_texts(limit)
+    # Candidate first, so load time / peak RSS are measured before torch is imported
+    torch_loaded = "torch" in sys.modules
+    start = time.perf_counter()
+    candidate = _onnx_embeddings(backend, model_dir)
+    load_seconds = time.perf_counter() - start
+    rss_mb = None if torch_loaded else _rss_mb()
+    start = time.perf_counter()
+    candidate_vectors = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    candidate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = _torch_embeddings()
+    reference_load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference_vectors = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    reference_seconds = time.perf_counter() - start
+
+    norms = np.linalg.norm(candidate_vectors, axis=1) * np.linalg.norm(reference_vectors, axis=1)
+    cosines = (candidate_vectors * reference_vectors).sum(axis=1) / np.clip(norms, 1e-12, None)
+    record = {
+        "file": _file_signature(os.path.join(model_dir, MODEL_FILES[backend])),
+        "texts": len(texts),
+        "min_cosine": round(float(cosines.min()), 5),
+        "mean_cosine": round(float(cosines.mean()), 5),
+        "tolerance": min_cosine,
+        "passed": bool(cosines.min() >= min_cosine),
+        "load_seconds": round(load_seconds, 3),
+        "torch_load_seconds": round(reference_load_seconds, 3),
+        "rss_mb_after_load": rss_mb,
+        "texts_per_s": round(len(texts) / candidate_seconds, 1),
+        "torch_texts_per_s": round(len(texts) / reference_seconds, 1),
+        "verified_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    records = load_verification(model_dir)
+    records[backend] = record
+    with open(os.path.join(model_dir, VERIFICATION_FILE), "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=1)
+    status = "PASSED" if record["passed"] else "FAILED"
+    print(f"{backend}: {status} - cosine to PyTorch min {record['min_cosine']}, mean {record['mean_cosine']} "
+          f"over {len(texts)} texts (tolerance {min_cosine})")
+    print(f"Load {record['load_seconds']}s vs torch {record['torch_load_seconds']}s, "
+          f"peak RSS before torch {rss_mb} MB, {record['texts_per_s']} vs {record['torch_texts_per_s']} texts/s")
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export / verify the ONNX MiniLM embedding backends.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export_parser = subcommands.add_parser("export", help="Export MiniLM to ONNX (and int8).")
+    export_parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    export_parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy.")
+    verify_parser = subcommands.add_parser("verify", help="Check ONNX vectors against PyTorch's.")
+    verify_parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    verify_parser.add_argument("--backend", choices=list(MODEL_FILES), nargs="+", default=list(MODEL_FILES))
+    verify_parser.add_argument("--min-cosine", type=float, default=MIN_COSINE)
+    verify_parser.add_argument("--texts", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model_dir, quantize=not args.no_quantize)
+    else:
+        results = [verify(backend, args.model_dir, args.min_cosine, args.texts)
+                   for backend in args.backend if os.path.exists(os.path.join(args.model_dir, MODEL_FILES[backend]))]
+        if not results or not all(result["passed"] for result in results):
+            raise SystemExit(1)
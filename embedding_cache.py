@@ -0,0 +1,307 @@
+"""Content-addressed, on-disk cache of chunk/query embeddings.
+
+Keys are a hash of the model name plus whitespace-normalized text, so a
+re-ingest (or a chunking tweak that leaves most chunks the same) skips the
+model forward pass for every chunk it has already seen.
+
+Layout of EMBEDDING_CACHE_PATH (<g> is the generation, omitted for generation 0):
+    vectors<g>.f32 - float32 rows, opened with np.memmap
+    keys<g>.npy    - slot -> key (32 hex chars)
+    ticks<g>.npy   - slot -> last-use tick, used for LRU eviction
+    meta.json      - model name, dimension, generation, clock
+
+Serving processes memory-map the same files ingest writes, so a slot is
+never rewritten within a generation: new vectors are appended, and when the
+cache is full the least recently used entries are dropped by copying the
+live rows into a new generation's files. meta.json is replaced last, after
+the index files, so a reader always loads keys and vectors of the same
+generation and keeps reading its old (unchanged) files until it reloads.
+"""
+import os
+import glob
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.getenv("CAMPUSPAL_EMBEDDING_CACHE", "vectorstore/embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("CAMPUSPAL_EMBEDDING_CACHE_MAX", "200000"))
+
+KEY_DTYPE = "S32"
+EVICT_FRACTION = 0.1  # Evict the oldest 10% at once so compaction is not paid per insert
+RELOAD_CHECK_INTERVAL = 5.0  # Seconds between checks for a newer cache written by ingest
+COPY_ROWS = 16384  # Rows copied per step when compacting into a new generation
+
+
+def cache_key(model_name, text):
+    normalized = " ".join(text.split())
+    digest = hashlib.sha256(f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+    return digest[:32].encode("ascii")
+
+
+def generation_files(generation):
+    """(vectors, keys, ticks) file names of a generation."""
+    suffix = f".{generation}" if generation else ""
+    return f"vectors{suffix}.f32", f"keys{suffix}.npy", f"ticks{suffix}.npy"
+
+
+class EmbeddingCache:
+    """Size-bounded LRU store of float32 vectors backed by a memory-mapped file.
+
+    There is one writer at a time (ingest.py). Serving processes open the cache
+    with read_only=True and pick up a newer version when ingest rewrites it.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, model_name=EMBEDDING_MODEL,
+                 max_entries=EMBEDDING_CACHE_MAX_ENTRIES, read_only=False):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._last_reload_check = time.monotonic()
+        self._loaded_mtime = None
+        self._reset()
+        if os.path.exists(self._file("meta.json")):
+            try:
+                self._load()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARN] Ignoring unreadable embedding cache at {path}: {e}")
+                self._reset()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _reset(self):
+        self.dim = None
+        self.generation = 0
+        self._count = 0
+        self._capacity = 0
+        self._clock = 0
+        self._slots = {}
+        self._keys = np.zeros(0, dtype=KEY_DTYPE)
+        self._ticks = np.zeros(0, dtype=np.int64)
+        self._vectors = None
+
+    def _load(self):
+        with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model_name"] != self.model_name:
+            raise ValueError(f"cache built for {meta['model_name']}")
+        vectors_file, keys_file, ticks_file = generation_files(meta.get("generation", 0))
+        # Named by generation, so these always belong to the vectors file below
+        keys = np.load(self._file(keys_file))
+        ticks = np.load(self._file(ticks_file))
+        if len(keys) != len(ticks):
+            raise ValueError("keys and ticks disagree")
+        dim = meta["dim"]
+        capacity = os.path.getsize(self._file(vectors_file)) // (dim * 4)
+        if len(keys) > capacity:
+            raise ValueError("key index is larger than the vectors file")
+        self._reset()
+        self.dim = dim
+        self.generation = meta.get("generation", 0)
+        self._count = len(keys)
+        self._capacity = capacity
+        self._clock = meta["clock"]
+        self._keys = np.zeros(capacity, dtype=KEY_DTYPE)
+        self._ticks = np.zeros(capacity, dtype=np.int64)
+        self._keys[:len(keys)] = keys
+        self._ticks[:len(ticks)] = ticks
+        self._vectors = np.memmap(self._file(vectors_file), dtype=np.float32,
+                                  mode="r" if self.read_only else "r+", shape=(capacity, dim))
+        for slot in range(self._count):
+            key = bytes(self._keys[slot])
+            if key:
+                self._slots[key] = slot
+        self._loaded_mtime = os.path.getmtime(self._file("meta.json"))
+
+    def _maybe_reload(self):
+        """Read-only caches follow the on-disk copy when ingest rewrites it."""
+        now = time.monotonic()
+        if now - self._last_reload_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_reload_check = now
+        try:
+            mtime = os.path.getmtime(self._file("meta.json"))
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            try:
+                self._load()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARN] Embedding cache reload failed: {e}")
+
+    def _grow(self, min_rows):
+        """Extends this generation's vectors file; rows readers already map are untouched."""
+        new_capacity = min(self.max_entries, max(min_rows, self._capacity * 2, 1024))
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = self._file(generation_files(self.generation)[0])
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        mode = "r+b" if os.path.exists(vectors_path) else "w+b"
+        with open(vectors_path, mode) as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        self._keys = np.concatenate([self._keys, np.zeros(new_capacity - self._capacity, dtype=KEY_DTYPE)])
+        self._ticks = np.concatenate([self._ticks, np.zeros(new_capacity - self._capacity, dtype=np.int64)])
+        self._capacity = new_capacity
+
+    def _compact(self):
+        """Drops the least recently used entries by copying the rest into a new generation."""
+        live = np.array(sorted(self._slots.values()), dtype=np.int64)
+        n_evict = min(max(1, int(len(live) * EVICT_FRACTION)), len(live))
+        keep = np.sort(live[np.argpartition(self._ticks[live], n_evict - 1)[n_evict:]]) if len(live) else live
+        generation = self.generation + 1
+        vectors_path = self._file(generation_files(generation)[0])
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(self._capacity, self.dim))
+        for start in range(0, len(keep), COPY_ROWS):
+            rows = keep[start:start + COPY_ROWS]
+            vectors[start:start + len(rows)] = self._vectors[rows]
+        keys = np.zeros(self._capacity, dtype=KEY_DTYPE)
+        ticks = np.zeros(self._capacity, dtype=np.int64)
+        keys[:len(keep)] = self._keys[keep]
+        ticks[:len(keep)] = self._ticks[keep]
+        self._vectors.flush()
+        self._vectors, self._keys, self._ticks = vectors, keys, ticks
+        self._slots = {bytes(key): slot for slot, key in enumerate(keys[:len(keep)])}
+        self._count = len(keep)
+        self.generation = generation
+        self.evictions += n_evict
+
+    def _allocate_slot(self):
+        if self._count >= self._capacity:
+            if self._capacity >= self.max_entries:
+                self._compact()
+            else:
+                self._grow(self._count + 1)
+        slot = self._count
+        self._count += 1
+        return slot
+
+    def get_many(self, keys):
+        """Returns a list with a float32 vector (or None on a miss) per key."""
+        with self._lock:
+            if self.read_only:
+                self._maybe_reload()
+            results = []
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self._clock += 1
+                self._ticks[slot] = self._clock
+                results.append(np.array(self._vectors[slot]))
+            return results
+
+    def put_many(self, keys, vectors):
+        if self.read_only:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            for key, vector in zip(keys, vectors):
+                self._clock += 1
+                slot = self._slots.get(key)
+                if slot is None:
+                    # Always a fresh row: a reader may still map every existing slot to its old key
+                    slot = self._allocate_slot()
+                    self._vectors[slot] = vector
+                    self._slots[key] = slot
+                    self._keys[slot] = key
+                self._ticks[slot] = self._clock
+
+    def flush(self):
+        """Persists the key index; vectors are already written through the memmap.
+        Every file is swapped in with os.replace, meta.json last."""
+        if self.read_only or self._vectors is None:
+            return
+        with self._lock:
+            self._vectors.flush()
+            _, keys_file, ticks_file = generation_files(self.generation)
+            for name, array in ((keys_file, self._keys[:self._count]), (ticks_file, self._ticks[:self._count])):
+                np.save(self._file(name + ".tmp.npy"), array)
+                os.replace(self._file(name + ".tmp.npy"), self._file(name))
+            meta = {
+                "model_name": self.model_name,
+                "dim": self.dim,
+                "generation": self.generation,
+                "count": self._count,
+                "capacity": self._capacity,
+                "clock": self._clock,
+            }
+            tmp_path = self._file("meta.json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._file("meta.json"))
+            # Readers that mapped an older generation keep their open files until they reload
+            current = set(generation_files(self.generation))
+            for pattern in ("vectors*.f32", "keys*.npy", "ticks*.npy"):
+                for stale in glob.glob(self._file(pattern)):
+                    if os.path.basename(stale) not in current:
+                        os.remove(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an Embeddings model and only runs it for texts missing from the cache.
+
+    Queries and documents share one key space: for all-MiniLM-L6-v2,
+    HuggingFaceEmbeddings embeds both the same way.
+    """
+
+    def __init__(self, underlying, cache):
+        self.underlying = underlying
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        keys = [cache_key(self.cache.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.underlying.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+    def embed_query(self, text):
+        key = cache_key(self.cache.model_name, text)
+        vector = self.cache.get_many([key])[0]
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.cache.put_many([key], [vector])
+        return np.asarray(vector, dtype=np.float32).tolist()
+
+
+def load_embeddings(read_only=False, backend=None):
+    """Builds the MiniLM embedder wrapped in the shared on-disk cache.
+
+    backend: "torch", "onnx" or "onnx-int8" (default CAMPUSPAL_EMBEDDING_BACKEND, see
+    embedding_backends.py). Verified backends produce interchangeable vectors, so they
+    share the cache and the existing index.
+    """
+    from embedding_backends import create_embedder
+
+    cache = EmbeddingCache(read_only=read_only)
+    return CachedEmbeddings(create_embedder(backend), cache)
@@ -0,0 +1,204 @@
+"""Index-type options for the CampusPal FAISS store (flat, IVF, HNSW; SQ8/PQ quantization).
+
+ingest.py builds the store with a flat index and then, if asked, swaps in an
+approximate index trained on a sample of the chunk vectors. The chosen
+parameters are saved as index_params.json next to index.faiss, and
+rag_chain_builder.py tunes nprobe/efSearch when it loads the index.
+
+Run `python faiss_index.py --report` to compare recall and latency of several
+settings against exact flat search on the current corpus.
+"""
+import os
+import json
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+INDEX_PARAMS_FILE = "index_params.json"
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+QUANTIZATIONS = ("none", "sq8", "pq")
+DEFAULT_PARAMS = {"index_type": "flat", "quantization": "none"}
+
+TRAIN_SAMPLE_SIZE = 50000
+HNSW_M = 32
+PQ_DIMS_PER_SUBQUANTIZER = 8  # 384-dim MiniLM -> 48 sub-quantizers of 8 bits
+
+
+def default_nlist(n_vectors):
+    """~4*sqrt(n) lists, but keep at least ~39 training points per list."""
+    return int(max(1, min(4 * np.sqrt(n_vectors), n_vectors // 39)))
+
+
+def factory_string(params, n_vectors, dim):
+    index_type = params.get("index_type", "flat")
+    quantization = params.get("quantization", "none")
+    if index_type not in INDEX_TYPES or quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported index params: {params}")
+    if quantization == "pq" and dim % PQ_DIMS_PER_SUBQUANTIZER:
+        raise ValueError(f"PQ needs a dimension divisible by {PQ_DIMS_PER_SUBQUANTIZER}, got {dim}")
+
+    codec = {"none": "Flat", "sq8": "SQ8", "pq": f"PQ{dim // PQ_DIMS_PER_SUBQUANTIZER}"}[quantization]
+    if index_type == "flat":
+        return codec
+    if index_type == "ivf":
+        nlist = params.get("nlist") or default_nlist(n_vectors)
+        return f"IVF{nlist},{codec}"
+    if quantization == "pq":
+        raise ValueError("HNSW with PQ is not supported here; use ivf + pq or hnsw + sq8.")
+    return f"HNSW{params.get('hnsw_m', HNSW_M)},{codec}"
+
+
+def build_index(vectors, params, train_sample=TRAIN_SAMPLE_SIZE, seed=0):
+    """Builds (and trains on a random sample, if needed) an index holding `vectors` in order."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(params, n_vectors, dim), faiss.METRIC_L2)
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n_vectors, size=min(n_vectors, train_sample), replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    return index
+
+
+def is_flat(params):
+    return params.get("index_type", "flat") == "flat" and params.get("quantization", "none") == "none"
+
+
+def apply_search_params(index, nprobe=None, ef_search=None):
+    """Sets query-time knobs on IVF (nprobe) and HNSW (efSearch) indexes; no-op for flat ones."""
+    if nprobe:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass
+    if ef_search and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def selector_params(index, positions):
+    """Search parameters restricting a search to the given chunk positions (an ID selector,
+    so the excluded vectors are skipped during the scan). Keeps the index's nprobe/efSearch."""
+    positions = np.ascontiguousarray(positions, dtype=np.int64)
+    selector = faiss.IDSelectorBatch(len(positions), faiss.swig_ptr(positions))
+    try:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(index).nprobe)
+    except RuntimeError:
+        pass
+    if hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def load_params(db_path):
+    path = os.path.join(db_path, INDEX_PARAMS_FILE)
+    if not os.path.exists(path):
+        return dict(DEFAULT_PARAMS)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_params(db_path, params):
+    with open(os.path.join(db_path, INDEX_PARAMS_FILE), "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=1)
+
+
+def store_vectors(db, embeddings):
+    """Vectors of every chunk in index order, re-embedded through the (cached) embedder.
+
+    Quantized/IVF indexes cannot give back exact vectors, so the embedding
+    cache is the source of truth instead of index.reconstruct().
+    """
+    doc_ids = [db.index_to_docstore_id[i] for i in range(len(db.index_to_docstore_id))]
+    texts = [db.docstore.search(doc_id).page_content for doc_id in doc_ids]
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def swap_index(db, embeddings, params, train_sample=TRAIN_SAMPLE_SIZE):
+    """Replaces db.index with one built from `params`, keeping positions and docstore IDs."""
+    db.index = build_index(store_vectors(db, embeddings), params, train_sample)
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 3) if len(values) else None
+
+
+def recall_report(vectors, configs, n_queries=200, k=10, seed=0):
+    """Recall@k and per-query latency of each config against exact flat search.
+
+    Queries are a random sample of the corpus vectors themselves.
+    """
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for params in [dict(DEFAULT_PARAMS)] + configs:
+        build_start = time.perf_counter()
+        index = build_index(vectors, params)
+        build_seconds = time.perf_counter() - build_start
+        apply_search_params(index, params.get("nprobe"), params.get("ef_search"))
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            _, found = index.search(query.reshape(1, -1), k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(found[0]) & set(expected))
+        rows.append({
+            "params": params,
+            "recall_at_k": round(hits / (len(queries) * k), 4),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "bytes_per_vector": round(len(faiss.serialize_index(index)) / len(vectors), 1),
+            "build_s": round(build_seconds, 2),
+        })
+    return rows
+
+
+DEFAULT_REPORT_CONFIGS = [
+    {"index_type": "flat", "quantization": "sq8"},
+    {"index_type": "ivf", "quantization": "none", "nprobe": 8},
+    {"index_type": "ivf", "quantization": "none", "nprobe": 32},
+    {"index_type": "ivf", "quantization": "sq8", "nprobe": 16},
+    {"index_type": "ivf", "quantization": "pq", "nprobe": 16},
+    {"index_type": "hnsw", "quantization": "none", "ef_search": 32},
+    {"index_type": "hnsw", "quantization": "none", "ef_search": 128},
+    {"index_type": "hnsw", "quantization": "sq8", "ef_search": 64},
+]
+
+
+if __name__ == "__main__":
+    from embedding_cache import load_embeddings
+    from vector_store import load_store, load_vectors
+
+    parser = argparse.ArgumentParser(description="Recall vs latency of FAISS index types on the CampusPal corpus.")
+    parser.add_argument("--report", action="store_true", help="Run the recall/latency comparison.")
+    parser.add_argument("--db-path", default="vectorstore/db_faiss")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--json", help="Also write the rows to this JSON file.")
+    args = parser.parse_args()
+    if not args.report:
+        parser.print_help()
+        raise SystemExit(0)
+
+    corpus_vectors = load_vectors(args.db_path)
+    if corpus_vectors is None:
+        embeddings = load_embeddings()
+        corpus_vectors = store_vectors(load_store(args.db_path, embeddings), embeddings)
+        embeddings.cache.flush()
+    corpus_vectors = np.ascontiguousarray(corpus_vectors, dtype=np.float32)
+    print(f"Corpus: {len(corpus_vectors)} vectors, dim {corpus_vectors.shape[1]}")
+
+    report = recall_report(corpus_vectors, DEFAULT_REPORT_CONFIGS, n_queries=args.queries, k=args.k)
+    print(f"{'params':<70} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8} {'B/vec':>8}")
+    for row in report:
+        print(f"{json.dumps(row['params']):<70} {row['recall_at_k']:>10} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['bytes_per_vector']:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
@@ -50,6 +50,19 @@ const CustomToast = ({ message, type = 'success', onClose }) => {
   );
 };
 
+/**
+ * Parses one Server-Sent Event block ("event: ...\ndata: ...") from /chat/stream
+ */
+const parseSseEvent = (rawEvent) => {
+  let event = 'message';
+  let data = '';
+  for (const line of rawEvent.split('\n')) {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data += line.slice(5).trim();
+  }
+  return { event, data: data ? JSON.parse(data) : {} };
+};
+
 /**
  * Shadcn-style Spinner Component with proper animation
  */
@@ -576,8 +589,8 @@ function App() {
   const [showHistoryViewer, setShowHistoryViewer] = useState(false);
   const [toasts, setToasts] = useState([]);
   
-  // Backend API URL
-  const API_URL = 'http://localhost:8000/chat';
+  // Backend API URL (/chat/stream streams the answer as Server-Sent Events)
+  const STREAM_API_URL = 'http://localhost:8000/chat/stream';
 
   // Save chat history to localStorage whenever messages change
   useEffect(() => {
@@ -633,7 +646,7 @@ function App() {
     const historyForAPI = messages.map(({ role, content }) => ({ role, content }));
 
     try {
-      const response = await fetch(API_URL, {
+      const response = await fetch(STREAM_API_URL, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -648,14 +661,45 @@ function App() {
         throw new Error(`API request failed with status ${response.status}`);
       }
 
-      const data = await response.json();
-      
-      const botMessage = {
-        role: 'assistant',
-        content: data.answer || 'Sorry, I encountered a problem.',
-        ts: Date.now(),
+      // Render tokens as they arrive instead of waiting for the full answer
+      const botTs = Date.now();
+      let answer = '';
+      let botAdded = false;
+      const showAnswer = (content) => {
+        if (!botAdded) {
+          botAdded = true;
+          setIsLoading(false);
+          setMessages((prevMessages) => [...prevMessages, { role: 'assistant', content, ts: botTs }]);
+        } else {
+          setMessages((prevMessages) =>
+            prevMessages.map((m) => (m.role === 'assistant' && m.ts === botTs ? { ...m, content } : m))
+          );
+        }
       };
-      setMessages((prevMessages) => [...prevMessages, botMessage]);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const rawEvents = buffer.split('\n\n');
+        buffer = rawEvents.pop();
+        for (const rawEvent of rawEvents) {
+          const { event, data } = parseSseEvent(rawEvent);
+          if (event === 'token') {
+            answer += data.token;
+            showAnswer(answer);
+          } else if (event === 'error') {
+            throw new Error(data.error);
+          }
+        }
+      }
+
+      if (!answer) {
+        showAnswer('Sorry, I encountered a problem.');
+      }
 
     } catch (err) {
       console.error(err);
@@ -1,109 +1,515 @@
 import os
 import glob
+import json
+import time
+import hashlib
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from tqdm import tqdm
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
-import pandas as pd
+from embedding_cache import load_embeddings
+import bm25_index
+import faiss_index
+import boilerplate
+import splitters
+import metadata_index
+import vector_store
+import metrics
+import embedding_backends
 
-#Paths 
+#Paths
 DATA_PATH = "scraper/data/"          # Scraped text, PDF texts, and CSVs
 PDF_EXTRA_PATH = "scraper/apsit_documents/"  # Optional: Manually add PDFs here
 DB_FAISS_PATH = "vectorstore/db_faiss"
+MANIFEST_PATH = "vectorstore/ingest_manifest.json"  # Per-file hashes + chunk IDs for incremental runs
 
-# Convert CSV to text 
-def csv_to_text(file_path):
+# Chunking settings - stored in the manifest so a change forces a full rebuild
+CHUNK_SIZE = 1500  # Increased to reduce fragmentation
+CHUNK_OVERLAP = 200  # Increased overlap for better context
+
+# Pipeline settings - files are loaded/split in worker processes, chunks are embedded in batches
+INGEST_WORKERS = os.cpu_count() or 1
+EMBED_BATCH_SIZE = 256
+
+# {source type: boilerplate lines} (menus, footers, PDF letterheads); set per worker process
+_BOILERPLATE = None
+
+# Seconds per ingest phase for this run (printed at the end, optionally written with --metrics-file)
+PHASE_SECONDS = {}
+
+@contextmanager
+def ingest_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS[name] = PHASE_SECONDS.get(name, 0.0) + time.perf_counter() - start
+
+def timed_batches(batches):
+    """Charges time spent waiting on the load/split workers to the "load_split" phase."""
+    batches = iter(batches)
+    while True:
+        with ingest_phase("load_split"):
+            batch = next(batches, None)
+        if batch is None:
+            return
+        yield batch
+
+def report_phases(metrics_file=None):
+    for phase, seconds in PHASE_SECONDS.items():
+        metrics.INGEST_PHASE_SECONDS.set(round(seconds, 3), phase=phase)
+    print("Phase timings: " + ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in PHASE_SECONDS.items()))
+    if metrics_file:
+        metrics.REGISTRY.write(metrics_file)
+        print(f"Ingest metrics written to {metrics_file}")
+
+def file_hash(file_path):
+    """SHA-256 of a file's bytes, read in blocks so large PDFs are not held in memory."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_ids_for(file_path, content_hash, count):
+    """Deterministic chunk IDs so a file's chunks can be found and deleted later."""
+    prefix = hashlib.sha1(f"{file_path}:{content_hash}".encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{i}" for i in range(count)]
+
+def collect_source_files():
+    """Returns {path: kind} for every TXT, PDF and CSV the ingest covers."""
+    # Use recursive=True to find files in data/ and data/pdfs/
+    files = {}
+    for path in glob.glob(os.path.join(DATA_PATH, "**/*.txt"), recursive=True):
+        files[path] = "txt"
+    for path in glob.glob(os.path.join(PDF_EXTRA_PATH, "*.pdf")):
+        files[path] = "pdf"
+    for path in glob.glob(os.path.join(DATA_PATH, "*.csv")):
+        files[path] = "csv"
+    return files
+
+def load_file(file_path, kind):
+    """Loads one source file into Documents. Raises on failure."""
+    if kind == "txt":
+        documents = TextLoader(file_path, encoding='utf-8').load()
+        return split_pages(documents, file_path)
+    if kind == "pdf":
+        return PyPDFLoader(file_path).load()
+    # Raw CSV text; the table splitter parses it into header + row-group chunks
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if not text.strip():
+        return []
+    return [Document(page_content=text, metadata={"source": file_path})]
+
+def split_pages(documents, file_path):
+    """Splits PDF-derived text into one Document per page using the scraper's `.pages.json` sidecar."""
+    pages_path = os.path.splitext(file_path)[0] + ".pages.json"
+    if not documents or not os.path.exists(pages_path):
+        return documents
+    with open(pages_path, "r", encoding="utf-8") as f:
+        offsets = json.load(f)
+    text = documents[0].page_content
+    return [
+        Document(page_content=text[start:end], metadata={"source": file_path, "page": page})
+        for page, start, end in offsets
+        if text[start:end].strip()
+    ]
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not read manifest {MANIFEST_PATH}: {e}")
+        return None
+
+def chunk_settings(strip_boilerplate):
+    return {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "strip_boilerplate": strip_boilerplate,
+            "splitter_version": splitters.SPLITTER_VERSION, "metadata_version": metadata_index.METADATA_VERSION}
+
+def save_manifest(files, settings):
+    manifest = {
+        "settings": settings,
+        "files": files,
+    }
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def load_change_log(path):
+    """(names relative to DATA_PATH the scraper added or modified since the last ingest, log sequence)
+    from its changes.json; (None, None) if it can't be read or an earlier ingest already consumed it."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            change_log = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not read change log {path}: {e} - hashing every file instead.")
+        return None, None
+    if change_log.get("consumed"):
+        print(f"[INFO] Change log {path} was already consumed (no scrape since) - hashing every file instead.")
+        return None, None
+    return set(change_log.get("added", [])) | set(change_log.get("modified", [])), change_log.get("sequence")
+
+def mark_change_log_consumed(path, sequence):
+    """Marks the log consumed so the scraper starts a new one - unless a scrape merged more
+    changes into it while we were ingesting, in which case the next ingest reads it again."""
     try:
-        df = pd.read_csv(file_path)
-        return df.to_string(index=False)
+        with open(path, "r", encoding="utf-8") as f:
+            change_log = json.load(f)
+    except (OSError, ValueError):
+        return
+    if change_log.get("sequence") != sequence:
+        return
+    change_log["consumed"] = True
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(change_log, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+def get_text_splitter(file_path, kind):
+    # Table rows for CSVs, headings for syllabus/GR texts, recursive split otherwise (see splitters.py)
+    return splitters.get_splitter(file_path, kind, CHUNK_SIZE, CHUNK_OVERLAP)
+
+def _init_worker(boilerplate_lines):
+    global _BOILERPLATE
+    _BOILERPLATE = boilerplate_lines
+
+def clean_documents(documents, file_path, kind):
+    """Drops boilerplate lines (the set for this file's source type + lines repeated on most
+    pages of this file). Returns (documents, bytes removed); documents left empty are dropped."""
+    if _BOILERPLATE is None or kind == "csv":
+        return documents, 0
+    lines = _BOILERPLATE.get(boilerplate.source_type(file_path, kind), set()) \
+        | boilerplate.repeated_page_lines([doc.page_content for doc in documents])
+    cleaned, bytes_removed = [], 0
+    for doc in documents:
+        text, removed = boilerplate.strip_lines(doc.page_content, lines)
+        bytes_removed += removed
+        if text.strip():
+            cleaned.append(Document(page_content=text, metadata=doc.metadata))
+    return cleaned, bytes_removed
+
+def load_and_split_file(file_path, kind, content_hash=None):
+    """Loads, cleans and splits one file. Runs inside a worker process.
+
+    Returns (file_path, content_hash, docs_loaded, chunks, error, cleaning) where
+    cleaning = {"bytes_removed"} relative to the uncleaned file.
+    """
+    cleaning = {"bytes_removed": 0}
+    try:
+        content_hash = content_hash or file_hash(file_path)
+        documents = load_file(file_path, kind)
+        derived = metadata_index.derive_metadata(file_path, kind)
+        for doc in documents:
+            doc.metadata.update(derived)
+        splitter = get_text_splitter(file_path, kind)
+        cleaned, cleaning["bytes_removed"] = clean_documents(documents, file_path, kind)
+        chunks = splitter.split_documents(cleaned)
     except Exception as e:
-        print(f"[ERROR] Failed to read CSV {file_path}: {e}")
-        return ""
+        return file_path, None, 0, [], f"{kind.upper()} load failed {file_path}: {e}", cleaning
+    return file_path, content_hash, len(documents), chunks, None, cleaning
+
+def _run_load_and_split(source_files, hashes, workers, boilerplate_lines=None):
+    """Yields load_and_split_file results, keeping at most 2x workers files in flight."""
+    jobs = iter(sorted(source_files.items()))
+    if workers <= 1:
+        _init_worker(boilerplate_lines)
+        for file_path, kind in jobs:
+            yield load_and_split_file(file_path, kind, hashes.get(file_path))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(boilerplate_lines,)) as executor:
+        in_flight = set()
+        for file_path, kind in jobs:
+            in_flight.add(executor.submit(load_and_split_file, file_path, kind, hashes.get(file_path)))
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in in_flight:
+            yield future.result()
+
+def iter_chunk_batches(source_files, failed_files, entries, stats, hashes=None,
+                       workers=INGEST_WORKERS, batch_size=EMBED_BATCH_SIZE, boilerplate_lines=None):
+    """Streams (chunks, ids) batches of at most batch_size chunks.
+
+    Files are loaded and split in a process pool; only the current batch of
+    chunks is held here. Fills `entries` with manifest entries as files finish.
+    """
+    hashes = hashes or {}
+    batch_chunks, batch_ids = [], []
+    results = _run_load_and_split(source_files, hashes, workers, boilerplate_lines)
+    for file_path, content_hash, docs_loaded, file_chunks, error, cleaning in tqdm(
+            results, total=len(source_files), desc="Loading + splitting"):
+        if error:
+            print(f"[ERROR] {error}")
+            failed_files.append(file_path)
+            continue
+        file_ids = chunk_ids_for(file_path, content_hash, len(file_chunks))
+        entries[file_path] = {"hash": content_hash, "chunk_ids": file_ids}
+        stats["docs_loaded"] += docs_loaded
+        stats["chunks"] += len(file_chunks)
+        stats["bytes_removed"] += cleaning["bytes_removed"]
+        batch_chunks.extend(file_chunks)
+        batch_ids.extend(file_ids)
+        while len(batch_chunks) >= batch_size:
+            yield batch_chunks[:batch_size], batch_ids[:batch_size]
+            batch_chunks, batch_ids = batch_chunks[batch_size:], batch_ids[batch_size:]
+    if batch_chunks:
+        yield batch_chunks, batch_ids
 
-#  Main Function 
-def create_vector_db_advanced():
-    all_documents = []
+def save_metadata_index(db):
+    """Department / doc type / year -> chunk positions, used for filtered retrieval."""
+    index = metadata_index.MetadataIndex.from_store(db)
+    index.save(DB_FAISS_PATH)
+    print(f"Metadata index saved ({len(index.postings)} filter values)")
+
+def save_sparse_index(db):
+    """Rebuilds the BM25 index over the store's chunks (no embedding needed, so always a full rebuild)."""
+    sparse = bm25_index.build_from_store(db)
+    sparse.save(bm25_index.BM25_PATH)
+    print(f"BM25 index saved at '{bm25_index.BM25_PATH}' ({len(sparse.vocab)} terms, {len(sparse.docs)} postings)")
+
+#  Main Function
+def create_vector_db_advanced(incremental=False, workers=INGEST_WORKERS, batch_size=EMBED_BATCH_SIZE,
+                              index_params=None, changes_path=None, strip_boilerplate=True, store_format=None,
+                              metrics_file=None, embedding_backend=None):
+    """index_params: FAISS index type/quantization (see faiss_index.py). None keeps the
+    saved settings on incremental runs and uses an exact flat index on full rebuilds.
+    changes_path: the scraper's change log; on incremental runs, scraped files it does
+    not list are trusted to be unchanged and are not re-hashed.
+    strip_boilerplate: drop lines repeated across many files / pages before chunking.
+    store_format: "pickle" (LangChain save_local) or "mmap" (see vector_store.py). None keeps
+    the saved format on incremental runs and uses "pickle" on full rebuilds.
+    metrics_file: also write the phase timings there in the Prometheus text format.
+    embedding_backend: "torch", "onnx" or "onnx-int8" (see embedding_backends.py); None uses
+    CAMPUSPAL_EMBEDDING_BACKEND."""
     failed_files = []
+    PHASE_SECONDS.clear()
 
     print("--- Starting Advanced Document Ingestion ---")
     os.makedirs(DB_FAISS_PATH, exist_ok=True)
 
-    # Load all TXT files (from pages AND scraped PDFs)
-    # Use recursive=True to find files in data/ and data/pdfs/
-    txt_files = glob.glob(os.path.join(DATA_PATH, "**/*.txt"), recursive=True)
-    print(f"[Phase 1/4] Found {len(txt_files)} TXT files (page text + PDF text).")
-    for file_path in tqdm(txt_files, desc="Loading TXT files"):
-        try:
-            loader = TextLoader(file_path, encoding='utf-8')
-            all_documents.extend(loader.load())
-        except Exception as e:
-            print(f"[ERROR] TXT load failed {file_path}: {e}")
-            failed_files.append(file_path)
+    with ingest_phase("collect"):
+        source_files = collect_source_files()
+    kinds = list(source_files.values())
+    print(f"[Phase 1/4] Found {kinds.count('txt')} TXT files (page text + PDF text).")
+    print(f"[Phase 2/4] Found {kinds.count('pdf')} optional PDF files.")
+    print(f"[Phase 3/4] Found {kinds.count('csv')} CSV table files.")
 
-    # Load all PDFs (from optional manual-add folder)
-    pdf_files = glob.glob(os.path.join(PDF_EXTRA_PATH, "*.pdf"))
-    print(f"[Phase 2/4] Found {len(pdf_files)} optional PDF files.")
-    for file_path in tqdm(pdf_files, desc="Loading PDFs"):
-        try:
-            loader = PyPDFLoader(file_path)
-            all_documents.extend(loader.load())
-        except Exception as e:
-            print(f"[ERROR] PDF load failed {file_path}: {e}")
-            failed_files.append(file_path)
+    # Unchanged chunks are served from the on-disk embedding cache
+    with ingest_phase("load_embeddings"):
+        embeddings = load_embeddings(backend=embedding_backend)
+    pipeline = {"workers": max(1, workers), "batch_size": max(1, batch_size)}
 
-    # Load CSV tables as text
-    csv_files = glob.glob(os.path.join(DATA_PATH, "*.csv"))
-    print(f"[Phase 3/4] Found {len(csv_files)} CSV table files.")
-    for file_path in tqdm(csv_files, desc="Loading CSVs"):
-        text = csv_to_text(file_path)
-        if text:
-            try:
-                # Create a Document object directly from the CSV text
-                doc = Document(
-                    page_content=text,
-                    metadata={"source": file_path}
-                )
-                all_documents.append(doc)
-            except Exception as e:
-                print(f"[ERROR] CSV load failed {file_path}: {e}")
-                failed_files.append(file_path)
-
-    if not all_documents:
-        print("No documents loaded. Scraper may not have run. Exiting.")
-        return
+    # Read before scanning anything: changes a scrape merges in later stay unconsumed for the next run
+    changed_names, change_sequence = load_change_log(changes_path) if changes_path else (None, None)
+    manifest = load_manifest() if incremental else None
+    index_exists = vector_store.store_format(DB_FAISS_PATH) is not None
+    settings = chunk_settings(strip_boilerplate)
+    boilerplate_lines = boilerplate.load_boilerplate() if incremental and strip_boilerplate else None
+    if incremental and (manifest is None or not index_exists or manifest.get("settings") != settings
+                        or (strip_boilerplate and boilerplate_lines is None)):
+        print("[INFO] No usable manifest/index (or chunk settings changed) - falling back to a full rebuild.")
+        incremental = False
 
-    # Split into chunks - larger chunks reduce noise from navigation elements
-    print("[Phase 4/4] Splitting documents into chunks...")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1500,  # Increased to reduce fragmentation
-        chunk_overlap=200  # Increased overlap for better context
-    )
-    chunks = text_splitter.split_documents(all_documents)
-    print(f"Total chunks created: {len(chunks)}")
-
-    # Create embeddings + FAISS store
-    print("Creating embeddings and FAISS vector store...")
-    embeddings = HuggingFaceEmbeddings(
-        model_name='sentence-transformers/all-MiniLM-L6-v2',
-        model_kwargs={'device': 'cpu'}
-    )
-
-    db = FAISS.from_documents(chunks, embeddings)
-    db.save_local(DB_FAISS_PATH)
-    print(f"FAISS index saved at '{DB_FAISS_PATH}'")
-
-    # 6Summary
-    print("\n--- Ingestion Summary ---")
-    print(f"Total documents loaded: {len(all_documents)}")
-    print(f"Total chunks created: {len(chunks)}")
+    if strip_boilerplate and not incremental:
+        # Full rebuilds recount line frequencies; incremental runs reuse the saved set
+        text_files = [path for path, kind in source_files.items() if kind == "txt"]
+        with ingest_phase("boilerplate"):
+            boilerplate_lines = boilerplate.build_boilerplate(text_files)
+        boilerplate.print_boilerplate(boilerplate_lines)
+    pipeline["boilerplate_lines"] = boilerplate_lines
+
+    if incremental:
+        _update_vector_db(source_files, manifest["files"], embeddings, failed_files, pipeline, settings,
+                          index_params, changed_names, store_format)
+    else:
+        _rebuild_vector_db(source_files, embeddings, failed_files, pipeline, settings,
+                           index_params or dict(faiss_index.DEFAULT_PARAMS), store_format or "pickle")
+    with ingest_phase("flush_cache"):
+        embeddings.cache.flush()
+    if change_sequence is not None:
+        mark_change_log_consumed(changes_path, change_sequence)
+
+    stats = embeddings.cache.stats()
+    print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"(hit rate {stats['hit_rate']:.1%}), {stats['entries']} entries")
     if failed_files:
         print(f"Failed files ({len(failed_files)}):")
         for f in failed_files:
             print(f"- {f}")
+    report_phases(metrics_file)
     print("----------------------------")
 
+def _rebuild_vector_db(source_files, embeddings, failed_files, pipeline, settings, index_params, store_format):
+    print(f"[Phase 4/4] Loading, splitting and embedding with {pipeline['workers']} workers "
+          f"(batch size {pipeline['batch_size']})...")
+    entries = {}
+    stats = {"docs_loaded": 0, "chunks": 0, "bytes_removed": 0}
+    db = None
+    for chunks, ids in timed_batches(iter_chunk_batches(source_files, failed_files, entries, stats, **pipeline)):
+        # Create embeddings + FAISS store on the first batch, then extend it
+        with ingest_phase("embed_add"):
+            if db is None:
+                db = FAISS.from_documents(chunks, embeddings, ids=ids)
+            else:
+                db.add_documents(chunks, ids=ids)
+    if db is None:
+        print("No documents loaded. Scraper may not have run. Exiting.")
+        return
+
+    _apply_index_params(db, embeddings, index_params)
+    _save_indexes(db, embeddings, index_params, store_format)
+    with ingest_phase("save_manifest"):
+        if pipeline["boilerplate_lines"] is not None:
+            boilerplate.save_boilerplate(pipeline["boilerplate_lines"])
+        save_manifest(entries, settings)
+    print(f"FAISS index saved at '{DB_FAISS_PATH}' ({store_format} format)")
+
+    # Summary
+    print("\n--- Ingestion Summary ---")
+    print(f"Total documents loaded: {stats['docs_loaded']}")
+    print(f"Total chunks created: {stats['chunks']}")
+    print_cleaning_summary(stats)
+
+def print_cleaning_summary(stats):
+    # Estimated from the bytes removed; splitting the uncleaned text again would double the split cost
+    if stats["bytes_removed"]:
+        print(f"Boilerplate removed: {stats['bytes_removed'] / 1e6:.2f} MB, "
+              f"~{round(stats['bytes_removed'] / (CHUNK_SIZE - CHUNK_OVERLAP))} fewer chunks")
+
+def _apply_index_params(db, embeddings, index_params):
+    """Swaps the flat index built from the batches for an approximate/quantized one, if requested."""
+    if faiss_index.is_flat(index_params):
+        return
+    print(f"Training {index_params} FAISS index on up to {faiss_index.TRAIN_SAMPLE_SIZE} vectors...")
+    with ingest_phase("train_index"):
+        faiss_index.swap_index(db, embeddings, index_params)
+
+def _save_indexes(db, embeddings, index_params, store_format):
+    # Written before the store commits (store.json), whose change is what makes the server reload them all
+    with ingest_phase("save_metadata_index"):
+        save_metadata_index(db)
+    with ingest_phase("save_sparse_index"):
+        save_sparse_index(db)
+    with ingest_phase("save_store"):
+        faiss_index.save_params(DB_FAISS_PATH, index_params)
+        vector_store.save_store(db, DB_FAISS_PATH, store_format, embeddings)
+
+def _in_data_path(file_path):
+    return os.path.commonpath([os.path.abspath(file_path), os.path.abspath(DATA_PATH)]) == os.path.abspath(DATA_PATH)
+
+def _update_vector_db(source_files, previous, embeddings, failed_files, pipeline, settings, index_params=None,
+                      changed_names=None, store_format=None):
+    """Re-embeds only new/changed files and deletes stale chunks from the saved index in place."""
+    removed = [path for path in previous if path not in source_files]
+    pending, unchanged, hashes = {}, {}, {}
+    for file_path, kind in source_files.items():
+        entry = previous.get(file_path)
+        if entry and changed_names is not None and _in_data_path(file_path) \
+                and os.path.relpath(file_path, DATA_PATH) not in changed_names:
+            unchanged[file_path] = entry
+            continue
+        try:
+            with ingest_phase("hash"):
+                hashes[file_path] = file_hash(file_path)
+            if entry and entry["hash"] == hashes[file_path]:
+                unchanged[file_path] = entry
+                continue
+        except OSError as e:
+            print(f"[ERROR] Could not hash {file_path}: {e}")
+        pending[file_path] = kind
+    changed = [path for path in pending if path in previous]
+    print(f"[Phase 4/4] Incremental update: {len(pending) - len(changed)} new, "
+          f"{len(changed)} changed, {len(removed)} removed, {len(unchanged)} unchanged.")
+
+    saved_params = faiss_index.load_params(DB_FAISS_PATH)
+    index_params = index_params or saved_params
+    saved_format = vector_store.store_format(DB_FAISS_PATH)
+    store_format = store_format or saved_format
+    if not pending and not removed and index_params == saved_params and store_format == saved_format:
+        print("Index is up to date. Nothing to do.")
+        return
+
+    with ingest_phase("load_store"):
+        db = vector_store.load_store(DB_FAISS_PATH, embeddings, writable=True)
+        if not faiss_index.is_flat(saved_params):
+            # IVF/HNSW/quantized indexes don't renumber on remove_ids (or can't remove at all),
+            # so edit a flat copy rebuilt from the embedding cache and retrain afterwards
+            faiss_index.swap_index(db, embeddings, faiss_index.DEFAULT_PARAMS)
+    known_ids = set(db.index_to_docstore_id.values())
+    stale_ids = [
+        chunk_id
+        for path in removed + changed
+        for chunk_id in previous[path]["chunk_ids"]
+        if chunk_id in known_ids
+    ]
+    if stale_ids:
+        with ingest_phase("delete"):
+            db.delete(stale_ids)
+        print(f"Deleted {len(stale_ids)} stale chunks.")
+
+    entries = {}
+    stats = {"docs_loaded": 0, "chunks": 0, "bytes_removed": 0}
+    for chunks, ids in timed_batches(iter_chunk_batches(pending, failed_files, entries, stats, hashes, **pipeline)):
+        with ingest_phase("embed_add"):
+            db.add_documents(chunks, ids=ids)
+
+    _apply_index_params(db, embeddings, index_params)
+    _save_indexes(db, embeddings, index_params, store_format)
+    unchanged.update(entries)
+    with ingest_phase("save_manifest"):
+        save_manifest(unchanged, settings)
+    print(f"FAISS index updated at '{DB_FAISS_PATH}' ({store_format} format)")
+
+    print("\n--- Ingestion Summary ---")
+    print(f"Documents re-loaded: {stats['docs_loaded']}")
+    print(f"Chunks added: {stats['chunks']} | Chunks deleted: {len(stale_ids)}")
+    print(f"Total chunks in index: {db.index.ntotal}")
+    print_cleaning_summary(stats)
+
 
 if __name__ == "__main__":
-    create_vector_db_advanced()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the CampusPal FAISS vector store.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-embed new/changed files and drop chunks of deleted ones.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Processes used to load and split files (1 = run inline).")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help="Chunks embedded and added to the index per batch.")
+    parser.add_argument("--index-type", choices=faiss_index.INDEX_TYPES,
+                        help="FAISS index: exact flat (default), IVF or HNSW.")
+    parser.add_argument("--quantization", choices=faiss_index.QUANTIZATIONS, default="none",
+                        help="Vector compression: none, 8-bit scalar (sq8) or product quantization (pq).")
+    parser.add_argument("--nlist", type=int, help="IVF list count (default ~4*sqrt(chunks)).")
+    parser.add_argument("--store-format", choices=vector_store.STORE_FORMATS,
+                        help="On-disk format: pickle (LangChain default) or mmap (no pickle, memory-mapped, "
+                             "fast cold start). Default: keep the saved format, pickle for new stores.")
+    parser.add_argument("--keep-boilerplate", action="store_true",
+                        help="Don't strip lines repeated across many files (menus, footers, PDF headers).")
+    parser.add_argument("--changes", help="With --incremental: the scraper's changes.json; only the scraped "
+                                          "files it lists as added/modified are re-hashed.")
+    parser.add_argument("--embedding-backend", choices=embedding_backends.BACKENDS,
+                        help="Embedding model runtime: torch (default), onnx or onnx-int8 (export + verify "
+                             "first with embedding_backends.py).")
+    parser.add_argument("--metrics-file", help="Also write phase timings in the Prometheus text format "
+                                               "(e.g. for the node_exporter textfile collector).")
+    args = parser.parse_args()
+
+    index_params = None
+    if args.index_type or args.quantization != "none":
+        index_params = {"index_type": args.index_type or "flat", "quantization": args.quantization}
+        if args.nlist:
+            index_params["nlist"] = args.nlist
+    create_vector_db_advanced(incremental=args.incremental, workers=args.workers, batch_size=args.batch_size,
+                              index_params=index_params, changes_path=args.changes,
+                              strip_boilerplate=not args.keep_boilerplate, store_format=args.store_format,
+                              metrics_file=args.metrics_file, embedding_backend=args.embedding_backend)
@@ -0,0 +1,203 @@
+"""Structured chunk metadata (department, doc type, academic year) and a filter index.
+
+ingest.py tags every chunk with derive_metadata() from its source file name
+and saves MetadataIndex next to the FAISS store as metadata_index.npz:
+one sorted int64 array of chunk positions per `field=value`. The retriever
+turns a filter such as {"department": "it", "doc_type": "syllabus"} into
+the allowed positions and hands them to FAISS as an ID selector, so only
+that part of the index is scanned.
+
+classify_query() is a keyword classifier that picks filters from the
+question itself ("IT syllabus", "placements 2023-24"). The year value
+"undated" matches chunks whose file name carries no year.
+"""
+import os
+import re
+
+import numpy as np
+
+METADATA_INDEX_FILE = "metadata_index.npz"
+METADATA_VERSION = 1
+FILTER_FIELDS = ("department", "doc_type", "year")
+UNDATED = "undated"  # Year filter value for chunks without a year (most files have none)
+
+# Checked in order against the lowercased file name tokens; first match wins
+DEPARTMENT_PATTERNS = [
+    ("aiml", re.compile(r"\b(aiml|ai ml|ai and ml|cseaiml|artificial intelligence)\b")),
+    ("data_science", re.compile(r"\b(data science|ds|cse ds|ai ds)\b")),
+    ("it", re.compile(r"\b(it|information technology)\b")),
+    ("computer", re.compile(r"\b(computer|comp|cse)\b")),
+    ("civil", re.compile(r"\bcivil\b")),
+    ("mechanical", re.compile(r"\b(mechanical|mech)\b")),
+    ("first_year", re.compile(r"\b(fe|first year|has|humanities)\b")),
+]
+DOC_TYPE_PATTERNS = [
+    ("syllabus", re.compile(r"\b(syllabus|curriculum|r 19|r2019|board studies)\b")),
+    ("government_resolution", re.compile(r"\b(government resolution|gr)\b")),
+    ("approval", re.compile(r"\b(aicte|approval|affiliation|permission|corrigendum|minority)\b")),
+    ("placement", re.compile(r"\b(placement|tandp|t p|internships?|industry)\b")),
+    ("faculty", re.compile(r"\b(faculty|leadership|governing|council|committee)\b")),
+    ("calendar", re.compile(r"\b(calendar|timetable|tt|master)\b")),
+    ("admission", re.compile(r"\b(admission|acap|quota|cet|jee|fee|refund|intake)\b")),
+    ("magazine", re.compile(r"\b(magazine|emag\w*)\b")),
+    ("report", re.compile(r"\b(report|eoa|nba\w*|result analysis|achievements?)\b")),
+]
+# Question keywords -> filters (only unambiguous mentions; anything else searches everything)
+QUERY_DEPARTMENT_PATTERNS = [
+    ("aiml", re.compile(r"\b(ai ?& ?ml|aiml|ai-ml|artificial intelligence)\b", re.IGNORECASE)),
+    ("data_science", re.compile(r"\b(data science|ds branch|ai ?& ?ds)\b", re.IGNORECASE)),
+    ("it", re.compile(r"\b(IT|information technology)\b")),
+    ("computer", re.compile(r"\b(computer engineering|comps|computer department)\b", re.IGNORECASE)),
+    ("civil", re.compile(r"\bcivil\b", re.IGNORECASE)),
+    ("mechanical", re.compile(r"\b(mechanical|mech)\b", re.IGNORECASE)),
+    ("first_year", re.compile(r"\b(first year|fe)\b", re.IGNORECASE)),
+]
+QUERY_DOC_TYPE_PATTERNS = [
+    ("syllabus", re.compile(r"\b(syllabus|syllabi|curriculum|course outcomes?)\b", re.IGNORECASE)),
+    ("placement", re.compile(r"\b(placements?|placed|recruiters?|packages?)\b", re.IGNORECASE)),
+    ("calendar", re.compile(r"\b(academic calendar|timetable|time table)\b", re.IGNORECASE)),
+    ("government_resolution", re.compile(r"\b(government resolution|gr)\b", re.IGNORECASE)),
+]
+ACADEMIC_YEAR_PATTERN = re.compile(r"(?<!\d)(20\d{2}|\d{2})[-_ ](20\d{2}|\d{2})(?!\d)")
+YEAR_PATTERN = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+
+def _name_text(file_path):
+    """File name as lowercase space-separated words ("IT_Syllabus_R-19" -> "it syllabus r 19")."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    name = re.sub(r"_table_\d+$", "", name)
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+
+def academic_year(text):
+    """'2024-25', '22-23', '2025_26' -> '2024-25' style; a lone '2020' -> '2020'; else None."""
+    for first, second in ACADEMIC_YEAR_PATTERN.findall(text):
+        start = int(first) if len(first) == 4 else 2000 + int(first)
+        end = int(second) % 100
+        if end == (start + 1) % 100:
+            return f"{start}-{end:02d}"
+    years = YEAR_PATTERN.findall(text)
+    return max(years) if years else None
+
+
+def year_values(year):
+    """Stored year values a filter year should match: '2024' also matches '2023-24' and '2024-25'."""
+    if re.fullmatch(r"20\d{2}", str(year)):
+        start = int(year)
+        return [str(year), f"{start - 1}-{start % 100:02d}", f"{start}-{(start + 1) % 100:02d}"]
+    return [str(year)]
+
+
+def _first_match(patterns, text, default=None):
+    return next((label for label, pattern in patterns if pattern.search(text)), default)
+
+
+def derive_metadata(file_path, kind):
+    """Department, doc type and academic year for one source file, from its name."""
+    name = _name_text(file_path)
+    metadata = {
+        "department": _first_match(DEPARTMENT_PATTERNS, name, "general"),
+        "doc_type": _first_match(DOC_TYPE_PATTERNS, name, "table" if kind == "csv" else "general"),
+    }
+    year = academic_year(os.path.basename(file_path))
+    if year:
+        metadata["year"] = year
+    return metadata
+
+
+def classify_query(query):
+    """Filters implied by explicit mentions in the question, or None.
+
+    A department mention still allows institute-wide ("general") documents, and a
+    year mention still allows undated ones.
+    """
+    filters = {}
+    department = _first_match(QUERY_DEPARTMENT_PATTERNS, query)
+    if department:
+        filters["department"] = [department, "general"]
+    doc_type = _first_match(QUERY_DOC_TYPE_PATTERNS, query)
+    if doc_type:
+        filters["doc_type"] = doc_type
+    year = academic_year(query)
+    if year:
+        filters["year"] = [year, UNDATED]
+    return filters or None
+
+
+def filter_key(filters):
+    """Hashable, order-independent form of a filters dict (for cache keys)."""
+    if not filters:
+        return None
+    return tuple(sorted(
+        (field, tuple(sorted(value)) if isinstance(value, (list, tuple)) else value)
+        for field, value in filters.items()
+    ))
+
+
+class MetadataIndex:
+    def __init__(self, postings, n_chunks):
+        self.postings = postings  # "field=value" -> sorted int64 chunk positions
+        self.n_chunks = n_chunks
+        self._undated = None
+
+    @classmethod
+    def build(cls, metadatas):
+        """metadatas: chunk metadata dicts in FAISS position order."""
+        groups = {}
+        for position, metadata in enumerate(metadatas):
+            for field in FILTER_FIELDS:
+                value = metadata.get(field)
+                if value is not None:
+                    groups.setdefault(f"{field}={value}", []).append(position)
+        return cls({key: np.asarray(positions, dtype=np.int64) for key, positions in groups.items()},
+                   len(metadatas))
+
+    @classmethod
+    def from_store(cls, db):
+        doc_ids = [db.index_to_docstore_id[i] for i in range(len(db.index_to_docstore_id))]
+        return cls.build([db.docstore.search(doc_id).metadata for doc_id in doc_ids])
+
+    def values(self, field):
+        prefix = f"{field}="
+        return sorted(key[len(prefix):] for key in self.postings if key.startswith(prefix))
+
+    def undated(self):
+        """Positions of chunks without a year (not stored as postings: the complement of the dated ones)."""
+        if self._undated is None:
+            dated = [positions for key, positions in self.postings.items() if key.startswith("year=")]
+            self._undated = np.setdiff1d(np.arange(self.n_chunks, dtype=np.int64),
+                                         np.concatenate(dated) if dated else np.zeros(0, dtype=np.int64))
+        return self._undated
+
+    def positions(self, filters):
+        """Chunk positions matching every field of `filters` (a value or a list of values
+        per field). Returns None for no filters; unknown fields raise ValueError."""
+        if not filters:
+            return None
+        allowed = None
+        for field, wanted in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field '{field}' (expected one of {FILTER_FIELDS})")
+            wanted = wanted if isinstance(wanted, (list, tuple)) else [wanted]
+            if field == "year":
+                wanted = [value for year in wanted for value in year_values(year)]
+            parts = [self.postings[f"{field}={value}"] for value in wanted if f"{field}={value}" in self.postings]
+            if field == "year" and UNDATED in wanted:
+                parts.append(self.undated())
+            matched = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            allowed = matched if allowed is None else np.intersect1d(allowed, matched, assume_unique=True)
+        return allowed
+
+    def save(self, db_path):
+        np.savez(os.path.join(db_path, METADATA_INDEX_FILE), __n_chunks__=np.array([self.n_chunks]),
+                 **self.postings)
+
+    @classmethod
+    def load(cls, db_path):
+        """Returns None if ingest has not written a metadata index yet."""
+        path = os.path.join(db_path, METADATA_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            postings = {key: data[key] for key in data.files if key != "__n_chunks__"}
+            return cls(postings, int(data["__n_chunks__"][0]))
@@ -0,0 +1,283 @@
+"""In-process metrics for the RAG pipeline, rendered in the Prometheus text format.
+
+backend.py serves REGISTRY.render() on /metrics. The chain (rag_chain_builder.py,
+retrieval.py) times each stage with `with metrics.stage("dense_search"):`,
+which feeds campuspal_stage_seconds{stage=...} and the in-flight gauge.
+ingest.py times its phases the same way and can write them to a file for
+the node_exporter textfile collector.
+
+Tracing: with CAMPUSPAL_TRACE_SAMPLE_RATE > 0 that fraction of /chat requests
+record a per-request trace (every stage span with its offset and duration,
+plus doc/token counts). The last CAMPUSPAL_TRACE_BUFFER traces are served on
+/metrics/traces and each is printed as one [TRACE] line.
+
+Standard library only, so importing it doesn't slow the server's startup.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_SAMPLE_RATE = float(os.getenv("CAMPUSPAL_TRACE_SAMPLE_RATE", "0"))
+TRACE_BUFFER = int(os.getenv("CAMPUSPAL_TRACE_BUFFER", "100"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 10, 15, 20, 30, 50)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 1500, 2048, 4096, 8192)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_text(key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            # Per-bucket counts; render() makes them cumulative
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, name, collector):
+        """collector() -> [(metric_name, type, help, {label: value}, value)], called on every render.
+        Registering the same name again replaces it (e.g. after the chain is rebuilt)."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        for metric in metrics:
+            samples = metric.render()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        collected = {}
+        for name, collector in collectors:
+            try:
+                for metric_name, type_name, help_text, labels, value in collector():
+                    entry = collected.setdefault(metric_name, (type_name, help_text, []))
+                    entry[2].append((tuple(sorted(labels.items())), value))
+            except Exception as e:
+                print(f"[WARN] Metrics collector '{name}' failed: {e}")
+        for metric_name, (type_name, help_text, samples) in collected.items():
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {type_name}")
+            lines.extend(f"{metric_name}{_label_text(labels)} {_number(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes render() atomically (for the node_exporter textfile collector)."""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(path + ".tmp", path)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("campuspal_stage_seconds", "Time spent in each pipeline stage.", ["stage"])
+STAGE_IN_FLIGHT = REGISTRY.gauge("campuspal_stage_in_flight", "Calls currently inside each pipeline stage.",
+                                 ["stage"])
+STAGE_ERRORS = REGISTRY.counter("campuspal_stage_errors_total", "Pipeline stages that raised.", ["stage"])
+REQUEST_SECONDS = REGISTRY.histogram("campuspal_request_seconds", "End-to-end /chat request latency.",
+                                     ["endpoint"])
+REQUESTS = REGISTRY.counter("campuspal_requests_total", "Chat requests by outcome.", ["endpoint", "status"])
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram("campuspal_time_to_first_token_seconds",
+                                         "Time from LLM call start to its first streamed token.", ["stage"])
+LLM_TOKENS = REGISTRY.histogram("campuspal_llm_tokens", "Prompt / completion tokens per LLM call "
+                                "(reported by the model, else estimated).", ["stage", "kind"], TOKEN_BUCKETS)
+RETRIEVED_DOCS = REGISTRY.histogram("campuspal_retrieved_docs", "Chunks returned by the retriever per query.",
+                                    buckets=COUNT_BUCKETS)
+CONTEXT_DOCS = REGISTRY.histogram("campuspal_context_docs", "Chunks left in the prompt after budgeting.",
+                                  buckets=COUNT_BUCKETS)
+CONTEXT_TOKENS = REGISTRY.histogram("campuspal_context_tokens", "Estimated context tokens stuffed into the prompt.",
+                                    buckets=TOKEN_BUCKETS)
+INGEST_PHASE_SECONDS = REGISTRY.gauge("campuspal_ingest_phase_seconds", "Duration of each phase of the last ingest.",
+                                      ["phase"])
+
+
+class Trace:
+    def __init__(self, name, attributes):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = []
+        self.attributes = dict(attributes)
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, end, **attributes):
+        span = {"name": name, "offset_ms": round((start - self._start) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2)}
+        span.update(attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["offset_ms"])
+        return {"trace_id": self.id, "name": self.name, "started_at": self.started_at,
+                "duration_ms": round((time.perf_counter() - self._start) * 1000, 2),
+                "attributes": self.attributes, "spans": spans}
+
+
+_current_trace = ContextVar("campuspal_trace", default=None)
+_recent_traces = deque(maxlen=max(1, TRACE_BUFFER))
+
+
+def start_trace(name, sample_rate=None, **attributes):
+    """Starts a sampled trace for the current request (context); returns it, or None if not sampled.
+    Tasks and executor threads started from this context record their spans into it."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    trace = Trace(name, attributes) if rate > 0 and random.random() < rate else None
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace, **attributes):
+    _current_trace.set(None)
+    if trace is None:
+        return
+    trace.attributes.update(attributes)
+    data = trace.to_dict()
+    _recent_traces.append(data)
+    print(f"[TRACE] {json.dumps(data, default=str)}")
+
+
+def annotate(**attributes):
+    """Adds attributes (doc counts, token counts, ...) to the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def recent_traces():
+    return list(_recent_traces)
+
+
+def record_stage(name, start, end, **attributes):
+    """Records a stage that was timed elsewhere (e.g. by an LLM callback)."""
+    STAGE_SECONDS.observe(end - start, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, end, **attributes)
+
+
+@contextmanager
+def stage(name):
+    """Times one pipeline stage into the histogram, the in-flight gauge and the current trace."""
+    STAGE_IN_FLIGHT.inc(stage=name)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_IN_FLIGHT.dec(stage=name)
+        record_stage(name, start, time.perf_counter())
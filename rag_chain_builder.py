@@ -1,42 +1,383 @@
 import os
+import re
+import time
+import asyncio
+import numpy as np
+import metrics
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_nvidia import ChatNVIDIA
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains.combine_documents import create_stuff_documents_chain
+from vector_store import load_store
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder  # <-- 1. IMPORT ADDED
-from langchain.chains import create_retrieval_chain
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain.chains import create_history_aware_retriever
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableGenerator, RunnableLambda, RunnablePassthrough
+from embedding_cache import load_embeddings
+from retrieval import CampusRetriever, TTLCache
+from bm25_index import BM25Index
+from faiss_index import apply_search_params
+from context_budget import ContextBudgeter, estimate_tokens
+from metadata_index import MetadataIndex
+from answer_cache import SemanticAnswerCache
 
 load_dotenv()
 DB_FAISS_PATH = "vectorstore/db_faiss"
 NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
 
+# Query-time retrieval cache (question -> chunk IDs, query -> embedding)
+RETRIEVAL_CACHE_ENABLED = os.getenv("CAMPUSPAL_RETRIEVAL_CACHE", "1") == "1"
+RETRIEVAL_CACHE_SIZE = int(os.getenv("CAMPUSPAL_RETRIEVAL_CACHE_SIZE", "2048"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("CAMPUSPAL_RETRIEVAL_CACHE_TTL", "3600"))
 
-def build_chain():
-    """Builds and returns the RAG chain exactly like in chatbot.py."""
+# Query-time knobs for IVF (nprobe) / HNSW (efSearch) indexes built with ingest.py --index-type
+FAISS_NPROBE = int(os.getenv("CAMPUSPAL_FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("CAMPUSPAL_FAISS_EF_SEARCH", "64"))
+
+# "hybrid" fuses BM25 and FAISS hits (needs vectorstore/bm25 from ingest.py), "dense" is FAISS only
+RETRIEVAL_MODE = os.getenv("CAMPUSPAL_RETRIEVAL_MODE", "hybrid")
+
+# Pick department / doc type / year filters from the question when the request sets none
+AUTO_FILTER = os.getenv("CAMPUSPAL_AUTO_FILTER", "1") == "1"
+
+# Optional cross-encoder rerank: score the top RERANK_CANDIDATES hits, keep the best RETRIEVAL_K
+RERANK_ENABLED = os.getenv("CAMPUSPAL_RERANK", "0") == "1"
+RERANK_MODEL = os.getenv("CAMPUSPAL_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("CAMPUSPAL_RERANK_CANDIDATES", "30"))
+RERANK_BUDGET_MS = float(os.getenv("CAMPUSPAL_RERANK_BUDGET_MS", "250"))
+RETRIEVAL_K = int(os.getenv("CAMPUSPAL_RETRIEVAL_K", "3"))
+
+# Prompt context assembly: merge overlapping chunks, drop near-duplicates, cap estimated tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CAMPUSPAL_CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CAMPUSPAL_CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+
+# Semantic answer cache: a standalone question this similar to an earlier one gets its answer back
+ANSWER_CACHE_ENABLED = os.getenv("CAMPUSPAL_ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("CAMPUSPAL_ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.getenv("CAMPUSPAL_ANSWER_CACHE_SIZE", "5000"))
+ANSWER_CACHE_TTL = float(os.getenv("CAMPUSPAL_ANSWER_CACHE_TTL", "86400"))
+
+# When to skip the LLM question rewrite: "always_rewrite", "heuristic" or "embedding"
+REWRITE_MODE = os.getenv("CAMPUSPAL_REWRITE_MODE", "heuristic")
+REWRITE_SIMILARITY_THRESHOLD = float(os.getenv("CAMPUSPAL_REWRITE_SIMILARITY", "0.6"))
+MIN_STANDALONE_WORDS = 4
+
+# Offline stand-in for ChatNVIDIA (benchmarks / load tests); see benchmarks/fake_llm.py
+FAKE_LLM = os.getenv("CAMPUSPAL_FAKE_LLM", "0") == "1"
+
+# Retrieval run once at startup so the embedder, FAISS pages and BM25 postings are warm
+WARMUP_QUERY = os.getenv("CAMPUSPAL_WARMUP_QUERY", "What undergraduate courses does APSIT offer?")
+
+# Threads for CPU-bound work (query embedding, FAISS search) on the async path
+RETRIEVAL_WORKERS = int(os.getenv("CAMPUSPAL_RETRIEVAL_WORKERS", "4"))
+
+# Cross-request micro-batching: concurrent queries share one embedding pass and one FAISS search.
+# A batch is held open up to MICRO_BATCH_WAIT_MS (only under load) or until MICRO_BATCH_MAX queries
+MICRO_BATCH_ENABLED = os.getenv("CAMPUSPAL_MICRO_BATCH", "1") == "1"
+MICRO_BATCH_WAIT_MS = float(os.getenv("CAMPUSPAL_MICRO_BATCH_WAIT_MS", "5"))
+MICRO_BATCH_MAX = int(os.getenv("CAMPUSPAL_MICRO_BATCH_MAX", "32"))
+
+# Pronouns / ellipsis that usually point back into the chat history
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|they|them|their|this|that|these|those|he|she|him|her|his|same|above|"
+    r"previous|former|latter|else|mentioned)\b|^(and|or|but|also|what about|how about|then)\b",
+    re.IGNORECASE,
+)
+
+
+class QuestionContextualizer:
+    """Decides per request whether the history-aware LLM rewrite is needed.
+
+    The rewrite is skipped when there is no chat history, or when the question
+    looks self-contained (no follow-up cues and long enough). In "embedding"
+    mode a self-contained-looking question must also be dissimilar to the
+    previous user turn before the rewrite is skipped.
+    """
+
+    def __init__(self, rewrite_chain, embed=None, mode=REWRITE_MODE,
+                 threshold=REWRITE_SIMILARITY_THRESHOLD, executor=None):
+        self.rewrite_chain = rewrite_chain
+        self.embed = embed
+        self.executor = executor
+        self.mode = mode
+        self.threshold = threshold
+        self.rewrites = 0
+        self.skips = 0
+
+    def skip_reason(self, question, chat_history):
+        """Returns why the rewrite can be skipped, or None if it must run."""
+        if not chat_history:
+            return "no_history"
+        if self.mode == "always_rewrite":
+            return None
+        if len(question.split()) < MIN_STANDALONE_WORDS or FOLLOW_UP_PATTERN.search(question.strip()):
+            return None
+        if self.mode != "embedding" or self.embed is None:
+            return "self_contained"
+        previous = next((m.content for m in reversed(chat_history) if isinstance(m, HumanMessage)), None)
+        if previous is None:
+            return "self_contained"
+        a, b = np.asarray(self.embed(question)), np.asarray(self.embed(previous))
+        similarity = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) or 1.0))
+        return "topic_change" if similarity < self.threshold else None
+
+    def _result(self, inputs, question, reason):
+        if reason is None:
+            self.rewrites += 1
+        else:
+            self.skips += 1
+        # Recorded on the request's trace, so /chat and /chat/stream both carry the decision
+        metrics.annotate(rewrite_ran=reason is None, rewrite_skip_reason=reason)
+        return {**inputs, "standalone_question": question, "rewrite_ran": reason is None,
+                "rewrite_skip_reason": reason}
+
+    def invoke(self, inputs):
+        with metrics.stage("rewrite"):
+            reason = self.skip_reason(inputs["input"], inputs.get("chat_history"))
+            question = inputs["input"] if reason else self.rewrite_chain.invoke(inputs)
+        return self._result(inputs, question, reason)
+
+    async def ainvoke(self, inputs):
+        args = (inputs["input"], inputs.get("chat_history"))
+        with metrics.stage("rewrite"):
+            if self.mode == "embedding" and self.embed is not None:
+                # skip_reason may embed text in this mode, so keep it off the event loop
+                reason = await asyncio.get_running_loop().run_in_executor(self.executor, self.skip_reason, *args)
+            else:
+                reason = self.skip_reason(*args)
+            question = inputs["input"] if reason else await self.rewrite_chain.ainvoke(inputs)
+        return self._result(inputs, question, reason)
+
+    def metric_samples(self):
+        return [
+            ("campuspal_rewrites_total", "counter", "Questions rewritten by the LLM / passed through.",
+             {"outcome": "rewritten"}, self.rewrites),
+            ("campuspal_rewrites_total", "counter", "Questions rewritten by the LLM / passed through.",
+             {"outcome": "skipped"}, self.skips),
+        ]
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Times LLM calls as pipeline stage `stage` and records time-to-first-token and token counts.
+
+    Token counts come from the provider's usage report when it sends one, else
+    from estimate_tokens() on the prompt / completion text.
+    """
+
+    run_inline = True  # Cheap; run on the event loop so the request's trace context is visible
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._runs = {}  # run_id -> [start, first_token_at, estimated prompt tokens]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for batch in messages for m in batch)
+        self._runs[run_id] = [time.perf_counter(), None, prompt_tokens]
+        metrics.STAGE_IN_FLIGHT.inc(stage=self.stage)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run[1] is None:
+            run[1] = time.perf_counter()
+            metrics.TIME_TO_FIRST_TOKEN.observe(run[1] - run[0], stage=self.stage)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        end = time.perf_counter()
+        metrics.STAGE_IN_FLIGHT.dec(stage=self.stage)
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        prompt_tokens = usage.get("prompt_tokens") or usage_metadata.get("input_tokens") or run[2]
+        completion_tokens = (usage.get("completion_tokens") or usage_metadata.get("output_tokens")
+                             or estimate_tokens(generation.text if generation else ""))
+        metrics.LLM_TOKENS.observe(prompt_tokens, stage=self.stage, kind="prompt")
+        metrics.LLM_TOKENS.observe(completion_tokens, stage=self.stage, kind="completion")
+        attributes = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        if run[1] is not None:
+            attributes["time_to_first_token_ms"] = round((run[1] - run[0]) * 1000, 2)
+        metrics.record_stage(self.stage, run[0], end, **attributes)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if self._runs.pop(run_id, None) is not None:
+            metrics.STAGE_IN_FLIGHT.dec(stage=self.stage)
+            metrics.STAGE_ERRORS.inc(stage=self.stage)
+
+
+def load_vector_store(embeddings):
+    # Pickle-free memory-mapped store when ingest wrote one (--store-format mmap)
+    db = load_store(DB_FAISS_PATH, embeddings)
+    apply_search_params(db.index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+    return db
+
+
+@contextmanager
+def _phase(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def load_llm():
+    """ChatNVIDIA, or the offline stand-in from benchmarks/fake_llm.py with CAMPUSPAL_FAKE_LLM=1."""
+    if FAKE_LLM:
+        from benchmarks.fake_llm import FakeChatModel
+
+        return FakeChatModel.from_env()
     if not NVIDIA_API_KEY:
         raise ValueError("NVIDIA_API_KEY not found in .env")
+    from langchain_nvidia import ChatNVIDIA
 
-    #Initialize LLM
-    llm = ChatNVIDIA(
+    return ChatNVIDIA(
         model="nvidia/nemotron-mini-4b-instruct",
         api_key=NVIDIA_API_KEY,
         temperature=0.3
     )
 
-    #Embeddings & Retriever
-    embeddings = HuggingFaceEmbeddings(
-        model_name='sentence-transformers/all-MiniLM-L6-v2',
-        model_kwargs={'device': 'cpu'}
-    )
 
+def build_retriever(enable_cache=None, retrieval_workers=RETRIEVAL_WORKERS, retrieval_mode=RETRIEVAL_MODE,
+                    rerank=None, k=RETRIEVAL_K, timings=None, micro_batch=None):
+    """Builds the CampusRetriever used by build_chain (also used directly by benchmarks/)."""
+    timings = {} if timings is None else timings
+    if enable_cache is None:
+        enable_cache = RETRIEVAL_CACHE_ENABLED
+    if rerank is None:
+        rerank = RERANK_ENABLED
+    if micro_batch is None:
+        micro_batch = MICRO_BATCH_ENABLED
     if not os.path.exists(DB_FAISS_PATH):
         raise FileNotFoundError("FAISS database not found. Run ingest.py first.")
 
-    db = FAISS.load_local(DB_FAISS_PATH, embeddings, allow_dangerous_deserialization=True)
-    retriever = db.as_retriever(search_type="similarity", search_kwargs={'k': 3})
+    #Embeddings & Retriever (reads the cache written by ingest.py, never writes it)
+    with _phase(timings, "embeddings"):
+        embeddings = load_embeddings(read_only=True)
+
+    with _phase(timings, "vector_store"):
+        store = load_vector_store(embeddings)
+
+    with _phase(timings, "sparse_index"):
+        sparse_index = None
+        if retrieval_mode == "hybrid":
+            sparse_index = BM25Index.load()
+            if sparse_index is None:
+                print("[WARN] BM25 index not found (re-run ingest.py) - using dense retrieval only.")
+
+    with _phase(timings, "reranker"):
+        reranker = None
+        if rerank:
+            from reranker import CrossEncoderReranker
+
+            reranker = CrossEncoderReranker(
+                RERANK_MODEL,
+                time_budget_ms=RERANK_BUDGET_MS,
+                score_cache=TTLCache(RETRIEVAL_CACHE_SIZE * 16, RETRIEVAL_CACHE_TTL),
+            )
+
+    with _phase(timings, "metadata_index"):
+        metadata = MetadataIndex.load(DB_FAISS_PATH)
+        if metadata is None:
+            print("[WARN] Metadata index not found (re-run ingest.py) - filtered retrieval disabled.")
+
+    if micro_batch:
+        # Callers mostly wait on their batch, so a batch can only be as large as the thread count
+        retrieval_workers = max(retrieval_workers, MICRO_BATCH_MAX)
+    executor = ThreadPoolExecutor(max_workers=max(1, retrieval_workers), thread_name_prefix="retrieval")
+    retriever = CampusRetriever(
+        store=store,
+        k=k,
+        db_path=DB_FAISS_PATH,
+        store_loader=lambda: load_vector_store(embeddings),
+        sparse_index=sparse_index,
+        # Hybrid mode keeps a loader even if BM25 was missing at startup, so the next ingest enables it
+        sparse_loader=BM25Index.load if retrieval_mode == "hybrid" else None,
+        result_cache=TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL) if enable_cache else None,
+        embedding_cache=TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL) if enable_cache else None,
+        executor=executor,
+        reranker=reranker,
+        rerank_candidates=RERANK_CANDIDATES,
+        metadata_index=metadata,
+        metadata_loader=lambda: MetadataIndex.load(DB_FAISS_PATH),
+        auto_filter=AUTO_FILTER,
+        micro_batch=micro_batch,
+        batch_max_size=MICRO_BATCH_MAX,
+        batch_wait_ms=MICRO_BATCH_WAIT_MS,
+    )
+    return retriever
+
+
+def with_answer_cache(answer_chain, cache, executor=None):
+    """Answers from `cache` when a near-duplicate standalone question was answered before;
+    otherwise runs answer_chain and stores what it produced. Streaming passes through."""
+    def store(state):
+        if state.get("answer") and state.get("context") is not None:
+            cache.put(state["standalone_question"], state.get("filters"), state["answer"], state["context"])
+
+    def accumulate(state, chunk):
+        for key, value in chunk.items():
+            state[key] = state.get(key, "") + value if key == "answer" else value
+
+    def remember(chunks):
+        state = {}
+        for chunk in chunks:
+            accumulate(state, chunk)
+            yield chunk
+        store(state)
+
+    async def aremember(chunks):
+        state = {}
+        async for chunk in chunks:
+            accumulate(state, chunk)
+            yield chunk
+        # put() embeds the question; keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(executor, store, state)
+
+    compute = answer_chain | RunnableGenerator(remember, aremember)
+
+    def route(x):
+        with metrics.stage("answer_cache"):
+            hit = cache.lookup(x["standalone_question"], x.get("filters"))
+        metrics.annotate(answer_cache_hit=hit is not None)
+        if hit is None:
+            return compute
+        answer, documents = hit
+        return RunnableLambda(lambda y: {**y, "context": documents, "answer": answer, "answer_cached": True})
+
+    return RunnableLambda(route).with_config(run_name="answer_cache")
+
+
+def build_chain(enable_cache=None, retrieval_workers=RETRIEVAL_WORKERS, retrieval_mode=RETRIEVAL_MODE,
+                rerank=None, warmup=False, timings=None, llm=None, answer_cache=None, micro_batch=None):
+    """Builds and returns the RAG chain used by backend.py and chatbot.py.
+
+    enable_cache: wrap retrieval in LRU/TTL caches (defaults to CAMPUSPAL_RETRIEVAL_CACHE).
+    retrieval_workers: size of the executor used by ainvoke/astream for embedding + search.
+    retrieval_mode: "hybrid" (BM25 + FAISS, reciprocal rank fusion) or "dense".
+    rerank: rescore the top candidates with a cross-encoder (defaults to CAMPUSPAL_RERANK).
+    warmup: run WARMUP_QUERY through retrieval before returning.
+    timings: optional dict filled with per-phase load times in ms.
+    llm: chat model to use instead of load_llm() (e.g. benchmarks.fake_llm.FakeChatModel).
+    answer_cache: serve near-duplicate questions from the semantic answer cache
+        (defaults to CAMPUSPAL_ANSWER_CACHE).
+    micro_batch: batch query embeddings / FAISS searches across concurrent requests
+        (defaults to CAMPUSPAL_MICRO_BATCH).
+    """
+    timings = {} if timings is None else timings
+    if answer_cache is None:
+        answer_cache = ANSWER_CACHE_ENABLED
+
+    #Initialize LLM (heavy imports deferred until a chain is actually built)
+    with _phase(timings, "llm"):
+        from langchain.chains.combine_documents import create_stuff_documents_chain
+
+        llm = llm or load_llm()
+
+    retriever = build_retriever(enable_cache, retrieval_workers, retrieval_mode, rerank, timings=timings,
+                                micro_batch=micro_batch)
+    executor = retriever.executor
 
     #Contextualization
     contextualize_q_prompt = ChatPromptTemplate.from_messages([
@@ -46,7 +387,12 @@ def build_chain():
         ("human", "Input: {input}"),
         ("human", "Standalone question:")
     ])
-    history_aware_retriever = create_history_aware_retriever(llm, retriever, contextualize_q_prompt)
+    rewrite_llm = llm.with_config(callbacks=[LLMMetricsCallback("rewrite_llm")])
+    contextualizer = QuestionContextualizer(
+        contextualize_q_prompt | rewrite_llm | StrOutputParser(),
+        embed=retriever.embed_query,
+        executor=executor,
+    )
 
     #Prompt 
     qa_prompt = ChatPromptTemplate.from_template("""
@@ -61,7 +407,42 @@ def build_chain():
     Answer:
     """)
 
-    question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+    question_answer_chain = create_stuff_documents_chain(
+        llm.with_config(callbacks=[LLMMetricsCallback("generate")]), qa_prompt)
+    # Same output keys as create_retrieval_chain, plus standalone_question / rewrite_ran
+    budgeter = ContextBudgeter(CONTEXT_TOKEN_BUDGET, CONTEXT_DUPLICATE_THRESHOLD)
+    # Optional request "filters" ({"department": ..., "doc_type": ..., "year": ...}) reach the retriever
+    def retrieve_documents(x, config):
+        with metrics.stage("retrieve"):
+            return retriever.invoke(x["standalone_question"], config, filters=x.get("filters"))
+
+    async def aretrieve_documents(x, config):
+        with metrics.stage("retrieve"):
+            return await retriever.ainvoke(x["standalone_question"], config, filters=x.get("filters"))
+
+    retrieve = RunnableLambda(retrieve_documents, afunc=aretrieve_documents) | RunnableLambda(budgeter)
+    answer_chain = (
+        RunnablePassthrough.assign(context=retrieve.with_config(run_name="retrieve_documents"))
+        | RunnablePassthrough.assign(answer=question_answer_chain)
+    )
+    if answer_cache:
+        with _phase(timings, "answer_cache"):
+            cache = SemanticAnswerCache(retriever.embed_query, DB_FAISS_PATH, ANSWER_CACHE_THRESHOLD,
+                                        ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, auto_filter=retriever.auto_filter)
+        answer_chain = with_answer_cache(answer_chain, cache, executor)
+        metrics.REGISTRY.register_collector("answer_cache", lambda: [
+            ("campuspal_answer_cache_hits_total", "counter", "Answers served from the semantic cache.", {},
+             cache.hits),
+            ("campuspal_answer_cache_misses_total", "counter", "Questions the semantic cache could not answer.", {},
+             cache.misses),
+            ("campuspal_answer_cache_entries", "gauge", "Answers held in the semantic cache.", {}, len(cache)),
+        ])
+    rag_chain = RunnableLambda(contextualizer.invoke, afunc=contextualizer.ainvoke) | answer_chain
+    metrics.REGISTRY.register_collector("retrieval_caches", retriever.metric_samples)
+    metrics.REGISTRY.register_collector("rewrites", contextualizer.metric_samples)
+    if warmup:
+        # First query pays for model graph setup and page faults; do it before taking traffic
+        with _phase(timings, "warmup"):
+            retriever.retrieve(WARMUP_QUERY)
     print("RAG Chain initialized successfully.")
     return rag_chain
\ No newline at end of file
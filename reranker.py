@@ -0,0 +1,84 @@
+"""Cross-encoder reranking of retrieved chunks (optional second retrieval stage).
+
+CampusRetriever takes a wide candidate set from FAISS / BM25 and the reranker
+scores every (question, chunk) pair with a small local cross-encoder, so only
+the best few chunks are stuffed into the LLM prompt.
+
+- All uncached pairs of a request are scored in one batched forward pass
+  (split into `batch_size` pairs if the candidate set is larger).
+- Scores are cached per (normalized question, chunk ID); chunk IDs change
+  whenever a file's content changes, so cached scores never go stale.
+- `time_budget_ms` bounds the scoring time. The measured per-pair cost of
+  earlier requests caps how many uncached pairs are sent, and no further
+  batch starts once the budget is spent. Candidates left unscored keep
+  their first-stage order behind the scored ones.
+"""
+import time
+
+from retrieval import TTLCache, normalize_query
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_BATCH_SIZE = 32
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name=RERANK_MODEL, batch_size=RERANK_BATCH_SIZE, time_budget_ms=None,
+                 score_cache=None, max_length=512):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self.batch_size = batch_size
+        self.time_budget_ms = time_budget_ms
+        self.score_cache = score_cache if score_cache is not None else TTLCache(max_size=20000, ttl=3600.0)
+        self.stats = {"requests": 0, "pairs_scored": 0, "budget_exceeded": 0}
+        self._seconds_per_pair = None  # Moving average of observed scoring cost
+
+    def _pair_limit(self):
+        if self.time_budget_ms is None or not self._seconds_per_pair:
+            return None
+        return max(1, int(self.time_budget_ms / 1000 / self._seconds_per_pair))
+
+    def score(self, query, candidates):
+        """Scores [(chunk_id, text)] against `query`. Returns {chunk_id: score} for the
+        candidates that were scored (or cached) within the time budget."""
+        key = normalize_query(query)
+        scores, pending = {}, []
+        for chunk_id, text in candidates:
+            cached = self.score_cache.get((key, chunk_id))
+            if cached is None:
+                pending.append((chunk_id, text))
+            else:
+                scores[chunk_id] = cached
+
+        limit = self._pair_limit()
+        if limit is not None and len(pending) > limit:
+            self.stats["budget_exceeded"] += 1
+            pending = pending[:limit]
+
+        start = time.perf_counter()
+        for offset in range(0, len(pending), self.batch_size):
+            if self.time_budget_ms is not None and offset and \
+                    (time.perf_counter() - start) * 1000 > self.time_budget_ms:
+                self.stats["budget_exceeded"] += 1
+                break
+            batch = pending[offset:offset + self.batch_size]
+            batch_start = time.perf_counter()
+            batch_scores = self.model.predict([(query, text) for _, text in batch], batch_size=len(batch),
+                                              show_progress_bar=False)
+            per_pair = (time.perf_counter() - batch_start) / len(batch)
+            self._seconds_per_pair = per_pair if self._seconds_per_pair is None \
+                else 0.8 * self._seconds_per_pair + 0.2 * per_pair
+            self.stats["pairs_scored"] += len(batch)
+            for (chunk_id, _), value in zip(batch, batch_scores):
+                scores[chunk_id] = float(value)
+                self.score_cache.put((key, chunk_id), float(value))
+        return scores
+
+    def rerank(self, query, candidates, top_k):
+        """Returns the IDs of the best `top_k` of [(chunk_id, text)] (given in first-stage order)."""
+        self.stats["requests"] += 1
+        scores = self.score(query, candidates)
+        scored = sorted((chunk_id for chunk_id, _ in candidates if chunk_id in scores),
+                        key=lambda chunk_id: scores[chunk_id], reverse=True)
+        unscored = [chunk_id for chunk_id, _ in candidates if chunk_id not in scores]
+        return (scored + unscored)[:top_k]
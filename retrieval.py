@@ -0,0 +1,310 @@
+"""Retriever used by the /chat path: dense or hybrid (BM25 + FAISS) search with query-level caching.
+
+In hybrid mode the top `fetch_k` dense and sparse hits are fused with
+reciprocal rank fusion and the best `k` are returned. With a reranker
+(reranker.py), the best `rerank_candidates` first-stage hits are rescored by
+a cross-encoder and only its top `k` are returned.
+
+Searches can be filtered by department / doc type / year (metadata_index.py).
+The allowed chunk positions are passed to FAISS as an ID selector and mask
+the BM25 scores, so filtering happens inside the scan, not on its results.
+With `auto_filter`, filters are picked from the question by a keyword
+classifier; if those leave fewer than `k` hits the search is rerun unfiltered.
+
+Two bounded LRU/TTL caches sit in front of the FAISS store:
+  - normalized standalone question -> retrieved chunk IDs
+  - raw query string -> query embedding
+Both are cleared automatically when the store on disk changes
+(e.g. after `python ingest.py --incremental`), and the store is reloaded.
+
+With `micro_batch`, query embeddings and unfiltered FAISS searches from
+concurrent requests are grouped into one batched call each (batching.py).
+"""
+import os
+import re
+import time
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from pydantic import ConfigDict
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from bm25_index import reciprocal_rank_fusion
+from faiss_index import selector_params
+from metadata_index import classify_query, filter_key
+from batching import MicroBatcher
+from vector_store import COMMIT_FILE
+import metrics
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_size=1024, ttl=3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def normalize_query(query):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!. ")
+
+
+def index_signature(db_path):
+    """(mtime, size) of the store's commit file (vector_store.py), replaced last by every ingest
+    once all the index files it points to are written."""
+    try:
+        stat = os.stat(os.path.join(db_path, COMMIT_FILE))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CampusRetriever(BaseRetriever):
+    """Similarity (or hybrid) search over the CampusPal FAISS store with optional caching."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: Any
+    k: int = 3
+    db_path: Optional[str] = None
+    store_loader: Optional[Callable[[], Any]] = None
+    sparse_index: Any = None  # bm25_index.BM25Index; None means dense-only search
+    sparse_loader: Optional[Callable[[], Any]] = None
+    fetch_k: int = 20  # Candidates taken from each of dense/sparse before fusion
+    result_cache: Optional[TTLCache] = None
+    embedding_cache: Optional[TTLCache] = None
+    check_interval: float = 5.0  # Seconds between index-file checks
+    executor: Optional[Executor] = None  # Runs embedding + FAISS search off the event loop
+    reranker: Any = None  # reranker.CrossEncoderReranker; None returns first-stage order
+    rerank_candidates: int = 30  # First-stage hits handed to the reranker
+    metadata_index: Any = None  # metadata_index.MetadataIndex; None disables filtering
+    metadata_loader: Optional[Callable[[], Any]] = None
+    auto_filter: bool = False  # Pick filters from the question when none are given
+    micro_batch: bool = False  # Batch query embeddings / unfiltered searches across concurrent requests
+    batch_max_size: int = 32
+    batch_wait_ms: float = 5.0
+
+    _signature: Any = None
+    _last_check: float = 0.0
+    _reload_lock: Any = None
+    _embed_batcher: Any = None
+    _search_batcher: Any = None
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        self._reload_lock = threading.Lock()
+        self._last_check = time.monotonic()
+        if self.db_path:
+            self._signature = index_signature(self.db_path)
+        if self.micro_batch:
+            self._embed_batcher = MicroBatcher(self._embed_batch, self.batch_max_size, self.batch_wait_ms, "embed")
+            self._search_batcher = MicroBatcher(self._search_batch, self.batch_max_size, self.batch_wait_ms,
+                                                "search")
+
+    def _check_index(self):
+        """Reloads the store and drops cached results if the index on disk changed."""
+        if not self.db_path or time.monotonic() - self._last_check < self.check_interval:
+            return
+        with self._reload_lock:
+            self._last_check = time.monotonic()
+            signature = index_signature(self.db_path)
+            if signature == self._signature:
+                return
+            print("[INFO] FAISS index changed on disk - reloading and clearing retrieval caches.")
+            if self.store_loader:
+                self.store = self.store_loader()
+            if self.sparse_loader:
+                self.sparse_index = self.sparse_loader()
+            if self.metadata_loader:
+                self.metadata_index = self.metadata_loader()
+            for cache in (self.result_cache, self.embedding_cache):
+                if cache is not None:
+                    cache.clear()
+            self._signature = signature
+
+    def embed_query(self, query):
+        if self.embedding_cache is not None:
+            vector = self.embedding_cache.get(query)
+            if vector is not None:
+                return vector
+        with metrics.stage("embed_query"):
+            if self._embed_batcher is not None:
+                vector = self._embed_batcher(query)
+            else:
+                vector = np.asarray(self.store.embedding_function.embed_query(query), dtype=np.float32)
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(query, vector)
+        return vector
+
+    def _embed_batch(self, queries):
+        """One forward pass for the queries of concurrent requests (embed_documents embeds
+        the same way as embed_query for MiniLM); repeated queries are embedded once."""
+        unique = list(dict.fromkeys(queries))
+        vectors = np.asarray(self.store.embedding_function.embed_documents(unique), dtype=np.float32)
+        rows = {query: vector for query, vector in zip(unique, vectors)}
+        return [rows[query] for query in queries]
+
+    def _search_batch(self, requests):
+        """One index.search over the stacked query vectors; each caller gets the IDs of its top k."""
+        store = self.store  # Row positions only mean something in the index that produced them
+        k = max(request_k for _, request_k in requests)
+        matrix = np.ascontiguousarray(np.vstack([vector.reshape(1, -1) for vector, _ in requests]),
+                                      dtype=np.float32)
+        _, indices = store.index.search(matrix, k)
+        return [[store.index_to_docstore_id[i] for i in row[:request_k] if i != -1]
+                for row, (_, request_k) in zip(indices, requests)]
+
+    def _search_ids(self, vector, k, allowed=None):
+        with metrics.stage("dense_search"):
+            if allowed is None and self._search_batcher is not None:
+                return self._search_batcher((vector, k))
+            # One snapshot for search and ID mapping: _check_index may swap the store in between
+            store = self.store
+            # Filtered searches carry their own ID selector, so they can't share a batch
+            params = selector_params(store.index, allowed) if allowed is not None else None
+            row = store.index.search(vector.reshape(1, -1), k, params=params)[1][0]
+        return [store.index_to_docstore_id[i] for i in row if i != -1]
+
+    def _first_stage(self, query, k, allowed=None):
+        if self.sparse_index is None:
+            return self._search_ids(self.embed_query(query), k, allowed)
+        fetch_k = max(self.fetch_k, k)
+        dense = self._search_ids(self.embed_query(query), fetch_k, allowed)
+        with metrics.stage("sparse_search"):
+            sparse = [doc_id for doc_id, _ in self.sparse_index.search(query, fetch_k, allowed)]
+        return reciprocal_rank_fusion([dense, sparse], k)
+
+    def _search(self, query, allowed=None):
+        if allowed is not None and not len(allowed):
+            return []
+        if self.reranker is None:
+            return self._first_stage(query, self.k, allowed)
+        ids = self._first_stage(query, max(self.rerank_candidates, self.k), allowed)
+        candidates = [(doc_id, doc.page_content) for doc_id, doc in zip(ids, self._load_documents(ids))]
+        with metrics.stage("rerank"):
+            return self.reranker.rerank(query, candidates, self.k)
+
+    def _load_documents(self, ids):
+        docs = []
+        with metrics.stage("docstore"):
+            for doc_id in ids:
+                doc = self.store.docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    docs.append(doc)
+        return docs
+
+    def retrieve(self, query, filters=None):
+        """filters: {"department" | "doc_type" | "year": value or [values]}; None searches everything
+        (or, with auto_filter, whatever the question itself asks for)."""
+        self._check_index()
+        auto = filters is None and self.auto_filter
+        if auto:
+            filters = classify_query(query)
+        key = (normalize_query(query), filter_key(filters))
+        if self.result_cache is not None:
+            ids = self.result_cache.get(key)
+            if ids is not None:
+                metrics.annotate(retrieval_cache_hit=True, filters=filters)
+                return self._load_documents(ids)
+        allowed = None
+        if filters and self.metadata_index is not None:
+            allowed = self.metadata_index.positions(filters)
+        ids = self._search(query, allowed)
+        if auto and allowed is not None and len(ids) < self.k:
+            ids = self._search(query)
+        if self.result_cache is not None:
+            self.result_cache.put(key, ids)
+        metrics.annotate(retrieval_cache_hit=False, filters=filters)
+        return self._load_documents(ids)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, filters: Optional[dict] = None
+    ) -> List[Document]:
+        return self.retrieve(query, filters)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, filters: Optional[dict] = None
+    ) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        # Run in a copy of this context so stage timings land in the request's trace
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, context.run, self.retrieve, query, filters)
+
+    def close(self):
+        """Stops the micro-batch dispatcher threads and the executor; the retriever is unusable after this."""
+        for batcher in (self._embed_batcher, self._search_batcher):
+            if batcher is not None:
+                batcher.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    def cache_stats(self):
+        stats = {}
+        caches = [("results", self.result_cache), ("embeddings", self.embedding_cache)]
+        if self.reranker is not None:
+            caches.append(("rerank_scores", self.reranker.score_cache))
+        for name, cache in caches:
+            if cache is not None:
+                stats[name] = {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+        return stats
+
+    def metric_samples(self):
+        """Cache sizes / hits / misses as samples for metrics.REGISTRY.register_collector."""
+        samples = []
+        stats_by_cache = self.cache_stats()
+        disk_cache = getattr(self.store.embedding_function, "cache", None)  # embedding_cache.EmbeddingCache
+        if disk_cache is not None:
+            disk = disk_cache.stats()
+            stats_by_cache["embeddings_disk"] = {"size": disk["entries"], "hits": disk["hits"],
+                                                 "misses": disk["misses"]}
+        for name, stats in stats_by_cache.items():
+            labels = {"cache": name}
+            samples.append(("campuspal_cache_hits_total", "counter", "Retrieval cache hits.", labels, stats["hits"]))
+            samples.append(("campuspal_cache_misses_total", "counter", "Retrieval cache misses.", labels,
+                            stats["misses"]))
+            samples.append(("campuspal_cache_entries", "gauge", "Entries held in each retrieval cache.", labels,
+                            stats["size"]))
+        for batcher in (self._embed_batcher, self._search_batcher):
+            if batcher is not None:
+                samples.append(("campuspal_batches_total", "counter", "Micro-batched calls made.",
+                                {"batcher": batcher.name}, batcher.batches))
+        return samples
@@ -0,0 +1,198 @@
+"""Incremental same-domain crawl mode for the scraper.
+
+- Frontier: priority queue of normalized, de-duplicated URLs with depth and page limits.
+- CrawlState (crawl_state.json): every visited URL, its crawl depth, when it was
+  last crawled and which data files it produced. The next crawl queues those
+  URLs again, so a page no longer linked from anywhere is still revisited (and
+  its files removed if it is gone).
+- ChangeLog (changes.json): data files added / modified / removed since the last
+  ingest. Each run merges its changes into the log until
+  `python ingest.py --incremental --changes scraper/data/changes.json` reads it,
+  only looks at those files and marks the log consumed.
+"""
+import os
+import json
+import time
+import heapq
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+CRAWL_STATE_FILE = "crawl_state.json"
+CHANGE_LOG_FILE = "changes.json"
+
+# Links that are never HTML pages worth crawling
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js", ".zip", ".rar",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".mp4", ".mp3",
+)
+# Pages students ask about most get crawled first within a depth
+PRIORITY_KEYWORDS = ("admission", "fee", "syllabus", "faculty", "placement", "scholarship", "exam", "calendar")
+
+
+def normalize_url(url):
+    """Canonical form used for de-duplication: lowercase scheme/host, no fragment,
+    no default port, no trailing slash, tracking params dropped, query sorted."""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ))
+    return urlunparse((parsed.scheme.lower(), host, path, "", query, ""))
+
+
+def is_crawlable(url, allowed_host):
+    """Same-host http(s) pages and PDFs (scrape_page handles both; PDF links found on
+    pages are extracted with the page, so in practice only PDF seeds reach the frontier)."""
+    parsed = urlparse(url)
+    return (
+        parsed.scheme in ("http", "https")
+        and (parsed.hostname or "").lower() == allowed_host
+        and not parsed.path.lower().endswith(SKIP_EXTENSIONS)
+    )
+
+
+def url_priority(url):
+    path = urlparse(url).path.lower()
+    return 0 if any(keyword in path for keyword in PRIORITY_KEYWORDS) else 1
+
+
+class Frontier:
+    """(depth, priority)-ordered queue that only ever admits a normalized URL once."""
+
+    def __init__(self, allowed_host, max_depth):
+        self.allowed_host = allowed_host
+        self.max_depth = max_depth
+        self._heap = []
+        self._seen = set()
+        self._counter = 0
+
+    def push(self, url, depth):
+        url = normalize_url(url)
+        if depth > self.max_depth or url in self._seen or not is_crawlable(url, self.allowed_host):
+            return False
+        self._seen.add(url)
+        self._counter += 1
+        heapq.heappush(self._heap, (depth, url_priority(url), self._counter, url))
+        return True
+
+    def pop(self):
+        depth, _, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class CrawlState:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.pages = json.load(f)
+        except (OSError, ValueError):
+            self.pages = {}
+
+    def record(self, url, files):
+        with self._lock:
+            self.pages[url] = {"last_crawled": time.time(), "files": sorted(set(files))}
+
+    def set_depth(self, url, depth):
+        with self._lock:
+            if url in self.pages:
+                self.pages[url]["depth"] = depth
+
+    def known_pages(self):
+        """[(url, depth)] of every page visited before; pages only ever scraped as
+        targets count as seeds (depth 0)."""
+        with self._lock:
+            return [(url, page.get("depth", 0)) for url, page in self.pages.items()]
+
+    def forget(self, url):
+        with self._lock:
+            return self.pages.pop(url, None)
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.pages, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+
+class ChangeLog:
+    """Data files (names relative to the data dir) added, modified or removed in this run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.changes = {"added": set(), "modified": set(), "removed": set()}
+
+    def record(self, kind, file_name):
+        with self._lock:
+            for other in self.changes.values():
+                other.discard(file_name)
+            self.changes[kind].add(file_name)
+
+    def write(self, path):
+        """Merges this run's changes into the log at `path` (unless ingest has consumed it)
+        and writes it atomically, so scraping twice before an ingest loses nothing."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        merged = {kind: set() if previous.get("consumed") else set(previous.get(kind, [])) for kind in self.changes}
+        with self._lock:
+            for kind, names in self.changes.items():
+                for name in names:
+                    # Added by an earlier run and modified by this one: still new to the index
+                    if kind == "modified" and name in merged["added"]:
+                        continue
+                    for other in merged.values():
+                        other.discard(name)
+                    merged[kind].add(name)
+        payload = {"generated_at": time.time(), "sequence": previous.get("sequence", 0) + 1, "consumed": False}
+        payload.update({kind: sorted(names) for kind, names in merged.items()})
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp_path, path)
+        return payload
+
+
+def crawl(seeds, scrape_page, max_depth=3, max_pages=500, workers=8, state=None):
+    """Crawls from `seeds`, calling scrape_page(url) -> result dict with a
+    'page_links' list for every admitted URL. Returns the number of pages visited.
+    state: CrawlState whose known pages are queued again at the depth they were found at."""
+    allowed_host = (urlparse(seeds[0]).hostname or "").lower()
+    frontier = Frontier(allowed_host, max_depth)
+    for seed in seeds:
+        frontier.push(seed, 0)
+    if state is not None:
+        for url, depth in sorted(state.known_pages(), key=lambda page: page[1]):
+            frontier.push(url, depth)
+
+    visited = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        while frontier or in_flight:
+            while frontier and len(in_flight) < workers * 2 and visited + len(in_flight) < max_pages:
+                url, depth = frontier.pop()
+                in_flight[executor.submit(scrape_page, url)] = (url, depth)
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth = in_flight.pop(future)
+                visited += 1
+                result = future.result() or {}
+                if state is not None:
+                    state.set_depth(url, depth)
+                for link in result.get("page_links", []):
+                    frontier.push(link, depth + 1)
+    return visited
@@ -0,0 +1,193 @@
+"""Pooled, polite HTTP fetching for the scraper.
+
+- one requests.Session with a connection pool shared by all worker threads
+- per-host politeness limiter (minimum interval between request starts)
+- retries with exponential backoff on connection errors and 429/5xx
+- on-disk HTTP cache of ETag/Last-Modified + body, so already-scraped pages
+  are revalidated with conditional GETs (304) instead of full downloads;
+  streamed downloads (PDFs) keep only their validators
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+HTTP_CACHE_DIR = ".http_cache"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    content: bytes
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    not_modified: bool = False  # True when served from the cache after a 304
+
+    @property
+    def content_type(self):
+        return self.headers.get("Content-Type", "").lower()
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get("Content-Type", "")
+        if "charset=" in content_type:
+            return content_type.split("charset=")[-1].split(";")[0].strip() or "utf-8"
+        return "utf-8"
+
+
+class HostRateLimiter:
+    """Spaces out request starts to the same host by at least `interval` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).hostname
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HttpCache:
+    """url -> validators (ETag / Last-Modified) and the last body, stored on disk."""
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body")
+
+    def validators(self, url, need_body=True):
+        """Conditional request headers for url. need_body=False also returns them for entries
+        stored without a body (downloads, whose result lives elsewhere on disk)."""
+        entry = self._index.get(url)
+        if not entry or (need_body and not os.path.exists(self._body_path(url))):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url):
+        entry = self._index[url]
+        with open(self._body_path(url), "rb") as f:
+            return f.read(), entry.get("headers", {})
+
+    def store(self, url, response, body=True):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if body:
+            with open(self._body_path(url), "wb") as f:
+                f.write(response.content)
+        with self._lock:
+            self._index[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            }
+
+    def save(self):
+        with self._lock:
+            tmp_path = self._index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, indent=1)
+            os.replace(tmp_path, self._index_path)
+
+
+class Fetcher:
+    def __init__(self, headers, max_workers=8, per_host_interval=0.2, retries=3,
+                 backoff_factor=0.5, cache_dir=HTTP_CACHE_DIR):
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiter = HostRateLimiter(per_host_interval)
+        self.cache = HttpCache(cache_dir)
+        self.stats = {"requests": 0, "not_modified": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, url, timeout=20, use_cache=True, **kwargs):
+        """GET with politeness + retries. With use_cache, sends conditional headers and
+        returns the cached body on 304. Raises requests exceptions like requests.get."""
+        headers = self.cache.validators(url) if use_cache else {}
+        self.limiter.wait(url)
+        self._count("requests")
+        response = self.session.get(url, timeout=timeout, headers=headers, **kwargs)
+        if response.status_code == 304 and use_cache:
+            self._count("not_modified")
+            content, cached_headers = self.cache.load(url)
+            return FetchResult(url, 304, content, CaseInsensitiveDict(cached_headers), not_modified=True)
+        response.raise_for_status()
+        if use_cache:
+            self.cache.store(url, response)
+        return FetchResult(url, response.status_code, response.content, CaseInsensitiveDict(response.headers))
+
+    def download(self, url, dest_path, timeout=30, chunk_size=1 << 16, revalidate=False):
+        """Streams the body to dest_path instead of buffering it in memory.
+        Returns a FetchResult with empty content and the response headers.
+
+        With revalidate, sends the validators remembered by remember() and returns a
+        not_modified result without touching dest_path if the server answers 304."""
+        headers = self.cache.validators(url, need_body=False) if revalidate else {}
+        self.limiter.wait(url)
+        self._count("requests")
+        with self.session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+            if response.status_code == 304 and headers:
+                self._count("not_modified")
+                return FetchResult(url, 304, b"", CaseInsensitiveDict(response.headers), not_modified=True)
+            response.raise_for_status()
+            with open(dest_path, "wb") as f:
+                for block in response.iter_content(chunk_size=chunk_size):
+                    f.write(block)
+            return FetchResult(url, response.status_code, b"", CaseInsensitiveDict(response.headers))
+
+    def remember(self, result):
+        """Keeps a download's ETag/Last-Modified (not its body) for the next revalidation;
+        call it once the downloaded file has been processed successfully."""
+        self.cache.store(result.url, result, body=False)
+
+    def close(self):
+        self.cache.save()
+        self.session.close()
@@ -1,14 +1,28 @@
 import os
 import re
-import io
+import json
 import time
 import logging
+import argparse
+import tempfile
+import threading
 import requests
 import pandas as pd
 from tqdm import tqdm
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import pypdf
+from fetcher import Fetcher
+from scrape_manifest import ScrapeManifest, MANIFEST_FILE, content_hash
+from crawler import crawl, CrawlState, ChangeLog, CRAWL_STATE_FILE, CHANGE_LOG_FILE
+import pdf_extract
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"  # Much faster than html.parser on the larger pages
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 #specific URLs to scrape
 TARGET_URLS = [ 
@@ -55,9 +69,6 @@ TARGET_URLS = [
     "https://www.apsit.edu.in/anti-ragging-cell",
     "https://www.apsit.edu.in/alumni-association-details",
     "https://www.apsit.edu.in/RnD",
-    "https://www.apsit.edu.in/national-service-scheme",
-    "https://www.apsit.edu.in/vision-and-mission-t-p",
-    "https://www.apsit.edu.in/anti-ragging-cell",
     "https://www.apsit.edu.in/index.php/exalt-2019",
     "https://www.apsit.edu.in/index.php/counselling",
     "https://www.apsit.edu.in/index.php/student-council",
@@ -66,6 +77,7 @@ TARGET_URLS = [
 DATA_DIR = "data" 
 LOG_FILE = "scraper.log"
 BASE_URL = "https://www.apsit.edu.in/" # Needed for domain checking
+MAX_SPAN = 1000 # Cap on table colspan/rowspan, so a bogus value can't blow up a CSV
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -91,6 +103,22 @@ REQUEST_HEADERS = {
                   '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+#FETCH SETTINGS (overridable from the command line)
+MAX_WORKERS = 8            # Pages/PDFs fetched concurrently
+PER_HOST_INTERVAL = 0.2    # Be polite: min seconds between request starts to one host
+MAX_RETRIES = 3            # Retries with exponential backoff on errors / 429 / 5xx
+PDF_WORKERS = os.cpu_count() or 1  # Processes extracting PDF pages in parallel
+
+fetcher = None  # Shared Fetcher (pooled Session + HTTP cache), created in main
+pdf_pool = None  # Shared ProcessPoolExecutor for page extraction, created in main
+manifest = None  # ScrapeManifest of page hashes / PDF links / table hashes, loaded in main
+changes = ChangeLog()  # Data files added/modified/removed this run, written to changes.json
+crawl_state = None  # CrawlState of visited URLs and the files they produced, loaded in main
+
+# Several pages link the same PDF; only one worker should download it
+_claimed_pdfs = set()
+_claimed_pdfs_lock = threading.Lock()
+
 #HELPER FUNCTIONS
 
 def clean_filename(url):
@@ -118,150 +146,366 @@ def save_text(content, path):
     except Exception as e:
         logger.error(f"[SAVE FAIL] Failed to save text to {path}: {e}")
 
+def save_text_if_changed(content, path):
+    """Saves text only if it differs from the file on disk. Returns "added", "modified" or None."""
+    existed = os.path.exists(path)
+    if existed:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                if f.read() == content:
+                    return None
+        except OSError:
+            pass
+    save_text(content, path)
+    kind = "modified" if existed else "added"
+    changes.record(kind, os.path.basename(path))
+    return kind
+
+def file_digest(path):
+    """content_hash of a file's bytes, or None if it doesn't exist."""
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+def remove_pdf(pdf_url, pdf_save_path):
+    """Deletes the text (and page sidecar) of a PDF that no longer exists on the site."""
+    for path in (pdf_save_path, os.path.splitext(pdf_save_path)[0] + ".pages.json"):
+        if os.path.exists(path):
+            os.remove(path)
+    changes.record("removed", os.path.basename(pdf_save_path))
+    logger.info(f"[PDF GONE] {pdf_url} - removed {os.path.basename(pdf_save_path)}")
+
 def extract_pdf_text(pdf_url, pdf_name_cleaned):
-    """Download PDF, extract text, and save ONLY IF the file doesn't exist."""
+    """Download PDF, extract text and save it. An already-extracted PDF is revalidated with a
+    conditional GET (ETag / Last-Modified) and only re-extracted when the server reports a change."""
     pdf_save_path = os.path.join(DATA_DIR, f"{pdf_name_cleaned}.txt")
-    if os.path.exists(pdf_save_path):
-        logger.info(f"[PDF SKIP] Already extracted: {os.path.basename(pdf_save_path)}")
-        return
+    with _claimed_pdfs_lock:
+        if pdf_save_path in _claimed_pdfs:
+            return
+        _claimed_pdfs.add(pdf_save_path)
+    previous_digest = file_digest(pdf_save_path)
+    spool_fd, spool_path = tempfile.mkstemp(suffix=".pdf")
+    os.close(spool_fd)
     try:
         logger.info(f"[PDF START] Downloading: {pdf_url}")
-        time.sleep(0.5) # Be polite
-        response = requests.get(pdf_url, timeout=30, headers=REQUEST_HEADERS)
-        response.raise_for_status()
+        start = time.perf_counter()
+        # Stream to a spool file; pages are read from it memory-mapped
+        response = fetcher.download(pdf_url, spool_path, timeout=30, revalidate=previous_digest is not None)
+        download_seconds = time.perf_counter() - start
+        if response.not_modified:
+            logger.info(f"[PDF SKIP] Unchanged: {os.path.basename(pdf_save_path)}")
+            return
 
-        content_type = response.headers.get('Content-Type', '').lower()
+        content_type = response.content_type
         if 'application/pdf' not in content_type:
              logger.warning(f"[PDF WARN] URL did not return PDF content: {pdf_url} ({content_type})")
              return
 
-        pdf_file = io.BytesIO(response.content)
-        reader = pypdf.PdfReader(pdf_file)
-        text = ""
-        for page_num, page in enumerate(reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            except Exception as page_e:
-                logger.warning(f"[PDF WARN] Page {page_num+1} extraction failed for {pdf_url}: {page_e}")
-        save_text(text, pdf_save_path)
-        logger.info(f"[PDF OK] Extracted: {pdf_url} -> {os.path.basename(pdf_save_path)}")
+        start = time.perf_counter()
+        n_pages = write_pdf_pages(spool_path, pdf_save_path, pdf_url)
+        fetcher.remember(response)
+        if previous_digest is None:
+            changes.record("added", os.path.basename(pdf_save_path))
+        elif file_digest(pdf_save_path) != previous_digest:
+            changes.record("modified", os.path.basename(pdf_save_path))
+        extract_seconds = time.perf_counter() - start
+        size_mb = os.path.getsize(spool_path) / (1024 * 1024)
+        logger.info(f"[PDF OK] Extracted: {pdf_url} -> {os.path.basename(pdf_save_path)} "
+                    f"({n_pages} pages, {size_mb:.1f} MB, download {download_seconds:.2f}s, "
+                    f"extract {extract_seconds:.2f}s)")
     except pypdf.errors.PdfReadError as pdf_e:
          logger.error(f"[PDF FAIL] Corrupt or encrypted PDF {pdf_url}: {pdf_e}")
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code in (404, 410) and previous_digest is not None:
+            remove_pdf(pdf_url, pdf_save_path)
+        else:
+            logger.error(f"[PDF FAIL] HTTP error downloading {pdf_url}: {e}")
     except requests.exceptions.Timeout:
          logger.error(f"[PDF FAIL] Timeout downloading {pdf_url}")
     except requests.exceptions.RequestException as req_e:
         logger.error(f"[PDF FAIL] Network error downloading {pdf_url}: {req_e}")
     except Exception as e:
         logger.error(f"[PDF FAIL] General error processing {pdf_url}: {e}", exc_info=True)
+    finally:
+        os.remove(spool_path)
 
-def extract_tables(html_content, page_name):
-    """Save any HTML tables as CSVs if they don't exist."""
+def write_pdf_pages(spool_path, pdf_save_path, pdf_url):
+    """Writes page text to pdf_save_path as pages arrive, plus a `.pages.json` sidecar
+    of [page, start, end] character offsets that ingest.py uses as page metadata."""
+    pages_path = os.path.splitext(pdf_save_path)[0] + ".pages.json"
+    tmp_path = pdf_save_path + ".part"
+    offsets = []
+    position = 0
+    n_pages = 0
+    with open(tmp_path, "w", encoding="utf-8", errors="replace") as out:
+        for page_num, page_text, error in pdf_extract.iter_pages(spool_path, pdf_pool):
+            n_pages += 1
+            if error:
+                logger.warning(f"[PDF WARN] Page {page_num} extraction failed for {pdf_url}: {error}")
+            if not page_text:
+                continue
+            out.write(page_text + "\n")
+            offsets.append([page_num, position, position + len(page_text)])
+            position += len(page_text) + 1
+    os.replace(tmp_path, pdf_save_path)
+    with open(pages_path, "w", encoding="utf-8") as f:
+        json.dump(offsets, f)
+    return n_pages
+
+def table_rows(table):
+    """The <tr> rows of this table only (directly or via thead/tbody/tfoot, never a nested
+    table's), as (cells, is_header) in document order."""
+    rows = []
+    for child in table.find_all(["tr", "thead", "tbody", "tfoot"], recursive=False):
+        for tr in [child] if child.name == "tr" else child.find_all("tr", recursive=False):
+            cells = tr.find_all(["th", "td"], recursive=False)
+            is_header = child.name == "thead" or (bool(cells) and all(cell.name == "th" for cell in cells))
+            rows.append((cells, is_header))
+    return rows
+
+def _span(cell, attribute):
     try:
-        tables = pd.read_html(io.StringIO(html_content))
-        if not tables:
-             logger.debug(f"[TABLE INFO] No HTML tables found on page {page_name}")
-             return
+        return min(max(int(cell.get(attribute, 1)), 1), MAX_SPAN)
+    except (TypeError, ValueError):
+        return 1
 
-        for i, table in enumerate(tables):
-            if table.empty: continue
-            csv_path = os.path.join(DATA_DIR, f"{page_name}_table_{i}.csv")
-            if not os.path.exists(csv_path):
-                table.to_csv(csv_path, index=False)
-                logger.info(f"[TABLE OK] Saved: {os.path.basename(csv_path)}")
-            else:
-                 logger.info(f"[TABLE SKIP] Exists: {os.path.basename(csv_path)}")
-    except ValueError:
-        logger.debug(f"[TABLE INFO] No HTML tables found on page {page_name}")
-    except ImportError:
-         logger.error("[TABLE FAIL] `lxml` not installed? `pip install lxml` might be needed.")
-    except Exception as e:
-        logger.error(f"[TABLE FAIL] Failed parsing tables for {page_name}: {e}")
+def expand_spans(rows):
+    """Cell texts laid out on the table's grid: a colspan/rowspan cell's text is repeated
+    in every column/row it covers, so later cells keep their own columns."""
+    grid, carried = [], {}  # carried: column -> [text, rows still covered]
+    for cells in rows:
+        row, column, cells = [], 0, iter(cells)
+        while True:
+            if column in carried:
+                text, remaining = carried[column]
+                row.append(text)
+                if remaining > 1:
+                    carried[column][1] -= 1
+                else:
+                    del carried[column]
+                column += 1
+                continue
+            cell = next(cells, None)
+            if cell is None:
+                if any(later > column for later in carried):
+                    row.append("")
+                    column += 1
+                    continue
+                break
+            text = cell.get_text(" ", strip=True)
+            rowspan = _span(cell, "rowspan")
+            for _ in range(_span(cell, "colspan")):
+                if rowspan > 1:
+                    carried[column] = [text, rowspan - 1]
+                row.append(text)
+                column += 1
+        grid.append(row)
+    return grid
+
+def table_to_frame(table):
+    """Builds a DataFrame from a parsed <table> element. Leading header rows (<thead> or all
+    <th>) become the column names, joined per column when merged headers span several rows."""
+    rows = table_rows(table)
+    grid = expand_spans([cells for cells, _ in rows])
+    n_header = 0
+    while n_header < len(rows) - 1 and rows[n_header][1]:
+        n_header += 1
+    header_rows, body = grid[:n_header], [row for row in grid[n_header:] if any(row)]
+    if not body and not any(any(row) for row in header_rows):
+        return pd.DataFrame()
+    width = max(len(row) for row in header_rows + body)
+    body = [row + [""] * (width - len(row)) for row in body]
+    if not header_rows:
+        return pd.DataFrame(body)
+    header = []
+    for i in range(width):
+        labels = [row[i] for row in header_rows if i < len(row) and row[i]]
+        header.append(" ".join(dict.fromkeys(labels)) or f"Unnamed: {i}")
+    return pd.DataFrame(body, columns=header)
+
+def parse_page(html_content, url, base_url_for_domain_check):
+    """Parses the page once and pulls text, same-domain PDF/page links and tables out of the same tree."""
+    soup = BeautifulSoup(html_content, HTML_PARSER)
+
+    pdf_links, page_links = [], []
+    for link in soup.find_all("a", href=True):
+        link_url = urljoin(url, link["href"]).split("#")[0]
+        # Check domain using the passed base_url
+        if urlparse(link_url).hostname != urlparse(base_url_for_domain_check).hostname:
+            continue
+        if link_url.lower().endswith(".pdf"):
+            pdf_links.append(link_url)
+        else:
+            page_links.append(link_url)
+
+    tables = [table_to_frame(table) for table in soup.find_all("table")]
+
+    for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
+        tag.decompose()
+    text_content = soup.get_text(separator='\n', strip=True)
+    text_content = "\n".join([line for line in text_content.splitlines() if line.strip()])
+    return text_content, list(dict.fromkeys(pdf_links)), list(dict.fromkeys(page_links)), tables
+
+def save_tables(tables, page_name, previous_hashes):
+    """Writes table CSVs whose content changed (or whose file is missing). Returns {csv_name: hash}."""
+    table_hashes = {}
+    for i, table in enumerate(tables):
+        if table.empty: continue
+        csv_name = f"{page_name}_table_{i}.csv"
+        csv_path = os.path.join(DATA_DIR, csv_name)
+        csv_text = table.to_csv(index=False)
+        table_hashes[csv_name] = content_hash(csv_text)
+        if previous_hashes.get(csv_name) == table_hashes[csv_name] and os.path.exists(csv_path):
+            logger.info(f"[TABLE SKIP] Unchanged: {csv_name}")
+            continue
+        if save_text_if_changed(csv_text, csv_path):
+            logger.info(f"[TABLE OK] Saved: {csv_name}")
+    return table_hashes
+
+def remove_page(url, page_name):
+    """Deletes the text and table files of a page that no longer exists on the site.
+    Linked PDF texts are kept: other pages may still link to the same PDF."""
+    entry = manifest.remove(url) or {}
+    if crawl_state is not None:
+        crawl_state.forget(url)
+    for name in [f"{page_name}.txt"] + list(entry.get("tables", {})):
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            os.remove(path)
+            changes.record("removed", name)
+            logger.info(f"[PAGE GONE] Removed {name}")
 
 #MAIN SCRAPER FUNCTION FOR TARGETED URLS
 def scrape_target_url(url, base_url_for_domain_check):
-    """Scrapes a specific URL for text, any PDFs linked, and tables."""
+    """Scrapes a specific URL for text, any PDFs linked, and tables.
 
+    Pages whose HTML hash matches the scrape manifest are not parsed again.
+    Returns {"status", "files", "page_links"} for the crawler.
+    """
     page_name = clean_filename(url)
     save_path = os.path.join(DATA_DIR, f"{page_name}.txt")
-    html_content = None # Initialize html_content
-    is_new_scrape = False
+    result = {"status": "failed", "files": [], "page_links": []}
 
-    if os.path.exists(save_path):
-        logger.info(f"[PAGE SKIP] Main text exists: {os.path.basename(save_path)}")
-        try:
-            time.sleep(0.5)
-            response = requests.get(url, timeout=15, headers=REQUEST_HEADERS)
-            response.raise_for_status()
-            html_content = response.text # Still need content for links/tables
-        except requests.exceptions.RequestException as e:
-             logger.error(f"[PAGE CHECK FAIL] Could not fetch skipped page {url} to check content: {e}")
-             return
-    else:
-        try:
+    try:
+        # Conditional GET: a 304 is answered from the HTTP cache without a download
+        response = fetcher.get(url, timeout=20)
+        content_type = response.content_type
+        if 'text/html' not in content_type:
+             logger.warning(f"[PAGE WARN] Skipped non-HTML content at {url} ({content_type})")
+             return result
+
+        page_hash = content_hash(response.content)
+        entry = manifest.get(url)
+        if entry and entry["content_hash"] == page_hash and os.path.exists(save_path):
+            logger.info(f"[PAGE SKIP] Unchanged: {os.path.basename(save_path)}")
+            result["status"] = "unchanged"
+        else:
             logger.info(f"[PAGE START] Scraping {url}")
-            time.sleep(0.5)
-            response = requests.get(url, timeout=20, headers=REQUEST_HEADERS)
-            response.raise_for_status()
-
-            content_type = response.headers.get('Content-Type', '').lower()
-            if 'text/html' not in content_type:
-                 logger.warning(f"[PAGE WARN] Skipped non-HTML content at {url} ({content_type})")
-                 return
-
-            html_content = response.text
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
-                tag.decompose()
-            text_content = soup.get_text(separator='\n', strip=True)
-            text_content = "\n".join([line for line in text_content.splitlines() if line.strip()])
-            save_text(text_content, save_path)
+            text_content, pdf_links, page_links, tables = parse_page(response.text, url, base_url_for_domain_check)
+            result["status"] = save_text_if_changed(text_content, save_path) or "unchanged"
+            table_hashes = save_tables(tables, page_name, (entry or {}).get("tables", {}))
+            entry = {
+                "content_hash": page_hash,
+                "page_name": page_name,
+                "pdf_links": pdf_links,
+                "page_links": page_links,
+                "tables": table_hashes,
+            }
+            manifest.update(url, entry)
             logger.info(f"[PAGE OK] Scraped: {url} -> {os.path.basename(save_path)}")
-            is_new_scrape = True
 
-        except requests.exceptions.Timeout:
-             logger.error(f"[PAGE FAIL] Timeout error scraping {url}")
-             return
-        except requests.exceptions.RequestException as e:
-            logger.error(f"[PAGE FAIL] Network error scraping {url}: {e}")
-            return
-        except Exception as e:
-             logger.error(f"[PAGE FAIL] Unexpected error scraping {url}: {e}", exc_info=True)
-             return
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code in (404, 410):
+            logger.warning(f"[PAGE GONE] {url} returned {e.response.status_code}")
+            remove_page(url, page_name)
+            result["status"] = "gone"
+        else:
+            logger.error(f"[PAGE FAIL] HTTP error scraping {url}: {e}")
+        return result
+    except requests.exceptions.Timeout:
+         logger.error(f"[PAGE FAIL] Timeout error scraping {url}")
+         return result
+    except requests.exceptions.RequestException as e:
+        logger.error(f"[PAGE FAIL] Network error scraping {url}: {e}")
+        return result
+    except Exception as e:
+         logger.error(f"[PAGE FAIL] Unexpected error scraping {url}: {e}", exc_info=True)
+         return result
 
-    #Extract PDFs and Tables (Runs if html_content was fetched)
-    if html_content:
-        if 'soup' not in locals(): # Create soup if we loaded content for checks only
-             soup = BeautifulSoup(html_content, "html.parser")
+    #Extract linked PDFs (already-extracted ones are only revalidated)
+    pdf_links = entry.get("pdf_links", [])
+    if pdf_links:
+        logger.info(f"    Found {len(pdf_links)} potential PDFs on {url}...")
+        for pdf_url in pdf_links:
+            extract_pdf_text(pdf_url, clean_filename(pdf_url))
 
-        pdf_links = [a for a in soup.find_all("a", href=True) if a["href"].lower().endswith(".pdf")]
-        if pdf_links:
-            logger.info(f"    Found {len(pdf_links)} potential PDFs on {url}...")
-            for link in pdf_links:
-                href = link["href"]
-                pdf_url = urljoin(url, href)
-                # Check domain using the passed base_url
-                if urlparse(pdf_url).hostname == urlparse(base_url_for_domain_check).hostname:
-                    pdf_name_cleaned = clean_filename(pdf_url)
-                    extract_pdf_text(pdf_url, pdf_name_cleaned)
+    result["page_links"] = entry.get("page_links", [])
+    result["files"] = [os.path.basename(save_path)] + list(entry.get("tables", {})) + [
+        f"{clean_filename(pdf_url)}.txt" for pdf_url in pdf_links
+    ]
+    if crawl_state is not None:
+        crawl_state.record(url, result["files"])
+    return result
 
-        extract_tables(html_content, page_name)
+def scrape_one(target_url):
+    if target_url.lower().endswith(".pdf"):
+        pdf_name_cleaned = clean_filename(target_url)
+        extract_pdf_text(target_url, pdf_name_cleaned)
+        return {"status": "pdf", "files": [f"{pdf_name_cleaned}.txt"], "page_links": []}
+    # Pass the BASE_URL for domain checking within the function
+    return scrape_target_url(target_url, BASE_URL)
 
 #MAIN EXECUTION
 if __name__ == "__main__":
-    start_time = time.time()
-    logger.info(f"Starting TARGETED scraper for {len(TARGET_URLS)} URLs...\n")
+    parser = argparse.ArgumentParser(description="Scrape the APSIT pages in TARGET_URLS, or crawl the site.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent fetches.")
+    parser.add_argument("--delay", type=float, default=PER_HOST_INTERVAL,
+                        help="Minimum seconds between request starts to the same host.")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Retries per request.")
+    parser.add_argument("--pdf-workers", type=int, default=PDF_WORKERS,
+                        help="Processes extracting PDF pages in parallel (1 = inline).")
+    parser.add_argument("--crawl", action="store_true",
+                        help="Discover same-domain pages and PDFs from seed URLs instead of only TARGET_URLS.")
+    parser.add_argument("--seeds", nargs="*", help="Crawl seeds (default: BASE_URL + TARGET_URLS).")
+    parser.add_argument("--max-depth", type=int, default=3, help="Crawl: maximum link depth from a seed.")
+    parser.add_argument("--max-pages", type=int, default=500, help="Crawl: maximum pages fetched.")
+    args = parser.parse_args()
 
-    for target_url in tqdm(TARGET_URLS, desc="Scraping Target URLs"):
-        if target_url.lower().endswith(".pdf"):
-            pdf_name_cleaned = clean_filename(target_url)
-            extract_pdf_text(target_url, pdf_name_cleaned)
-        else:
-            # Pass the BASE_URL for domain checking within the function
-            scrape_target_url(target_url, BASE_URL)
+    fetcher = Fetcher(REQUEST_HEADERS, max_workers=args.workers, per_host_interval=args.delay,
+                      retries=args.retries)
+    manifest = ScrapeManifest(os.path.join(DATA_DIR, MANIFEST_FILE))
+    crawl_state = CrawlState(os.path.join(DATA_DIR, CRAWL_STATE_FILE))
+    pdf_pool = ProcessPoolExecutor(max_workers=args.pdf_workers) if args.pdf_workers > 1 else None
+    target_urls = list(dict.fromkeys(TARGET_URLS))  # De-duplicate, keep order
+
+    start_time = time.time()
+    if args.crawl:
+        seeds = args.seeds or [BASE_URL] + target_urls
+        logger.info(f"Starting CRAWL from {len(seeds)} seeds (depth {args.max_depth}, max {args.max_pages} pages)...\n")
+        visited = crawl(seeds, scrape_one, max_depth=args.max_depth, max_pages=args.max_pages,
+                        workers=args.workers, state=crawl_state)
+        logger.info(f"Crawl visited {visited} pages.")
+    else:
+        logger.info(f"Starting TARGETED scraper for {len(target_urls)} URLs with {args.workers} workers...\n")
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {executor.submit(scrape_one, url): url for url in target_urls}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Scraping Target URLs"):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"[FAIL] Unhandled error for {futures[future]}: {e}", exc_info=True)
+    fetcher.close()
+    manifest.save()
+    crawl_state.save()
+    if pdf_pool:
+        pdf_pool.shutdown()
+    change_summary = changes.write(os.path.join(DATA_DIR, CHANGE_LOG_FILE))
 
     duration = time.time() - start_time
-    logger.info(f"\nTargeted scraping completed in {duration:.2f} seconds.")
-    logger.info(f"   Check the '{DATA_DIR}/' folder and '{LOG_FILE}' for results.")
\ No newline at end of file
+    logger.info(f"\nScraping completed in {duration:.2f} seconds "
+                f"({fetcher.stats['requests']} requests, {fetcher.stats['not_modified']} not modified).")
+    logger.info(f"   Changes since the last ingest: {len(change_summary['added'])} added, {len(change_summary['modified'])} modified, "
+                f"{len(change_summary['removed'])} removed -> {CHANGE_LOG_FILE}")
+    logger.info(f"   Check the '{DATA_DIR}/' folder and '{LOG_FILE}' for results.")
@@ -0,0 +1,58 @@
+"""Page-parallel PDF text extraction.
+
+Kept free of module-level side effects (logging setup, directories) so it is
+safe to import in ProcessPoolExecutor workers. Workers open the spooled PDF
+themselves, memory-mapped, and extract a contiguous range of pages.
+"""
+import mmap
+import pypdf
+
+PAGES_PER_TASK = 8
+
+
+def _open_reader(pdf_path):
+    f = open(pdf_path, "rb")
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return f, mapped, pypdf.PdfReader(mapped)
+
+
+def count_pages(pdf_path):
+    f, mapped, reader = _open_reader(pdf_path)
+    try:
+        return len(reader.pages)
+    finally:
+        mapped.close()
+        f.close()
+
+
+def extract_page_range(pdf_path, start, end):
+    """Returns [(page_number, text, error)] for pages start..end-1 (1-based page numbers)."""
+    f, mapped, reader = _open_reader(pdf_path)
+    results = []
+    try:
+        for index in range(start, end):
+            try:
+                results.append((index + 1, reader.pages[index].extract_text() or "", None))
+            except Exception as e:
+                results.append((index + 1, "", str(e)))
+    finally:
+        mapped.close()
+        f.close()
+    return results
+
+
+def iter_pages(pdf_path, executor=None, pages_per_task=PAGES_PER_TASK):
+    """Yields (page_number, text, error) in page order.
+
+    With an executor, page ranges are extracted in parallel; results are still
+    yielded in order so the caller can write them out incrementally.
+    """
+    n_pages = count_pages(pdf_path)
+    ranges = [(start, min(start + pages_per_task, n_pages)) for start in range(0, n_pages, pages_per_task)]
+    if executor is None or len(ranges) <= 1:
+        for start, end in ranges:
+            yield from extract_page_range(pdf_path, start, end)
+        return
+    futures = [executor.submit(extract_page_range, pdf_path, start, end) for start, end in ranges]
+    for future in futures:
+        yield from future.result()
@@ -0,0 +1,52 @@
+"""Per-URL record of what the last scrape found.
+
+For every page: the hash of the fetched HTML, the PDF links discovered on it
+and a hash per extracted table CSV. A page whose HTML hash is unchanged is
+not parsed again; its stored PDF links are reused.
+"""
+import os
+import json
+import hashlib
+import threading
+
+MANIFEST_FILE = "scrape_manifest.json"
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScrapeManifest:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+
+    def update(self, url, entry):
+        with self._lock:
+            self._entries[url] = entry
+
+    def remove(self, url):
+        with self._lock:
+            return self._entries.pop(url, None)
+
+    def urls(self):
+        with self._lock:
+            return list(self._entries)
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=1)
+            os.replace(tmp_path, self.path)
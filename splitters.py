@@ -0,0 +1,136 @@
+"""Per-source-type chunking for ingest.py.
+
+- "table": scraped HTML tables (*_table_N.csv). Each chunk is the table name,
+  its column header and a group of whole rows as compact `column: value`
+  records, with the columns and row range in the metadata, so merit lists and
+  schedules are never cut mid-row or separated from their headers.
+- "heading": syllabus / scheme / Government Resolution texts. Text is cut at
+  headings (Semester, Module/Unit, Course Code, numbered clauses, ALL-CAPS
+  titles) and every chunk carries its section heading.
+- "default": the recursive character splitter for everything else.
+
+get_splitter(file_path, kind) picks one; all expose split_documents().
+Bump SPLITTER_VERSION when chunk output changes so ingest does a full rebuild.
+"""
+import io
+import os
+import re
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+SPLITTER_VERSION = 1
+
+# Text files whose names say they are syllabi, schemes or Government Resolutions
+HEADING_FILE_PATTERN = re.compile(r"syllabus|scheme|curriculum|government_resolution|(^|[_\W])gr([_\W]|$)",
+                                  re.IGNORECASE)
+HEADING_PATTERN = re.compile(
+    r"^(semester|sem|module|unit|chapter|part|section|annexure|appendix)\s*[-:.]?\s*([ivxlc]+|\d+)\b"
+    r"|^course\s*(code|name|objectives|outcomes)\b"
+    r"|^(text\s*books?|reference\s*books?|references|prerequisites?|g\.?\s*r\.?\s*(no|number)\b|subject\s*:)"
+    r"|^\d+(\.\d+)+\s+[A-Z][A-Za-z]"
+    r"|^\d+[.)]\s+[A-Z][^.]{0,60}$",
+    re.IGNORECASE,
+)
+MIN_SECTION_CHARS = 500  # Shorter sections are folded into the next one
+MAX_HEADING_CHARS = 100
+
+
+def is_heading(line):
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return False
+    if HEADING_PATTERN.match(line):
+        return True
+    # ALL-CAPS titles of a few words ("EXAMINATION SCHEME"), not lone codes like "CSDO"
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 8 and all(c.isupper() for c in letters) and 2 <= len(line.split()) <= 10
+
+
+class HeadingSplitter:
+    def __init__(self, chunk_size, chunk_overlap):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def sections(self, text):
+        """[(heading, section text)]; text before the first heading has heading None."""
+        sections, heading, lines = [], None, []
+        for line in text.splitlines():
+            if is_heading(line) and sum(len(l) for l in lines) >= MIN_SECTION_CHARS:
+                sections.append((heading, "\n".join(lines)))
+                heading, lines = line.strip(), []
+            elif is_heading(line) and heading is None and not any(l.strip() for l in lines):
+                heading = line.strip()
+            lines.append(line)
+        if any(l.strip() for l in lines):
+            sections.append((heading, "\n".join(lines)))
+        return sections
+
+    def split_documents(self, documents):
+        chunks = []
+        for doc in documents:
+            for heading, body in self.sections(doc.page_content):
+                prefix = f"[{heading}]\n" if heading else ""
+                splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=max(self.chunk_size - len(prefix), self.chunk_overlap + 1),
+                    chunk_overlap=self.chunk_overlap,
+                )
+                for text in splitter.split_text(body):
+                    metadata = dict(doc.metadata)
+                    if heading:
+                        metadata["section"] = heading
+                    if heading and not text.lstrip().startswith(heading):
+                        text = prefix + text
+                    chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
+
+
+class TableSplitter:
+    """Splits CSV Documents (raw CSV text) into header + row-group chunks."""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def row_record(columns, row):
+        return " | ".join(f"{column}: {value}" for column, value in zip(columns, row) if str(value).strip())
+
+    def split_documents(self, documents):
+        chunks = []
+        for doc in documents:
+            df = pd.read_csv(io.StringIO(doc.page_content), dtype=str).fillna("")
+            if df.empty:
+                continue
+            columns = [str(column).strip() for column in df.columns]
+            table_name = os.path.splitext(os.path.basename(doc.metadata.get("source", "")))[0]
+            header = f"Table: {table_name}\nColumns: {', '.join(columns)}\n"
+            rows, first_row, size = [], 0, len(header)
+
+            def flush(end_row):
+                chunks.append(Document(
+                    page_content=header + "\n".join(rows),
+                    metadata={**doc.metadata, "columns": columns,
+                              "row_start": first_row, "row_end": end_row},
+                ))
+
+            for i, row in enumerate(df.itertuples(index=False)):
+                record = self.row_record(columns, row)
+                if rows and size + len(record) + 1 > self.chunk_size:
+                    flush(i - 1)
+                    rows, first_row, size = [], i, len(header)
+                rows.append(record)
+                size += len(record) + 1
+            if rows:
+                flush(len(df) - 1)
+        return chunks
+
+
+def get_splitter(file_path, kind, chunk_size, chunk_overlap):
+    """Splitter for one source file: table rows for CSVs, headings for syllabus/GR texts."""
+    if kind == "csv":
+        return TableSplitter(chunk_size)
+    if HEADING_FILE_PATTERN.search(os.path.basename(file_path)):
+        return HeadingSplitter(chunk_size, chunk_overlap)
+    # start_index lets the query-time context budgeter merge overlapping neighbours
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app modules live at the repo root; the scraper imports its siblings by bare name
+for path in (ROOT, os.path.join(ROOT, "scraper")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
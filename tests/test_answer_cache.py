@@ -0,0 +1,113 @@
+import os
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from answer_cache import SemanticAnswerCache
+
+
+def same_vector(question):
+    # Stands in for MiniLM scoring "IT cut-off 2024" and "Civil cut-off 2024" as near-identical
+    return np.ones(8, dtype=np.float32)
+
+
+def docs(text, source="data/it.txt"):
+    return [Document(page_content=text, metadata={"source": source})]
+
+
+def write_manifest(path, hashes):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"files": {source: {"hash": content_hash} for source, content_hash in hashes.items()}}, f)
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    db_path = tmp_path / "db_faiss"
+    db_path.mkdir()
+    (db_path / "store.json").write_text('{"format": "mmap", "version": 1}')
+    manifest_path = tmp_path / "ingest_manifest.json"
+    write_manifest(manifest_path, {"data/it.txt": "aaa"})
+    return db_path, manifest_path
+
+
+def make_cache(store_dir, **kwargs):
+    db_path, manifest_path = store_dir
+    return SemanticAnswerCache(same_vector, str(db_path), path=None, check_interval=0,
+                               manifest_path=str(manifest_path), **kwargs)
+
+
+def test_similar_question_is_a_hit(store_dir):
+    cache = make_cache(store_dir)
+    cache.put("what is the fee", None, "1.5 lakh", docs("fees"))
+    answer, documents = cache.lookup("what's the fee")
+    assert answer == "1.5 lakh"
+    assert documents[0].page_content == "fees"
+    assert cache.stats()["hits"] == 1
+
+
+def test_auto_filter_keeps_departments_apart(store_dir):
+    cache = make_cache(store_dir, auto_filter=True)
+    cache.put("IT cut-off 2024", None, "IT answer", docs("it"))
+    assert cache.lookup("Civil cut-off 2024") is None
+    assert cache.lookup("IT cut-off for 2024")[0] == "IT answer"
+
+
+def test_without_auto_filter_departments_share_answers(store_dir):
+    # Without auto_filter the retriever searches everything for both, so sharing the answer is correct
+    cache = make_cache(store_dir)
+    cache.put("IT cut-off 2024", None, "IT answer", docs("it"))
+    assert cache.lookup("Civil cut-off 2024")[0] == "IT answer"
+
+
+def test_explicit_filters_must_match(store_dir):
+    cache = make_cache(store_dir, auto_filter=True)
+    cache.put("cut-off", {"department": "it"}, "IT answer", docs("it"))
+    assert cache.lookup("cut-off", {"department": "civil"}) is None
+    assert cache.lookup("cut-off", {"department": "it"})[0] == "IT answer"
+
+
+def test_reingest_drops_entries_whose_sources_changed(store_dir):
+    db_path, manifest_path = store_dir
+    cache = make_cache(store_dir)
+    cache.put("what is the fee", None, "1.5 lakh", docs("fees"))
+    write_manifest(manifest_path, {"data/it.txt": "bbb"})
+    (db_path / "store.json").write_text('{"format": "mmap", "version": 2}')
+    assert cache.lookup("what is the fee") is None
+    assert cache.stats()["invalidated"] == 1
+    assert len(cache) == 0
+
+
+def test_reingest_keeps_entries_whose_sources_are_unchanged(store_dir):
+    db_path, _ = store_dir
+    cache = make_cache(store_dir)
+    cache.put("what is the fee", None, "1.5 lakh", docs("fees"))
+    (db_path / "store.json").write_text('{"format": "mmap", "version": 2}')
+    assert cache.lookup("what is the fee")[0] == "1.5 lakh"
+
+
+def test_oldest_entries_are_evicted_beyond_max_entries(store_dir):
+    cache = make_cache(store_dir, max_entries=2)
+    for i in range(3):
+        cache.put(f"question {i}", {"year": str(2020 + i)}, f"answer {i}", docs("x"))
+    assert len(cache) == 2
+    assert cache.lookup("question 0", {"year": "2020"}) is None
+
+
+def test_saved_cache_reloads_with_filters(store_dir, tmp_path):
+    path = str(tmp_path / "answer_cache")
+    cache = make_cache(store_dir, auto_filter=True)
+    cache.path = path
+    cache.put("IT cut-off 2024", None, "IT answer", docs("it"))
+    cache.save()
+    db_path, manifest_path = store_dir
+    reloaded = SemanticAnswerCache(same_vector, str(db_path), path=path, check_interval=0,
+                                   manifest_path=str(manifest_path), auto_filter=True)
+    assert os.path.exists(os.path.join(path, "entries.json"))
+    assert reloaded.lookup("Civil cut-off 2024") is None
+    assert reloaded.lookup("IT cut-off 2024")[0] == "IT answer"
@@ -0,0 +1,149 @@
+import gc
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+import backend
+
+
+class FakeChain:
+    def __init__(self, tokens=("1.5 ", "lakh"), fail_after=None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+
+    async def astream(self, inputs):
+        yield {"context": [Document(page_content="fees", metadata={"source": "data/fees.txt"})]}
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise RuntimeError("LLM connection reset")
+            yield {"answer": token}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = backend.ConcurrencyLimiter(max_in_flight=2, max_queued=0, queue_timeout=0.1)
+    monkeypatch.setattr(backend, "limiter", limiter)
+    return limiter
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so the lifespan (which loads the real chain) never runs
+    return TestClient(backend.app)
+
+
+def events(response):
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+
+def test_stream_sends_sources_tokens_and_done(monkeypatch, limiter, client):
+    monkeypatch.setattr(backend, "rag_chain", FakeChain())
+    response = client.post("/chat/stream", json={"input": "what is the fee"})
+    assert response.status_code == 200
+    received = events(response)
+    assert [event for event, _ in received] == ["sources", "token", "token", "done"]
+    assert received[0][1] == {"sources": [{"source": "data/fees.txt"}]}
+    assert "".join(data["token"] for event, data in received if event == "token") == "1.5 lakh"
+    assert limiter.in_flight == 0
+
+
+def test_stream_error_is_an_event_and_releases_the_slot(monkeypatch, limiter, client):
+    monkeypatch.setattr(backend, "rag_chain", FakeChain(fail_after=1))
+    received = events(client.post("/chat/stream", json={"input": "what is the fee"}))
+    assert [event for event, _ in received] == ["sources", "token", "error"]
+    assert "LLM connection reset" in received[-1][1]["error"]
+    assert limiter.in_flight == 0
+
+
+def test_stream_never_iterated_still_releases_the_slot(monkeypatch, limiter):
+    # The client disconnects before the response body is ever iterated
+    monkeypatch.setattr(backend, "rag_chain", FakeChain())
+    request = backend.ChatRequest(input="what is the fee")
+    response = asyncio.run(backend.chat_stream(request))
+    assert limiter.in_flight == 1
+    del response
+    gc.collect()
+    assert limiter.in_flight == 0
+    assert not limiter._semaphore.locked()
+
+
+def test_stream_is_503_until_the_chain_is_loaded(monkeypatch, limiter, client):
+    monkeypatch.setattr(backend, "rag_chain", None)
+    response = client.post("/chat/stream", json={"input": "what is the fee"})
+    assert response.status_code == 503
+    assert limiter.in_flight == 0
+
+
+class SlowChain:
+    """Holds every answer until `release` is set, so requests pile up in the limiter."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, inputs):
+        await self.release.wait()
+        return {"answer": f"answer to {inputs['input']}"}
+
+
+def test_limiter_queues_then_rejects_with_429():
+    async def scenario():
+        limiter = backend.ConcurrencyLimiter(max_in_flight=1, max_queued=1, queue_timeout=0.05)
+        await limiter.acquire()
+        # The one queue place is taken and then times out
+        with pytest.raises(backend.HTTPException) as timed_out:
+            await limiter.acquire()
+        assert timed_out.value.status_code == 429 and limiter.queued == 0
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        # Queue full: rejected at once instead of waiting
+        with pytest.raises(backend.HTTPException) as rejected:
+            await limiter.acquire()
+        assert rejected.value.status_code == 429
+        assert rejected.value.headers == {"Retry-After": "1"}
+
+        limiter.release()
+        await waiter
+        assert (limiter.in_flight, limiter.queued) == (1, 0)
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_chat_answers_concurrent_requests_up_to_the_limit(monkeypatch):
+    chain = SlowChain()
+    monkeypatch.setattr(backend, "rag_chain", chain)
+    monkeypatch.setattr(backend, "limiter", backend.ConcurrencyLimiter(max_in_flight=2, max_queued=0,
+                                                                       queue_timeout=1))
+    transport = httpx.ASGITransport(app=backend.app)
+
+    async def both_in_flight():
+        while backend.limiter.in_flight < 2:
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            answered = [asyncio.ensure_future(http.post("/chat", json={"input": f"q{i}"})) for i in range(2)]
+            await asyncio.wait_for(both_in_flight(), timeout=5)
+            # Both slots are busy on one event loop and nothing may queue
+            busy = await http.post("/chat", json={"input": "q2"})
+            assert busy.status_code == 429
+            chain.release.set()
+            responses = await asyncio.gather(*answered)
+        assert [response.json()["answer"] for response in responses] == ["answer to q0", "answer to q1"]
+        assert backend.limiter.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def blocked_batcher(max_batch=32, fail=False, short=False):
+    """A batcher whose first call waits for `release`, so later submissions queue up into one batch."""
+    release = threading.Event()
+    started = threading.Event()
+    sizes = []
+
+    def batch_fn(items):
+        if not sizes:
+            started.set()
+            release.wait(5)
+        sizes.append(len(items))
+        if fail and len(sizes) > 1:
+            raise RuntimeError("model crashed")
+        results = [item * 10 for item in items]
+        return results[:-1] if short and len(sizes) > 1 else results
+
+    return MicroBatcher(batch_fn, max_batch=max_batch, max_wait_ms=0), release, started, sizes
+
+
+def test_single_call_returns_its_result():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items])
+    assert batcher(1) == 2
+    assert batcher.stats() == {"batches": 1, "items": 1, "mean_batch_size": 1.0}
+
+
+def test_queued_items_form_one_batch_and_each_caller_gets_its_own_result():
+    batcher, release, started, sizes = blocked_batcher()
+    first = batcher.submit(0)
+    assert started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 11)]
+    release.set()
+    assert first.result(5) == 0
+    assert [future.result(5) for future in futures] == [i * 10 for i in range(1, 11)]
+    assert sizes == [1, 10]
+
+
+def test_max_batch_is_respected():
+    batcher, release, started, sizes = blocked_batcher(max_batch=4)
+    batcher.submit(0)
+    assert started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 11)]
+    release.set()
+    assert [future.result(5) for future in futures] == [i * 10 for i in range(1, 11)]
+    assert sizes == [1, 4, 4, 2]
+    assert batcher.stats()["batches"] == 4
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    batcher, release, started, sizes = blocked_batcher(fail=True)
+    batcher.submit(0)
+    assert started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 4)]
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(5)
+    assert sizes == [1, 3]
+
+
+def test_concurrent_callers_never_get_a_neighbours_result():
+    batcher = MicroBatcher(lambda items: [f"result-{item}" for item in items], max_batch=8, max_wait_ms=2)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(batcher, range(200)))
+    assert results == [f"result-{i}" for i in range(200)]
+    assert batcher.stats()["items"] == 200
+
+
+def test_short_result_fails_every_caller_instead_of_hanging():
+    batcher, release, started, sizes = blocked_batcher(short=True)
+    batcher.submit(0)
+    assert started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 4)]
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="returned 2 results for 3 items"):
+            future.result(5)
+
+
+def test_close_dispatches_queued_items_then_stops_the_thread():
+    batcher, release, started, sizes = blocked_batcher()
+    first = batcher.submit(0)
+    assert started.wait(5)
+    futures = [batcher.submit(i) for i in range(1, 4)]
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+    assert not batcher._thread.is_alive()
+    assert first.result(0) == 0 and [future.result(0) for future in futures] == [10, 20, 30]
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(4)
+    batcher.close()  # Idempotent
+
+
+def test_close_of_an_idle_batcher():
+    batcher = MicroBatcher(lambda items: items)
+    batcher.close()
+    assert not batcher._thread.is_alive()
@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+TEXTS = [
+    "IT department syllabus for R-19 scheme",
+    "Admission fee structure for first year",
+    "Civil department placement statistics 2024-25",
+    "Fee refund policy for cancelled admission",
+]
+IDS = ["it-syllabus", "fees", "civil-placements", "refund"]
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(IDS, TEXTS)
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    tokens = tokenize("What is the R-19 syllabus for 2024-25?")
+    assert "r-19" in tokens and "r" in tokens and "19" in tokens
+    assert "2024-25" in tokens
+    assert "the" not in tokens and "what" not in tokens
+
+
+def test_search_ranks_matching_chunks_first(index):
+    results = index.search("fee refund", k=2)
+    assert [doc_id for doc_id, _ in results] == ["refund", "fees"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_returns_at_most_k_and_only_matches(index):
+    assert len(index.search("department", k=1)) == 1
+    assert {doc_id for doc_id, _ in index.search("department", k=10)} == {"it-syllabus", "civil-placements"}
+    assert index.search("hostel", k=5) == []
+
+
+def test_search_matches_compound_tokens(index):
+    assert index.search("r-19", k=1)[0][0] == "it-syllabus"
+
+
+def test_allowed_positions_mask_other_chunks(index):
+    results = index.search("fee admission", k=5, allowed=[3])
+    assert [doc_id for doc_id, _ in results] == ["refund"]
+
+
+def test_save_and_load_roundtrip(index, tmp_path):
+    index.save(str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["docs.npy", "ids.json", "offsets.npy", "vocab.json",
+                                                           "weights.npy"]
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.search("fee refund", k=2) == index.search("fee refund", k=2)
+
+
+def test_load_returns_none_without_an_index(tmp_path):
+    assert BM25Index.load(str(tmp_path)) is None
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = ["a", "b", "c"]
+    sparse = ["b", "d", "e"]
+    # Ranked in both lists beats first in one list; otherwise the better rank wins
+    assert reciprocal_rank_fusion([dense, sparse], k=3) == ["b", "a", "d"]
+
+
+def test_reciprocal_rank_fusion_keeps_single_list_order():
+    assert reciprocal_rank_fusion([["x", "y", "z"]], k=3) == ["x", "y", "z"]
+    assert reciprocal_rank_fusion([["x", "y"], []], k=5) == ["x", "y"]
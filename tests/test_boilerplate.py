@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+pytest.importorskip("tqdm")
+
+import boilerplate
+from boilerplate import build_boilerplate, load_boilerplate, repeated_page_lines, save_boilerplate, strip_lines
+
+FOOTER = "Address: Survey No. 12, Opp. Hypercity Mall, Kasarvadavali"
+NAV = "Skip to main content"
+# Digits normalize to '#', so distinct content has to differ in its words
+TOPICS = ["admissions", "hostel", "library", "placements", "canteen", "sports", "scholarships", "transport",
+          "examinations", "alumni"]
+
+
+def write_pages(directory, count, lines, prefix="page"):
+    paths = []
+    for i in range(count):
+        path = directory / f"{prefix}-{i}.txt"
+        path.write_text("\n".join(lines + [f"Unique content of this {prefix} about {TOPICS[i]}"]),
+                        encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_repeated_long_lines_are_boilerplate(tmp_path):
+    paths = write_pages(tmp_path, 10, [NAV, FOOTER])
+    lines = build_boilerplate(paths)["page"]
+    assert boilerplate.normalize_line(FOOTER) in lines
+    assert boilerplate.normalize_line(NAV) in lines
+    assert not any("unique content" in line for line in lines)
+
+
+def test_numbers_punctuation_and_short_words_are_never_boilerplate(tmp_path):
+    paths = write_pages(tmp_path, 10, ["75", "3 4 25", "#.", ",", ")", "Engineering", "Sr. No.", "Computer"])
+    assert build_boilerplate(paths)["page"] == set()
+
+
+def test_frequency_is_counted_per_source_type(tmp_path):
+    pages = write_pages(tmp_path, 10, [NAV])
+    pdfs = write_pages(tmp_path, 10, ["Parshvanath Charitable Trust's letterhead line"], prefix="pdf")
+    for path in pdfs:
+        with open(path[:-len(".txt")] + ".pages.json", "w", encoding="utf-8") as f:
+            json.dump([[1, 0, 10]], f)
+    # A footer on two of ten PDFs is not PDF boilerplate just because every page has it
+    for path in pdfs[:2]:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n" + NAV)
+    result = build_boilerplate(pages + pdfs)
+    assert boilerplate.normalize_line(NAV) in result["page"]
+    assert boilerplate.normalize_line(NAV) not in result["pdf"]
+    assert "parshvanath charitable trust's letterhead line" in result["pdf"]
+    assert "parshvanath charitable trust's letterhead line" not in result["page"]
+
+
+def test_lines_below_the_file_threshold_are_kept(tmp_path):
+    paths = write_pages(tmp_path, 4, [FOOTER])  # Fewer than MIN_DOCS files
+    assert build_boilerplate(paths)["page"] == set()
+
+
+def test_repeated_page_lines_needs_most_pages():
+    header = "University of Mumbai Syllabus R-2019"
+    pages = [f"{header}\nThis page covers {topic} in more detail" for topic in TOPICS[:4]]
+    assert repeated_page_lines(pages) == {boilerplate.normalize_line(header)}
+    assert repeated_page_lines(pages[:2]) == set()  # Too few pages to tell
+
+
+def test_strip_lines_reports_bytes_removed():
+    text = f"{NAV}\nFees are 1.5 lakh per year\n{FOOTER}"
+    cleaned, removed = strip_lines(text, {boilerplate.normalize_line(NAV), boilerplate.normalize_line(FOOTER)})
+    assert cleaned == "Fees are 1.5 lakh per year"
+    assert removed == len(text.encode("utf-8")) - len(cleaned.encode("utf-8"))
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / "boilerplate.json")
+    save_boilerplate({"page": {"skip to main content"}, "pdf": set()}, path)
+    assert load_boilerplate(path) == {"page": {"skip to main content"}, "pdf": set()}
+
+
+def test_old_flat_format_forces_a_rebuild(tmp_path):
+    path = tmp_path / "boilerplate.json"
+    path.write_text(json.dumps(["skip to main content"]), encoding="utf-8")
+    assert load_boilerplate(str(path)) is None
+    assert load_boilerplate(str(tmp_path / "missing.json")) is None
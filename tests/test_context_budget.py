@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from context_budget import ContextBudgeter, estimate_tokens, estimated_jaccard, minhash_signature
+
+FEES = ("The fee structure for the first year of engineering is 1.5 lakh per year. Hostel fees are charged "
+        "separately and payable at the start of each semester. Scholarships reduce the tuition fee for eligible "
+        "students who apply before the deadline announced by the admission office.")
+PLACEMENTS = ("The training and placement cell invites recruiters every year. In 2024-25 the highest package "
+              "was 12 lakh per annum and more than two hundred students were placed across all departments.")
+
+
+def doc(text, source="data/fees.txt", **metadata):
+    return Document(page_content=text, metadata={"source": source, **metadata})
+
+
+def test_minhash_estimates_similarity():
+    signature = minhash_signature(FEES)
+    assert estimated_jaccard(signature, minhash_signature(FEES)) == 1.0
+    assert estimated_jaccard(signature, minhash_signature(FEES.replace("deadline", "last date"))) > 0.6
+    assert estimated_jaccard(signature, minhash_signature(PLACEMENTS)) < 0.2
+
+
+def test_near_duplicates_from_other_sources_are_dropped():
+    # The same page scraped under two URLs: only the higher-ranked copy is kept
+    docs = [doc(FEES, "data/fees.txt"), doc(FEES + " ", "data/fees-copy.txt"), doc(PLACEMENTS, "data/tpo.txt")]
+    kept, stats = ContextBudgeter(token_budget=10000).assemble(docs)
+    assert [d.metadata["source"] for d in kept] == ["data/fees.txt", "data/tpo.txt"]
+    assert stats["duplicates_dropped"] == 1
+
+
+def test_adjacent_chunks_are_merged_by_start_index():
+    first, second = FEES[:150], FEES[100:]
+    docs = [doc(second, start_index=100), doc(PLACEMENTS, "data/tpo.txt"), doc(first, start_index=0)]
+    kept, stats = ContextBudgeter(token_budget=10000).assemble(docs)
+    assert kept[0].page_content == FEES
+    assert kept[0].metadata["start_index"] == 0
+    assert stats["merged"] == 1 and len(kept) == 2
+
+
+def test_chunks_of_other_pages_are_not_merged():
+    docs = [doc(FEES[:150], page=1, start_index=0), doc(FEES[100:], page=2, start_index=100)]
+    kept, stats = ContextBudgeter(token_budget=10000, duplicate_threshold=1.1).assemble(docs)
+    assert len(kept) == 2 and stats["merged"] == 0
+
+
+def test_budget_keeps_rank_order_and_trims_the_last_chunk():
+    long_text = "Sentence about admissions. " * 60
+    docs = [doc(PLACEMENTS, "data/tpo.txt"), doc(long_text, "data/admissions.txt"), doc(FEES)]
+    budget = estimate_tokens(PLACEMENTS) + 100
+    kept, stats = ContextBudgeter(token_budget=budget).assemble(docs)
+    assert [d.metadata["source"] for d in kept] == ["data/tpo.txt", "data/admissions.txt"]
+    assert kept[1].metadata["truncated"] is True
+    assert kept[1].page_content.endswith(".")
+    assert stats["tokens_after"] <= budget
+    assert stats["over_budget_dropped"] == 1
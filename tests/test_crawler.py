@@ -0,0 +1,142 @@
+import json
+import threading
+
+from crawler import ChangeLog, CrawlState, Frontier, crawl, is_crawlable, normalize_url
+
+HOST = "www.apsit.edu.in"
+
+
+def test_normalize_url_canonicalizes_equivalent_urls():
+    assert normalize_url("HTTPS://WWW.APSIT.EDU.IN:443/Admissions/#fees") == "https://www.apsit.edu.in/Admissions"
+    assert normalize_url("https://www.apsit.edu.in") == "https://www.apsit.edu.in/"
+    assert normalize_url("http://localhost:8000/page/") == "http://localhost:8000/page"
+    assert (normalize_url("https://www.apsit.edu.in/news?b=2&utm_source=x&a=1")
+            == "https://www.apsit.edu.in/news?a=1&b=2")
+
+
+def test_is_crawlable_keeps_same_host_pages_and_pdfs():
+    assert is_crawlable("https://www.apsit.edu.in/fees", HOST)
+    assert is_crawlable("https://www.apsit.edu.in/sites/default/files/Fee.PDF", HOST)
+    assert not is_crawlable("https://www.apsit.edu.in/logo.png", HOST)
+    assert not is_crawlable("https://mu.ac.in/fees", HOST)
+    assert not is_crawlable("mailto:office@apsit.edu.in", HOST)
+
+
+def test_frontier_admits_each_url_once_within_max_depth():
+    frontier = Frontier(HOST, max_depth=1)
+    assert frontier.push("https://www.apsit.edu.in/about", 0)
+    assert not frontier.push("https://www.apsit.edu.in/about/#team", 1)
+    assert not frontier.push("https://www.apsit.edu.in/deep", 2)
+    assert not frontier.push("https://mu.ac.in/", 0)
+    assert len(frontier) == 1
+
+
+def test_frontier_pops_shallow_then_priority_pages_first():
+    frontier = Frontier(HOST, max_depth=3)
+    frontier.push("https://www.apsit.edu.in/gallery", 1)
+    frontier.push("https://www.apsit.edu.in/events", 1)
+    frontier.push("https://www.apsit.edu.in/admissions", 1)
+    frontier.push("https://www.apsit.edu.in/", 0)
+    order = [frontier.pop() for _ in range(len(frontier))]
+    assert order == [
+        ("https://www.apsit.edu.in/", 0),
+        ("https://www.apsit.edu.in/admissions", 1),
+        ("https://www.apsit.edu.in/gallery", 1),
+        ("https://www.apsit.edu.in/events", 1),
+    ]
+
+
+def test_change_log_merges_runs_until_consumed(tmp_path):
+    path = str(tmp_path / "changes.json")
+    first = ChangeLog()
+    first.record("added", "new.txt")
+    first.record("modified", "fees.txt")
+    first.write(path)
+
+    second = ChangeLog()
+    second.record("modified", "new.txt")
+    second.record("removed", "fees.txt")
+    payload = second.write(path)
+    # Still new to the index, and the later removal wins over the earlier edit
+    assert payload["added"] == ["new.txt"]
+    assert payload["modified"] == []
+    assert payload["removed"] == ["fees.txt"]
+    assert payload["sequence"] == 2 and payload["consumed"] is False
+
+    with open(path, "r", encoding="utf-8") as f:
+        consumed = json.load(f)
+    consumed["consumed"] = True
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(consumed, f)
+    third = ChangeLog()
+    third.record("modified", "calendar.txt")
+    payload = third.write(path)
+    assert payload["added"] == [] and payload["removed"] == []
+    assert payload["modified"] == ["calendar.txt"]
+    assert payload["sequence"] == 3
+
+
+def test_crawl_state_roundtrip_and_depths(tmp_path):
+    path = str(tmp_path / "crawl_state.json")
+    state = CrawlState(path)
+    state.record("https://www.apsit.edu.in/", ["home.txt"])
+    state.record("https://www.apsit.edu.in/fees", ["fees.txt", "fees.txt"])
+    state.set_depth("https://www.apsit.edu.in/fees", 2)
+    state.set_depth("https://www.apsit.edu.in/never-visited", 1)
+    state.save()
+
+    reloaded = CrawlState(path)
+    assert sorted(reloaded.known_pages()) == [("https://www.apsit.edu.in/", 0), ("https://www.apsit.edu.in/fees", 2)]
+    assert reloaded.pages["https://www.apsit.edu.in/fees"]["files"] == ["fees.txt"]
+    assert reloaded.forget("https://www.apsit.edu.in/fees")["files"] == ["fees.txt"]
+    assert CrawlState(str(tmp_path / "missing.json")).pages == {}
+
+
+def fake_site(state=None):
+    links = {
+        "https://www.apsit.edu.in/": ["/about", "https://www.apsit.edu.in/fees#top", "https://mu.ac.in/"],
+        "https://www.apsit.edu.in/about": ["https://www.apsit.edu.in/", "https://www.apsit.edu.in/about/team"],
+        "https://www.apsit.edu.in/fees": [],
+        "https://www.apsit.edu.in/about/team": [],
+        "https://www.apsit.edu.in/orphan": [],
+    }
+    visited = []
+    lock = threading.Lock()
+
+    def scrape_page(url):
+        with lock:
+            visited.append(url)
+        if state is not None:
+            state.record(url, [])
+        return {"page_links": [link if link.startswith("http") else "https://www.apsit.edu.in" + link
+                               for link in links[url]]}
+
+    return scrape_page, visited
+
+
+def test_crawl_visits_each_page_once_within_limits():
+    scrape_page, visited = fake_site()
+    assert crawl(["https://www.apsit.edu.in/"], scrape_page, max_depth=3, workers=2) == 4
+    assert sorted(visited) == [
+        "https://www.apsit.edu.in/",
+        "https://www.apsit.edu.in/about",
+        "https://www.apsit.edu.in/about/team",
+        "https://www.apsit.edu.in/fees",
+    ]
+
+    scrape_page, visited = fake_site()
+    assert crawl(["https://www.apsit.edu.in/"], scrape_page, max_depth=1, workers=2) == 3
+    assert "https://www.apsit.edu.in/about/team" not in visited
+
+    scrape_page, visited = fake_site()
+    assert crawl(["https://www.apsit.edu.in/"], scrape_page, max_pages=2, workers=1) == 2
+
+
+def test_crawl_revisits_known_pages_no_longer_linked(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl_state.json"))
+    state.record("https://www.apsit.edu.in/orphan", [])
+    state.set_depth("https://www.apsit.edu.in/orphan", 1)
+    scrape_page, visited = fake_site(state)
+    crawl(["https://www.apsit.edu.in/"], scrape_page, max_depth=3, workers=2, state=state)
+    assert "https://www.apsit.edu.in/orphan" in visited
+    assert dict(state.known_pages())["https://www.apsit.edu.in/about/team"] == 2
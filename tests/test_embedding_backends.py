@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+import embedding_backends
+
+TEXTS = ["Tuition fees are 1.5 lakh per year.", "The library opens at 8 am.", "what is the hostel fee"]
+
+
+class FakeModel:
+    """Stands in for both MiniLM backends; `noise` perturbs the vectors the way a bad export would."""
+
+    def __init__(self, name, noise=0.0):
+        self.name = name
+        self.noise = noise
+
+    def embed_documents(self, texts):
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(sum(map(ord, text)))
+            vector = rng.standard_normal(8) + self.noise * np.random.default_rng(len(text)).standard_normal(8)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    # Neither torch nor onnxruntime is needed: only the verification gate around them is tested
+    monkeypatch.setattr(embedding_backends, "_torch_embeddings", lambda: FakeModel("torch"))
+    monkeypatch.setattr(embedding_backends, "sample_texts", lambda limit: TEXTS)
+    for name in embedding_backends.MODEL_FILES.values():
+        (tmp_path / name).write_bytes(b"onnx weights")
+    return tmp_path
+
+
+def use_onnx(monkeypatch, noise=0.0, error=None):
+    def load(backend, model_dir):
+        if error:
+            raise error
+        return FakeModel(backend, noise)
+
+    monkeypatch.setattr(embedding_backends, "_onnx_embeddings", load)
+
+
+def test_unverified_model_falls_back_to_torch(model_dir, monkeypatch, capsys):
+    use_onnx(monkeypatch)
+    assert embedding_backends.create_embedder("onnx-int8", str(model_dir)).name == "torch"
+    assert "No passing verification for the onnx-int8 model" in capsys.readouterr().out
+
+
+def test_verified_model_is_used(model_dir, monkeypatch):
+    use_onnx(monkeypatch)
+    record = embedding_backends.verify("onnx-int8", str(model_dir))
+    assert record["passed"] and record["min_cosine"] >= embedding_backends.MIN_COSINE and record["texts"] == 3
+    assert embedding_backends.create_embedder("onnx-int8", str(model_dir)).name == "onnx-int8"
+    # Verification is per model file
+    assert embedding_backends.create_embedder("onnx", str(model_dir)).name == "torch"
+
+
+def test_failed_verification_falls_back_to_torch(model_dir, monkeypatch):
+    use_onnx(monkeypatch, noise=1.0)
+    record = embedding_backends.verify("onnx-int8", str(model_dir))
+    assert not record["passed"] and record["min_cosine"] < embedding_backends.MIN_COSINE
+    assert embedding_backends.create_embedder("onnx-int8", str(model_dir)).name == "torch"
+
+
+def test_model_replaced_after_verification_is_not_trusted(model_dir, monkeypatch):
+    use_onnx(monkeypatch)
+    embedding_backends.verify("onnx", str(model_dir))
+    (model_dir / "model.onnx").write_bytes(b"re-exported weights")
+    assert not embedding_backends.is_verified("onnx", str(model_dir))
+    assert embedding_backends.create_embedder("onnx", str(model_dir)).name == "torch"
+
+
+def test_verified_model_that_fails_to_load_falls_back_to_torch(model_dir, monkeypatch, capsys):
+    use_onnx(monkeypatch)
+    embedding_backends.verify("onnx", str(model_dir))
+    use_onnx(monkeypatch, error=ImportError("No module named 'onnxruntime'"))
+    assert embedding_backends.create_embedder("onnx", str(model_dir)).name == "torch"
+    assert "Could not load the onnx embedding backend" in capsys.readouterr().out
+
+
+def test_unknown_backend_is_an_error():
+    with pytest.raises(ValueError):
+        embedding_backends.create_embedder("tensorflow")
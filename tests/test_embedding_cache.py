@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+import embedding_cache
+from embedding_cache import EmbeddingCache
+
+
+def vector(i, dim=4):
+    return np.full(dim, float(i), dtype=np.float32)
+
+
+def key(i):
+    return f"{i:032d}".encode("ascii")
+
+
+@pytest.fixture(autouse=True)
+def reload_immediately(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "RELOAD_CHECK_INTERVAL", 0.0)
+
+
+def test_roundtrip_through_flush(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), max_entries=100)
+    writer.put_many([key(i) for i in range(10)], [vector(i) for i in range(10)])
+    writer.flush()
+    reader = EmbeddingCache(str(tmp_path), max_entries=100, read_only=True)
+    results = reader.get_many([key(3), key(42)])
+    assert results[0].tolist() == vector(3).tolist()
+    assert results[1] is None
+
+
+def test_reader_never_sees_another_texts_vector_while_writer_evicts(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), max_entries=10)
+    writer.put_many([key(i) for i in range(10)], [vector(i) for i in range(10)])
+    writer.flush()
+    reader = EmbeddingCache(str(tmp_path), max_entries=10, read_only=True)
+
+    # Full cache: these evict the oldest entries before the writer flushes its key index
+    writer.put_many([key(i) for i in range(100, 105)], [vector(i) for i in range(100, 105)])
+    for i, result in enumerate(reader.get_many([key(i) for i in range(10)])):
+        assert result is not None and result.tolist() == vector(i).tolist()
+
+    writer.flush()
+    assert writer.generation > 0
+    assert not os.path.exists(tmp_path / "vectors.f32")
+    results = reader.get_many([key(i) for i in range(10)] + [key(i) for i in range(100, 105)])
+    for i, result in zip(list(range(10)) + list(range(100, 105)), results):
+        assert result is None or result.tolist() == vector(i).tolist()
+    assert results[-1].tolist() == vector(104).tolist()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=10)
+    cache.put_many([key(i) for i in range(10)], [vector(i) for i in range(10)])
+    cache.get_many([key(0)])  # Recently used, so it survives
+    cache.put_many([key(10)], [vector(10)])
+    assert cache.evictions == 1
+    assert cache.get_many([key(1)])[0] is None
+    assert cache.get_many([key(0)])[0].tolist() == vector(0).tolist()
+    assert cache.get_many([key(10)])[0].tolist() == vector(10).tolist()
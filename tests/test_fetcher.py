@@ -0,0 +1,132 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from fetcher import Fetcher, HostRateLimiter
+
+
+class Site:
+    """Pages served with ETags; a request whose If-None-Match is current gets 304."""
+
+    def __init__(self):
+        self.pages = {"/fees": b"<html>Fees: 1.5 lakh</html>", "/fees.pdf": b"%PDF-1.4 fees" * 1000}
+        self.versions = {path: 1 for path in self.pages}
+        self.requests = []
+
+    def etag(self, path):
+        return f'"v{self.versions[path]}"'
+
+    def update(self, path, body):
+        self.pages[path] = body
+        self.versions[path] += 1
+
+
+@pytest.fixture
+def site():
+    site = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            site.requests.append((self.path, self.headers.get("If-None-Match")))
+            if self.path not in site.pages:
+                self.send_response(404)
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == site.etag(self.path):
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = site.pages[self.path]
+            self.send_response(200)
+            self.send_header("ETag", site.etag(self.path))
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    site.base = f"http://127.0.0.1:{server.server_port}"
+    yield site
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(tmp_path):
+    return Fetcher({"User-Agent": "test"}, per_host_interval=0, retries=0, cache_dir=str(tmp_path / "http_cache"))
+
+
+def test_unchanged_page_is_revalidated_with_a_conditional_get(site, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    first = fetcher.get(site.base + "/fees")
+    assert first.status == 200 and not first.not_modified
+    second = fetcher.get(site.base + "/fees")
+    assert second.not_modified and second.status == 304
+    assert second.text == "<html>Fees: 1.5 lakh</html>"
+    assert second.content_type == "text/html; charset=utf-8"
+    assert site.requests == [("/fees", None), ("/fees", '"v1"')]
+    assert fetcher.stats == {"requests": 2, "not_modified": 1}
+
+
+def test_changed_page_is_downloaded_again(site, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    fetcher.get(site.base + "/fees")
+    site.update("/fees", b"<html>Fees: 1.6 lakh</html>")
+    result = fetcher.get(site.base + "/fees")
+    assert not result.not_modified and result.text == "<html>Fees: 1.6 lakh</html>"
+    assert fetcher.get(site.base + "/fees").text == "<html>Fees: 1.6 lakh</html>"
+
+
+def test_validators_survive_a_restart(site, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    fetcher.get(site.base + "/fees")
+    fetcher.close()
+    assert make_fetcher(tmp_path).get(site.base + "/fees").not_modified
+
+
+def test_use_cache_false_sends_no_validators(site, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    fetcher.get(site.base + "/fees")
+    assert not fetcher.get(site.base + "/fees", use_cache=False).not_modified
+    assert site.requests[-1] == ("/fees", None)
+
+
+def test_missing_page_raises(site, tmp_path):
+    requests = pytest.importorskip("requests")
+    with pytest.raises(requests.HTTPError):
+        make_fetcher(tmp_path).get(site.base + "/missing")
+
+
+def test_download_revalidates_only_after_remember(site, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    dest = tmp_path / "fees.pdf"
+    result = fetcher.download(site.base + "/fees.pdf", str(dest), revalidate=True)
+    assert dest.read_bytes() == site.pages["/fees.pdf"] and result.content == b""
+    # Not processed yet, so nothing remembered: the next run downloads it again
+    assert not fetcher.download(site.base + "/fees.pdf", str(dest), revalidate=True).not_modified
+    fetcher.remember(result)
+
+    dest.write_bytes(b"extracted elsewhere")
+    assert fetcher.download(site.base + "/fees.pdf", str(dest), revalidate=True).not_modified
+    assert dest.read_bytes() == b"extracted elsewhere"  # A 304 leaves the file alone
+
+    site.update("/fees.pdf", b"%PDF-1.4 revised fees")
+    assert not fetcher.download(site.base + "/fees.pdf", str(dest), revalidate=True).not_modified
+    assert dest.read_bytes() == b"%PDF-1.4 revised fees"
+
+
+def test_host_rate_limiter_spaces_requests_to_one_host():
+    limiter = HostRateLimiter(0.05)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait("https://www.apsit.edu.in/a")
+    limiter.wait("https://mu.ac.in/")  # Other hosts don't wait
+    assert 0.1 <= time.monotonic() - start < 0.5
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+import ingest
+import vector_store
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+
+DIM = 16
+
+
+class CountingModel:
+    """Deterministic stand-in for MiniLM that records how many texts it embedded."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text):
+        rng = np.random.default_rng(sum(map(ord, text)))
+        vector = rng.standard_normal(DIM).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Runs ingest in an empty tree (all its paths are relative) with a fake embedding model."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(ingest.DATA_PATH)
+    model = CountingModel()
+    monkeypatch.setattr(ingest, "load_embeddings",
+                        lambda backend=None: CachedEmbeddings(model, EmbeddingCache(str(tmp_path / "cache"))))
+    return tmp_path, model
+
+
+def write(name, text):
+    with open(os.path.join(ingest.DATA_PATH, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def run(**kwargs):
+    ingest.create_vector_db_advanced(workers=1, strip_boilerplate=False, **kwargs)
+    with open(ingest.MANIFEST_PATH, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    db = vector_store.load_store(ingest.DB_FAISS_PATH, CachedEmbeddings(CountingModel(), EmbeddingCache(
+        os.path.join(os.getcwd(), "cache"), read_only=True)))
+    contents = sorted(db.docstore.search(db.index_to_docstore_id[i]).page_content
+                      for i in range(db.index.ntotal))
+    return manifest["files"], contents
+
+
+def path(name):
+    return os.path.join(ingest.DATA_PATH, name)
+
+
+def test_incremental_run_only_embeds_new_and_changed_files(workspace):
+    _, model = workspace
+    write("fees.txt", "Tuition fees are 1.5 lakh per year.")
+    write("hostel.txt", "The hostel has two hundred rooms.")
+    write("library.txt", "The library opens at 9 am.")
+    files, contents = run()
+    assert len(contents) == 3
+    hostel_ids = files[path("hostel.txt")]["chunk_ids"]
+
+    write("fees.txt", "Tuition fees are 1.6 lakh per year.")
+    os.remove(path("library.txt"))
+    write("canteen.txt", "The canteen serves lunch from noon.")
+    model.embedded = 0
+    files, contents = run(incremental=True)
+    assert contents == ["The canteen serves lunch from noon.", "The hostel has two hundred rooms.",
+                        "Tuition fees are 1.6 lakh per year."]
+    assert sorted(files) == [path("canteen.txt"), path("fees.txt"), path("hostel.txt")]
+    assert files[path("hostel.txt")]["chunk_ids"] == hostel_ids
+    assert model.embedded == 2  # Only the edited and the new file
+
+
+def test_unchanged_tree_leaves_the_index_alone(workspace):
+    write("fees.txt", "Tuition fees are 1.5 lakh per year.")
+    run()
+    commit_path = os.path.join(ingest.DB_FAISS_PATH, "store.json")
+    mtime = os.stat(commit_path).st_mtime_ns
+    files, contents = run(incremental=True)
+    assert os.stat(commit_path).st_mtime_ns == mtime
+    assert contents == ["Tuition fees are 1.5 lakh per year."]
+
+
+def test_change_log_limits_rehashing_and_is_consumed(workspace):
+    write("fees.txt", "Tuition fees are 1.5 lakh per year.")
+    write("hostel.txt", "The hostel has two hundred rooms.")
+    run()
+    write("fees.txt", "Tuition fees are 1.6 lakh per year.")
+    write("hostel.txt", "The hostel has three hundred rooms.")  # Not in the log, so trusted as unchanged
+    changes = "changes.json"
+    with open(changes, "w", encoding="utf-8") as f:
+        json.dump({"sequence": 1, "consumed": False, "added": [], "modified": ["fees.txt"], "removed": []}, f)
+    _, contents = run(incremental=True, changes_path=changes)
+    assert contents == ["The hostel has two hundred rooms.", "Tuition fees are 1.6 lakh per year."]
+    with open(changes, "r", encoding="utf-8") as f:
+        assert json.load(f)["consumed"] is True
+
+    # A consumed log is ignored: every file is hashed again
+    _, contents = run(incremental=True, changes_path=changes)
+    assert contents == ["The hostel has three hundred rooms.", "Tuition fees are 1.6 lakh per year."]
+
+
+def test_changed_chunk_settings_force_a_full_rebuild(workspace, monkeypatch):
+    write("fees.txt", "Tuition fees are 1.5 lakh per year.")
+    run()
+    monkeypatch.setattr(ingest, "CHUNK_SIZE", ingest.CHUNK_SIZE + 1)
+    files, _ = run(incremental=True)
+    with open(ingest.MANIFEST_PATH, "r", encoding="utf-8") as f:
+        assert json.load(f)["settings"]["chunk_size"] == ingest.CHUNK_SIZE
+    assert list(files) == [path("fees.txt")]
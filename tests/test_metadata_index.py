@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from metadata_index import UNDATED, MetadataIndex, academic_year, classify_query, derive_metadata, filter_key
+
+
+def test_classify_query_picks_explicit_mentions():
+    assert classify_query("IT syllabus for 2024-25") == {
+        "department": ["it", "general"], "doc_type": "syllabus", "year": ["2024-25", UNDATED]}
+    assert classify_query("placements in civil") == {"department": ["civil", "general"], "doc_type": "placement"}
+
+
+def test_classify_query_leaves_vague_questions_unfiltered():
+    assert classify_query("what is the fee?") is None
+    # "it" as a pronoun is not the IT department
+    assert classify_query("where is it located") is None
+
+
+def test_filter_key_is_order_independent_and_hashable():
+    a = filter_key({"department": ["it", "general"], "year": "2024"})
+    b = filter_key({"year": "2024", "department": ["general", "it"]})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert filter_key(None) is None and filter_key({}) is None
+    assert filter_key({"department": "it"}) != filter_key({"department": "civil"})
+
+
+def test_academic_year_normalizes_formats():
+    assert academic_year("EOA_Report_22-23") == "2022-23"
+    assert academic_year("Calendar 2025_26") == "2025-26"
+    assert academic_year("Approval 2014-15") == "2014-15"
+    assert academic_year("GR 2020") == "2020"
+    assert academic_year("no year here") is None
+
+
+def test_derive_metadata_from_file_name():
+    metadata = derive_metadata("scraper/data/IT_Syllabus_All_Years_R-19_Scheme_Updated.txt", "txt")
+    assert metadata["department"] == "it"
+    assert metadata["doc_type"] == "syllabus"
+    assert derive_metadata("scraper/data/library_table_0.csv", "csv")["doc_type"] == "table"
+
+
+def test_positions_intersect_fields_and_expand_years():
+    index = MetadataIndex.build([
+        {"department": "it", "doc_type": "syllabus", "year": "2023-24"},
+        {"department": "civil", "doc_type": "syllabus", "year": "2024-25"},
+        {"department": "it", "doc_type": "placement", "year": "2024-25"},
+        {"department": "general", "doc_type": "admission"},
+    ])
+    assert index.positions(None) is None
+    assert index.positions({"department": "it"}).tolist() == [0, 2]
+    assert index.positions({"department": ["it", "general"], "doc_type": "syllabus"}).tolist() == [0]
+    # A calendar year matches both academic years it falls in
+    assert index.positions({"year": "2024"}).tolist() == [0, 1, 2]
+    assert index.positions({"department": "mechanical"}).tolist() == []
+    with pytest.raises(ValueError):
+        index.positions({"campus": "thane"})
+
+
+def test_classified_year_still_allows_undated_documents():
+    # Most files carry no year: "where is the library in 2023?" must still reach library.txt
+    index = MetadataIndex.build([
+        derive_metadata("scraper/data/library.txt", "txt"),
+        derive_metadata("scraper/data/EOA_Report_22-23.txt", "txt"),
+        derive_metadata("scraper/data/EOA_Report_24-25.txt", "txt"),
+        derive_metadata("scraper/data/cseaiml-placement-data.txt", "txt"),
+    ])
+    assert index.positions(classify_query("where is the library in 2023?")).tolist() == [0, 1, 3]
+    question = "What was the highest package for CSE AI&ML placements in 2024-25?"
+    assert index.positions(classify_query(question)).tolist() == [3]
+    # An explicit year filter stays strict unless it asks for undated documents too
+    assert index.positions({"year": "2024-25"}).tolist() == [2]
+    assert index.positions({"year": UNDATED}).tolist() == [0, 3]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    index = MetadataIndex.build([{"department": "it"}, {"department": "civil"}])
+    index.save(str(tmp_path))
+    loaded = MetadataIndex.load(str(tmp_path))
+    assert loaded.n_chunks == 2
+    assert loaded.positions({"department": "civil"}).tolist() == [1]
+    assert MetadataIndex.load(str(tmp_path / "missing")) is None
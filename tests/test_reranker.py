@@ -0,0 +1,80 @@
+import sys
+import time
+import types
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import reranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how often the question's words occur in the chunk; each pair costs `delay` seconds."""
+
+    delay = 0.0
+
+    def __init__(self, model_name, max_length=512, device="cpu"):
+        self.predicted = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay * len(pairs))
+        self.predicted += len(pairs)
+        return [float(sum(text.lower().split().count(word) for word in query.lower().split()))
+                for query, text in pairs]
+
+
+@pytest.fixture
+def make_reranker(monkeypatch):
+    # The real cross-encoder is a model download; the scoring loop around it is what is tested here
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+
+    def make(delay=0.0, **kwargs):
+        monkeypatch.setattr(FakeCrossEncoder, "delay", delay)
+        return reranker.CrossEncoderReranker(**kwargs)
+
+    return make
+
+
+CANDIDATES = [(f"chunk-{i}", text) for i, text in enumerate([
+    "library timings", "hostel fee per year", "fee refund policy", "fee structure and fee refund",
+    "placement statistics", "canteen menu", "bus routes", "exam calendar", "sports day", "alumni meet",
+])]
+
+
+def test_rerank_orders_candidates_by_score(make_reranker):
+    scorer = make_reranker()
+    assert scorer.rerank("fee refund", CANDIDATES, 3) == ["chunk-3", "chunk-2", "chunk-1"]
+    assert scorer.stats["pairs_scored"] == len(CANDIDATES)
+
+
+def test_scores_are_cached_per_normalized_question(make_reranker):
+    scorer = make_reranker()
+    scorer.rerank("Fee  Refund", CANDIDATES, 3)
+    assert scorer.rerank("fee refund", CANDIDATES, 3) == ["chunk-3", "chunk-2", "chunk-1"]
+    assert scorer.model.predicted == len(CANDIDATES)
+
+
+def test_time_budget_stops_scoring_and_keeps_unscored_candidates_last(make_reranker):
+    scorer = make_reranker(delay=0.01, batch_size=2, time_budget_ms=50)
+    ranked = scorer.rerank("fee refund", CANDIDATES, len(CANDIDATES))
+    scored = scorer.stats["pairs_scored"]
+    assert 2 <= scored < len(CANDIDATES)
+    assert scorer.stats["budget_exceeded"] == 1
+    # Unscored candidates follow the scored ones in first-stage order
+    assert ranked[scored:] == [chunk_id for chunk_id, _ in CANDIDATES[scored:]]
+
+
+def test_measured_cost_caps_the_pairs_of_later_requests(make_reranker):
+    scorer = make_reranker(delay=0.01, batch_size=2, time_budget_ms=50)
+    scorer.rerank("fee refund", CANDIDATES[:2], 2)  # Measures ~10 ms per pair
+    before = scorer.stats["pairs_scored"]
+    scorer.rerank("placement statistics", CANDIDATES, 3)
+    assert scorer.stats["pairs_scored"] - before <= 5
+    assert scorer.stats["budget_exceeded"] >= 1
+
+
+def test_no_budget_scores_every_candidate(make_reranker):
+    scorer = make_reranker(delay=0.001, batch_size=3)
+    scorer.rerank("exam calendar", CANDIDATES, 1)
+    assert scorer.stats == {"requests": 1, "pairs_scored": len(CANDIDATES), "budget_exceeded": 0}
@@ -0,0 +1,187 @@
+import re
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+import retrieval
+from bm25_index import BM25Index
+from metadata_index import MetadataIndex
+from retrieval import CampusRetriever, TTLCache, normalize_query
+
+DIM = 64
+CHUNKS = [
+    ("it-syllabus", "IT department syllabus for the R-19 scheme", {"department": "it", "doc_type": "syllabus"}),
+    ("fees", "Admission fee structure for first year students", {"department": "general", "doc_type": "fees"}),
+    ("civil-placements", "Civil department placement statistics", {"department": "civil", "doc_type": "placement"}),
+    ("refund", "Fee refund policy for cancelled admission", {"department": "general", "doc_type": "fees"}),
+    ("it-placements", "IT department placement statistics", {"department": "it", "doc_type": "placement"}),
+]
+
+
+def embed(text):
+    """Bag of words hashed into DIM buckets: texts sharing words score higher, deterministically."""
+    vector = np.zeros(DIM, dtype=np.float32)
+    for word in re.findall(r"[a-z0-9-]+", text.lower()):
+        vector[sum(map(ord, word)) % DIM] += 1.0
+    return vector / max(np.linalg.norm(vector), 1e-6)
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return embed(text).tolist()
+
+    def embed_documents(self, texts):
+        return [embed(text).tolist() for text in texts]
+
+
+class FakeDocstore:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def search(self, doc_id):
+        return self.docs.get(doc_id, f"ID {doc_id} not found.")
+
+
+def make_store(chunks=CHUNKS):
+    index = faiss.IndexFlatIP(DIM)
+    index.add(np.vstack([embed(text) for _, text, _ in chunks]))
+    return types.SimpleNamespace(
+        index=index,
+        index_to_docstore_id={i: doc_id for i, (doc_id, _, _) in enumerate(chunks)},
+        docstore=FakeDocstore({doc_id: Document(page_content=text, metadata=metadata)
+                               for doc_id, text, metadata in chunks}),
+        embedding_function=FakeEmbeddings(),
+    )
+
+
+def make_retriever(**kwargs):
+    kwargs.setdefault("store", make_store())
+    kwargs.setdefault("metadata_index", MetadataIndex.build([metadata for _, _, metadata in CHUNKS]))
+    return CampusRetriever(**kwargs)
+
+
+def contents(docs):
+    return [doc.page_content for doc in docs]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(retrieval, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = TTLCache(ttl=10.0)
+    cache.put("a", 1)
+    now[0] += 5
+    assert cache.get("a") == 1
+    now[0] += 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_normalize_query_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_query("  What is the   FEE? ") == normalize_query("what is the fee") == "what is the fee"
+
+
+def test_dense_search_returns_closest_chunks():
+    retriever = make_retriever(k=2)
+    assert contents(retriever.invoke("fee refund policy"))[0] == "Fee refund policy for cancelled admission"
+
+
+def test_filters_restrict_the_search_to_matching_chunks():
+    retriever = make_retriever(k=2)
+    docs = retriever.retrieve("placement statistics", {"department": "it"})
+    assert contents(docs) == ["IT department placement statistics", "IT department syllabus for the R-19 scheme"]
+    assert retriever.retrieve("placement statistics", {"department": "mechanical"}) == []
+
+
+def test_auto_filter_falls_back_to_an_unfiltered_search():
+    retriever = make_retriever(k=2, auto_filter=True)
+    # classify_query picks department=civil (+ general); only one civil/general placement chunk exists
+    docs = retriever.retrieve("civil placement statistics")
+    assert len(docs) == 2
+    assert contents(docs)[0] == "Civil department placement statistics"
+
+
+def test_year_in_the_question_does_not_hide_undated_documents():
+    chunks = [
+        ("library", "The library is on the second floor", {"department": "general", "doc_type": "general"}),
+        ("eoa-2023", "Extension of approval 2023-24", {"department": "general", "doc_type": "approval",
+                                                       "year": "2023-24"}),
+        ("eoa-2025", "Extension of approval 2025-26", {"department": "general", "doc_type": "approval",
+                                                       "year": "2025-26"}),
+    ]
+    retriever = make_retriever(k=1, auto_filter=True, store=make_store(chunks),
+                               metadata_index=MetadataIndex.build([metadata for _, _, metadata in chunks]))
+    # A hard year filter would leave exactly k (wrong) hits, so the unfiltered fallback would never run
+    assert contents(retriever.retrieve("where is the library in 2023")) == ["The library is on the second floor"]
+    assert contents(retriever.retrieve("extension of approval 2025")) == ["Extension of approval 2025-26"]
+
+
+def test_hybrid_search_fuses_dense_and_bm25_hits():
+    sparse = BM25Index.build([doc_id for doc_id, _, _ in CHUNKS], [text for _, text, _ in CHUNKS])
+    retriever = make_retriever(k=3, sparse_index=sparse, fetch_k=5)
+    docs = retriever.retrieve("r-19 syllabus")
+    assert contents(docs)[0] == "IT department syllabus for the R-19 scheme"
+    assert len(docs) == 3
+    docs = retriever.retrieve("fee refund", {"doc_type": "fees"})
+    assert set(contents(docs)) == {"Fee refund policy for cancelled admission",
+                                   "Admission fee structure for first year students"}
+
+
+def test_result_cache_is_keyed_on_the_normalized_query_and_filters():
+    retriever = make_retriever(k=1, result_cache=TTLCache(), embedding_cache=TTLCache())
+    retriever.retrieve("Placement statistics?")
+    retriever.retrieve("placement statistics")
+    assert retriever.result_cache.hits == 1
+    retriever.retrieve("fee refund")
+    assert retriever.result_cache.hits == 1 and len(retriever.result_cache) == 2
+    retriever.retrieve("fee refund", {"department": "general"})
+    assert retriever.result_cache.hits == 1 and len(retriever.result_cache) == 3
+    assert len(retriever.embedding_cache) == 2  # A result-cache hit skips embedding; filters don't change it
+
+
+def test_index_change_on_disk_reloads_the_store(tmp_path):
+    (tmp_path / "store.json").write_text('{"format": "mmap", "version": 1}')
+    reloaded = make_store(CHUNKS[:1])
+    sparse = BM25Index.build(["it-syllabus"], [CHUNKS[0][1]])
+    retriever = make_retriever(k=1, db_path=str(tmp_path), store_loader=lambda: reloaded, check_interval=0,
+                               sparse_loader=lambda: sparse, result_cache=TTLCache())
+    assert contents(retriever.retrieve("fee refund")) == ["Fee refund policy for cancelled admission"]
+    (tmp_path / "store.json").write_text('{"format": "mmap", "version": 2}')
+    assert contents(retriever.retrieve("fee refund")) == ["IT department syllabus for the R-19 scheme"]
+    assert retriever.store is reloaded
+    assert retriever.sparse_index is sparse  # Hybrid mode reloads BM25 with the store
+
+
+def test_micro_batched_search_matches_unbatched_results():
+    queries = ["fee refund", "placement statistics", "r-19 syllabus", "admission fee", "civil department",
+               "first year students", "fee refund", "it placement"]
+    plain = make_retriever(k=3)
+    batched = make_retriever(k=3, micro_batch=True, batch_wait_ms=20)
+    expected = [contents(plain.retrieve(query)) for query in queries]
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        # Every caller must get back the rows of its own query, not a neighbour's in the batch
+        results = list(pool.map(lambda query: contents(batched.retrieve(query)), queries * 4))
+    assert results == expected * 4
+    assert batched._search_batcher.items == len(queries) * 4
+
+    batched.close()
+    assert not batched._embed_batcher._thread.is_alive() and not batched._search_batcher._thread.is_alive()
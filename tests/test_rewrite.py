@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import metrics
+from rag_chain_builder import QuestionContextualizer
+
+HISTORY = [HumanMessage(content="What is the fee for IT?"), AIMessage(content="1.5 lakh per year.")]
+
+
+class FakeRewrite:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return f"rewritten: {inputs['input']}"
+
+    async def ainvoke(self, inputs):
+        return self.invoke(inputs)
+
+
+def test_skip_reasons():
+    contextualizer = QuestionContextualizer(FakeRewrite())
+    assert contextualizer.skip_reason("what about hostel?", []) == "no_history"
+    assert contextualizer.skip_reason("Where is the central library located?", HISTORY) == "self_contained"
+    assert contextualizer.skip_reason("what about civil?", HISTORY) is None
+    assert contextualizer.skip_reason("Is it refundable?", HISTORY) is None
+    always = QuestionContextualizer(FakeRewrite(), mode="always_rewrite")
+    assert always.skip_reason("Where is the central library located?", HISTORY) is None
+
+
+def test_embedding_mode_rewrites_questions_close_to_the_previous_turn():
+    vectors = {"What is the fee for IT?": [1.0, 0.0], "Is the hostel fee separate from tuition": [0.9, 0.1],
+               "Where is the central library located?": [0.0, 1.0]}
+    contextualizer = QuestionContextualizer(FakeRewrite(), embed=vectors.get, mode="embedding")
+    assert contextualizer.skip_reason("Is the hostel fee separate from tuition", HISTORY) is None
+    assert contextualizer.skip_reason("Where is the central library located?", HISTORY) == "topic_change"
+
+
+def test_decision_is_recorded_on_the_request_trace():
+    rewrite = FakeRewrite()
+    contextualizer = QuestionContextualizer(rewrite)
+    trace = metrics.start_trace("chat", sample_rate=1.0)
+    try:
+        result = contextualizer.invoke({"input": "what about civil?", "chat_history": HISTORY})
+    finally:
+        metrics.finish_trace(trace)
+    assert result["standalone_question"] == "rewritten: what about civil?"
+    assert trace.attributes["rewrite_ran"] is True and trace.attributes["rewrite_skip_reason"] is None
+
+    trace = metrics.start_trace("chat_stream", sample_rate=1.0)
+    try:
+        result = asyncio.run(contextualizer.ainvoke({"input": "what about civil?", "chat_history": []}))
+    finally:
+        metrics.finish_trace(trace)
+    assert result["standalone_question"] == "what about civil?"
+    assert trace.attributes["rewrite_ran"] is False and trace.attributes["rewrite_skip_reason"] == "no_history"
+    assert rewrite.calls == 1
+    assert (contextualizer.rewrites, contextualizer.skips) == (1, 1)
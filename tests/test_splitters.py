@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("langchain_text_splitters")
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from splitters import HeadingSplitter, TableSplitter, get_splitter, is_heading
+
+CSV = "Rank,Name,Branch,Score\n" + "\n".join(f"{i},Student {i},IT,{90 - i / 10:.1f}" for i in range(1, 41))
+
+
+def test_table_chunks_keep_whole_rows_under_the_header():
+    chunks = TableSplitter(chunk_size=300).split_documents(
+        [Document(page_content=CSV, metadata={"source": "data/merit_list_table_0.csv"})])
+    assert len(chunks) > 1
+    for chunk in chunks:
+        lines = chunk.page_content.splitlines()
+        assert lines[:2] == ["Table: merit_list_table_0", "Columns: Rank, Name, Branch, Score"]
+        assert all(line.startswith("Rank: ") and line.count(" | ") == 3 for line in lines[2:])
+        assert len(chunk.page_content) <= 300
+        assert chunk.metadata["columns"] == ["Rank", "Name", "Branch", "Score"]
+        assert chunk.metadata["source"] == "data/merit_list_table_0.csv"
+    # Row ranges cover every row exactly once, in order
+    ranges = [(chunk.metadata["row_start"], chunk.metadata["row_end"]) for chunk in chunks]
+    assert ranges[0][0] == 0 and ranges[-1][1] == 39
+    assert all(end + 1 == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert "Rank: 3 | Name: Student 3 | Branch: IT | Score: 89.7" in chunks[0].page_content
+
+
+def test_table_records_skip_empty_cells_and_empty_tables():
+    chunks = TableSplitter(chunk_size=1000).split_documents([
+        Document(page_content="Day,Time,Room\nMonday,,101\n", metadata={"source": "t_table_1.csv"}),
+        Document(page_content="Day,Time\n", metadata={"source": "t_table_2.csv"}),
+    ])
+    assert len(chunks) == 1
+    assert chunks[0].page_content.splitlines()[-1] == "Day: Monday | Room: 101"
+
+
+def test_is_heading():
+    for line in ["Semester III", "Module 2: Data Structures", "Course Code: ITC302", "2.1 Linked Lists",
+                 "TEXT BOOKS", "EXAMINATION SCHEME", "G.R. No. 123"]:
+        assert is_heading(line), line
+    for line in ["CSDO", "The semester starts in July.", "", "x" * 150]:
+        assert not is_heading(line), line
+
+
+def test_heading_chunks_carry_their_section():
+    body = "Topics covered in depth. " * 30
+    text = f"Semester III\n{body}\nModule 1: Arrays\n{body}\nModule 2: Linked Lists\n{body}"
+    chunks = HeadingSplitter(chunk_size=400, chunk_overlap=50).split_documents(
+        [Document(page_content=text, metadata={"source": "IT_Syllabus.txt", "department": "it"})])
+    sections = [chunk.metadata.get("section") for chunk in chunks]
+    assert sections[0] == "Semester III"
+    assert "Module 1: Arrays" in sections and "Module 2: Linked Lists" in sections
+    for chunk in chunks:
+        assert chunk.page_content.startswith(chunk.metadata["section"]) \
+            or chunk.page_content.startswith(f"[{chunk.metadata['section']}]")
+        assert len(chunk.page_content) <= 400
+        assert chunk.metadata["department"] == "it"
+
+
+def test_short_sections_fold_into_the_next():
+    text = "Semester III\nShort intro.\nModule 1: Arrays\n" + "Array topics. " * 50
+    sections = HeadingSplitter(chunk_size=2000, chunk_overlap=100).sections(text)
+    assert len(sections) == 1
+    assert sections[0][0] == "Semester III"
+
+
+def test_get_splitter_picks_by_kind_and_file_name():
+    assert isinstance(get_splitter("data/fees_table_0.csv", "csv", 1500, 200), TableSplitter)
+    assert isinstance(get_splitter("data/IT_Syllabus_R-19.txt", "txt", 1500, 200), HeadingSplitter)
+    assert isinstance(get_splitter("data/GR_2020_fees.txt", "txt", 1500, 200), HeadingSplitter)
+    default = get_splitter("data/grievance_cell.txt", "txt", 1500, 200)
+    assert isinstance(default, RecursiveCharacterTextSplitter)
+    assert default.split_documents([Document(page_content="About us.")])[0].metadata["start_index"] == 0
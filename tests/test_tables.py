@@ -0,0 +1,78 @@
+import os
+import importlib
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+from bs4 import BeautifulSoup
+
+
+@pytest.fixture(scope="module")
+def scraper(tmp_path_factory):
+    # Importing the scraper creates its data dir and log file in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("scraper"))
+    try:
+        return importlib.import_module("main")
+    finally:
+        os.chdir(cwd)
+
+
+def frame(scraper, html):
+    table = BeautifulSoup(html, "lxml").find("table")
+    return scraper.table_to_frame(table)
+
+
+def test_plain_table_uses_th_row_as_header(scraper):
+    df = frame(scraper, """<table>
+        <tr><th>Branch</th><th>Intake</th></tr>
+        <tr><td>IT</td><td>120</td></tr>
+        <tr><td>Civil</td><td>60</td></tr></table>""")
+    assert list(df.columns) == ["Branch", "Intake"]
+    assert df.values.tolist() == [["IT", "120"], ["Civil", "60"]]
+
+
+def test_colspan_and_rowspan_keep_later_cells_in_their_columns(scraper):
+    df = frame(scraper, """<table>
+        <thead>
+          <tr><th rowspan="2">Subject</th><th colspan="2">Marks</th><th rowspan="2">Credits</th></tr>
+          <tr><th>Theory</th><th>Practical</th></tr>
+        </thead>
+        <tbody>
+          <tr><td rowspan="2">Maths</td><td>80</td><td>20</td><td>4</td></tr>
+          <tr><td>75</td><td>25</td><td>3</td></tr>
+          <tr><td>Lab</td><td colspan="2">100</td><td>2</td></tr>
+        </tbody></table>""")
+    assert list(df.columns) == ["Subject", "Marks Theory", "Marks Practical", "Credits"]
+    assert df.values.tolist() == [
+        ["Maths", "80", "20", "4"],
+        ["Maths", "75", "25", "3"],
+        ["Lab", "100", "100", "2"],
+    ]
+
+
+def test_nested_table_rows_stay_out_of_the_outer_table(scraper):
+    df = frame(scraper, """<table>
+        <tr><th>Name</th><th>Contact</th></tr>
+        <tr><td>Library</td><td><table><tr><td>Ext</td><td>201</td></tr></table></td></tr>
+        </table>""")
+    assert list(df.columns) == ["Name", "Contact"]
+    assert len(df) == 1
+    assert df.iloc[0, 0] == "Library"
+
+
+def test_bogus_spans_are_clamped(scraper):
+    df = frame(scraper, """<table>
+        <tr><td colspan="abc">A</td><td colspan="0">B</td></tr>
+        <tr><td rowspan="999999999">C</td><td>D</td></tr></table>""")
+    assert df.values.tolist()[0] == ["A", "B"]
+    assert len(df) == 2 and df.shape[1] == 2
+
+
+def test_short_rows_are_padded_and_empty_tables_are_empty(scraper):
+    df = frame(scraper, "<table><tr><td>A</td><td>B</td><td>C</td></tr><tr><td>D</td></tr></table>")
+    assert df.values.tolist() == [["A", "B", "C"], ["D", "", ""]]
+    assert frame(scraper, "<table><tr><td></td></tr></table>").empty
@@ -0,0 +1,131 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+import vector_store
+from retrieval import index_signature
+
+DIM = 16
+TEXTS = ["Tuition fees are 1.5 lakh per year.", "The library opens at 8 am.", "Placements: 120 offers in 2024."]
+
+
+class FakeEmbeddings(Embeddings):
+    def _vector(self, text):
+        rng = np.random.default_rng(sum(map(ord, text)))
+        vector = rng.standard_normal(DIM).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def make_db(texts=TEXTS):
+    return FAISS.from_documents([Document(page_content=text, metadata={"source": f"data/{i}.txt", "chunk": i})
+                                 for i, text in enumerate(texts)], FakeEmbeddings())
+
+
+def store_files(db_path):
+    return sorted(name for name in os.listdir(db_path) if vector_store.STORE_FILE_PATTERN.match(name))
+
+
+def test_mmap_round_trip(tmp_path):
+    db = make_db()
+    vector_store.save_store(db, str(tmp_path), "mmap", FakeEmbeddings())
+    assert vector_store.store_format(str(tmp_path)) == "mmap"
+    assert store_files(tmp_path) == ["docstore.1.sqlite", "index.1.faiss", "vectors.1.npy"]
+
+    loaded = vector_store.load_store(str(tmp_path), FakeEmbeddings())
+    assert loaded.index.ntotal == len(TEXTS)
+    for position in range(len(TEXTS)):
+        doc_id = db.index_to_docstore_id[position]
+        assert loaded.index_to_docstore_id[position] == doc_id
+        assert loaded.docstore.search(doc_id).page_content == TEXTS[position]
+        assert loaded.docstore.search(doc_id).metadata == {"source": f"data/{position}.txt", "chunk": position}
+    assert loaded.similarity_search(TEXTS[1], k=1)[0].page_content == TEXTS[1]
+
+    vectors = vector_store.load_vectors(str(tmp_path))
+    assert isinstance(vectors, np.memmap)
+    assert np.allclose(vectors, FakeEmbeddings().embed_documents(TEXTS))
+
+    writable = vector_store.load_store(str(tmp_path), FakeEmbeddings(), writable=True)
+    writable.add_texts(["The canteen serves lunch."])
+    assert writable.index.ntotal == len(TEXTS) + 1
+
+
+def test_pickle_round_trip(tmp_path):
+    vector_store.save_store(make_db(), str(tmp_path), "pickle")
+    assert vector_store.store_format(str(tmp_path)) == "pickle"
+    assert store_files(tmp_path) == ["index.1.faiss", "index.1.pkl"]
+    assert vector_store.load_vectors(str(tmp_path)) is None
+    loaded = vector_store.load_store(str(tmp_path), FakeEmbeddings())
+    assert loaded.similarity_search(TEXTS[2], k=1)[0].page_content == TEXTS[2]
+
+
+def test_each_save_is_a_new_version_and_the_previous_one_is_kept(tmp_path):
+    db_path = str(tmp_path)
+    vector_store.save_store(make_db(), db_path, "mmap", FakeEmbeddings())
+    vector_store.save_store(make_db(TEXTS[:2]), db_path, "mmap", FakeEmbeddings())
+    assert store_files(tmp_path) == ["docstore.1.sqlite", "docstore.2.sqlite", "index.1.faiss", "index.2.faiss",
+                                     "vectors.1.npy", "vectors.2.npy"]
+    assert vector_store.load_store(db_path, FakeEmbeddings()).index.ntotal == 2
+
+    # Switching format: version 2 stays for servers that still have it open, version 1 goes
+    vector_store.save_store(make_db(), db_path, "pickle")
+    assert json.loads((tmp_path / "store.json").read_text()) == {"format": "pickle", "version": 3}
+    assert store_files(tmp_path) == ["docstore.2.sqlite", "index.2.faiss", "index.3.faiss", "index.3.pkl",
+                                     "vectors.2.npy"]
+    assert vector_store.load_store(db_path, FakeEmbeddings()).index.ntotal == len(TEXTS)
+
+
+def test_signature_changes_only_when_the_store_commits(tmp_path, monkeypatch):
+    db_path = str(tmp_path)
+    assert index_signature(db_path) is None
+    vector_store.save_store(make_db(), db_path, "mmap", FakeEmbeddings())
+    committed = index_signature(db_path)
+    assert committed is not None
+
+    # A save that dies after writing its files but before store.json leaves the old store in place
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", crash)
+    with pytest.raises(OSError):
+        vector_store.save_store(make_db(TEXTS[:2]), db_path, "mmap", FakeEmbeddings())
+    monkeypatch.undo()
+    assert index_signature(db_path) == committed
+    assert vector_store.load_store(db_path, FakeEmbeddings()).index.ntotal == len(TEXTS)
+
+    vector_store.save_store(make_db(TEXTS[:2]), db_path, "mmap", FakeEmbeddings())
+    assert index_signature(db_path) != committed
+    assert vector_store.load_store(db_path, FakeEmbeddings()).index.ntotal == 2
+
+
+def test_store_saved_before_the_commit_file_still_loads(tmp_path):
+    db_path = str(tmp_path)
+    make_db().save_local(db_path)  # index.faiss + index.pkl, no store.json
+    assert vector_store.read_commit(db_path) == {"format": "pickle", "version": 0}
+    assert vector_store.load_store(db_path, FakeEmbeddings()).index.ntotal == len(TEXTS)
+
+    vector_store.save_store(make_db(TEXTS[:1]), db_path, "mmap", FakeEmbeddings())
+    assert store_files(tmp_path) == ["docstore.1.sqlite", "index.1.faiss", "index.faiss", "index.pkl",
+                                     "vectors.1.npy"]
+    vector_store.save_store(make_db(TEXTS[:1]), db_path, "mmap", FakeEmbeddings())
+    assert "index.pkl" not in store_files(tmp_path)
+
+
+def test_missing_store_raises(tmp_path):
+    assert vector_store.store_format(str(tmp_path)) is None
+    with pytest.raises(FileNotFoundError):
+        vector_store.load_store(str(tmp_path), FakeEmbeddings())
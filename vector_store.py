@@ -0,0 +1,227 @@
+"""Pickle-free, memory-mapped on-disk format for the CampusPal vector store.
+
+`python ingest.py --store-format mmap` writes, instead of index<v>.pkl:
+    index<v>.faiss     - the FAISS index, opened with IO_FLAG_MMAP at serve time
+    vectors<v>.npy     - float32 chunk vectors in index order (np.load mmap_mode="r")
+    docstore<v>.sqlite - chunks(position, doc_id, text, metadata JSON), read by ID on demand
+
+Loading maps the files instead of unpickling the docstore, so it takes
+milliseconds, executes no pickled code, and several uvicorn workers share
+the same pages through the OS page cache. The "pickle" format is
+LangChain's save_local.
+
+Every save writes a new version <v> of the files and then replaces
+store.json (format, version), the single commit point: load_store() reads
+the files it names, and servers reload when it changes, so an index is never
+paired with another save's docstore. The previous version is kept for
+servers that have not reloaded yet; older ones are deleted. Stores saved
+before store.json existed use the unversioned names.
+"""
+import os
+import re
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+STORE_FORMATS = ("pickle", "mmap")
+COMMIT_FILE = "store.json"
+STORE_FILE_PATTERN = re.compile(r"^(index(\.\d+)?\.(faiss|pkl)|vectors(\.\d+)?\.npy|docstore(\.\d+)?\.sqlite)$")
+
+
+class SqliteDocstore:
+    """Read-only docstore backed by docstore.sqlite; one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def search(self, search):
+        """Same contract as InMemoryDocstore.search: a Document, or an error string."""
+        row = self._connection().execute(
+            "SELECT text, metadata FROM chunks WHERE doc_id = ?", (search,)
+        ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def doc_id_at(self, position):
+        row = self._connection().execute(
+            "SELECT doc_id FROM chunks WHERE position = ?", (position,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def doc_ids(self):
+        return [row[0] for row in self._connection().execute("SELECT doc_id FROM chunks ORDER BY position")]
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+class LazyIndexToDocstoreId(Mapping):
+    """FAISS position -> docstore ID, looked up in SQLite instead of held as a dict."""
+
+    def __init__(self, docstore):
+        self.docstore = docstore
+        self._length = docstore.count()
+
+    def __getitem__(self, position):
+        return self.docstore.doc_id_at(int(position))
+
+    def __iter__(self):
+        return iter(range(self._length))
+
+    def __len__(self):
+        return self._length
+
+    def values(self):
+        return self.docstore.doc_ids()
+
+
+def store_files(fmt, version):
+    """{role: file name} of one saved version of the store."""
+    suffix = f".{version}" if version else ""
+    if fmt == "pickle":
+        return {"index": f"index{suffix}.faiss", "pickle": f"index{suffix}.pkl"}
+    return {"index": f"index{suffix}.faiss", "vectors": f"vectors{suffix}.npy", "docstore": f"docstore{suffix}.sqlite"}
+
+
+def read_commit(db_path):
+    """{"format", "version"} of the committed store; stores saved before store.json existed
+    are reported as version 0 of whichever format's files are present. None if there is no store."""
+    try:
+        with open(os.path.join(db_path, COMMIT_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    for fmt in ("mmap", "pickle"):
+        if all(os.path.exists(os.path.join(db_path, name)) for name in store_files(fmt, 0).values()):
+            return {"format": fmt, "version": 0}
+    return None
+
+
+def store_format(db_path):
+    """"mmap" or "pickle" for a saved store, None if nothing has been saved there."""
+    commit = read_commit(db_path)
+    return commit["format"] if commit else None
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def save_mmap(db, db_path, vectors, version):
+    """Writes db (a LangChain FAISS store) in the mmap format; `vectors` in index order."""
+    os.makedirs(db_path, exist_ok=True)
+    files = {role: os.path.join(db_path, name) for role, name in store_files("mmap", version).items()}
+    np.save(files["vectors"] + ".tmp.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+    os.replace(files["vectors"] + ".tmp.npy", files["vectors"])
+
+    tmp_path = files["docstore"] + ".tmp"
+    _remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    connection.execute("CREATE TABLE chunks (position INTEGER PRIMARY KEY, doc_id TEXT UNIQUE NOT NULL, "
+                       "text TEXT NOT NULL, metadata TEXT NOT NULL)")
+    rows = []
+    for position in range(len(db.index_to_docstore_id)):
+        doc_id = db.index_to_docstore_id[position]
+        doc = db.docstore.search(doc_id)
+        rows.append((position, doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+    connection.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+    connection.commit()
+    connection.close()
+
+    faiss.write_index(db.index, files["index"] + ".tmp")
+    os.replace(files["index"] + ".tmp", files["index"])
+    os.replace(tmp_path, files["docstore"])
+
+
+def save_store(db, db_path, fmt, embeddings=None):
+    """Saves in `fmt` as a new version, commits it by replacing store.json and then
+    deletes every version but this one and the previous."""
+    previous = read_commit(db_path)
+    version = previous["version"] + 1 if previous else 1
+    if fmt == "pickle":
+        os.makedirs(db_path, exist_ok=True)
+        db.save_local(db_path, index_name=f"index.{version}")
+    else:
+        from faiss_index import store_vectors
+
+        save_mmap(db, db_path, store_vectors(db, embeddings), version)
+
+    tmp_path = os.path.join(db_path, COMMIT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": fmt, "version": version}, f)
+    os.replace(tmp_path, os.path.join(db_path, COMMIT_FILE))
+    # Servers still on the previous version keep using (and lazily opening) its files until they reload
+    keep = set(store_files(fmt, version).values())
+    if previous:
+        keep |= set(store_files(previous["format"], previous["version"]).values())
+    for name in os.listdir(db_path):
+        if STORE_FILE_PATTERN.match(name) and name not in keep:
+            os.remove(os.path.join(db_path, name))
+
+
+def _committed_files(db_path):
+    """(format, {role: path}) of the committed store; raises FileNotFoundError if there is none."""
+    commit = read_commit(db_path)
+    if commit is None:
+        raise FileNotFoundError(f"No vector store found at {db_path}. Run ingest.py first.")
+    files = store_files(commit["format"], commit["version"])
+    return commit["format"], {role: os.path.join(db_path, name) for role, name in files.items()}
+
+
+def load_vectors(db_path):
+    """Memory-mapped chunk vectors of an mmap-format store, or None."""
+    commit = read_commit(db_path)
+    if commit is None or commit["format"] != "mmap":
+        return None
+    path = os.path.join(db_path, store_files("mmap", commit["version"])["vectors"])
+    return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+
+def _read_index(path):
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError as e:
+        # Not every index type supports mmap; it still works, just not shared between processes
+        print(f"[WARN] Could not mmap {path} ({e}) - reading it into memory.")
+        return faiss.read_index(path)
+
+
+def load_store(db_path, embeddings, writable=False):
+    """Loads whichever format is saved at db_path as a LangChain FAISS store.
+
+    Serving (writable=False) maps the mmap format read-only. ingest.py passes
+    writable=True to get an editable in-memory copy it can add to and delete from.
+    """
+    fmt, files = _committed_files(db_path)
+    if fmt == "pickle":
+        index_name = os.path.splitext(os.path.basename(files["index"]))[0]
+        return FAISS.load_local(db_path, embeddings, index_name=index_name, allow_dangerous_deserialization=True)
+
+    index_path = files["index"]
+    docstore = SqliteDocstore(files["docstore"])
+    if not writable:
+        return FAISS(embeddings, _read_index(index_path), docstore, LazyIndexToDocstoreId(docstore))
+
+    doc_ids = docstore.doc_ids()
+    documents = {doc_id: docstore.search(doc_id) for doc_id in doc_ids}
+    return FAISS(embeddings, faiss.read_index(index_path), InMemoryDocstore(documents),
+                 dict(enumerate(doc_ids)))